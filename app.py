@@ -1,360 +1,153 @@
+import dataclasses
 import streamlit as st
-import yt_dlp
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-import json
 import os
-import time
 import re
-import requests
-import urllib.parse
-from datetime import datetime
+import secrets
+import time
+import threading
 from pathlib import Path
+from goumin import gemini
+from goumin.bulk import Checkpoint, checkpoint_path, read_urls, run_bulk
+from goumin.config import Config
+from goumin.engine import Engine
+from goumin.images import downscaled_png, pick_image
+from goumin.ingredients import rescale_recipe, servings
+from goumin.jobs import JobQueue
+from goumin.models import is_error
+from goumin.pipeline import BLOCKED_MSG
 
 # --- CONFIGURATION FAVICON ---
-favicon = "🥘"
-if os.path.exists("favicon.png"):
-    favicon = "favicon.png"
-elif os.path.exists("favicon.ico"):
-    favicon = "favicon.ico"
-
-st.set_page_config(page_title="Goumin", page_icon=favicon, layout="wide")
+@st.cache_resource
+def brand_image(path, size):
+    # Logo et favicon font 2400 px : sans réduction, Streamlit les redécode et les recompresse à chaque rerun
+    return downscaled_png(path, size) if os.path.exists(path) else None
 
-# --- API KEY ---
-if "GOOGLE_API_KEY" in st.secrets:
-    API_KEY = st.secrets["GOOGLE_API_KEY"]
-    
+favicon = brand_image("favicon.png", 64) or brand_image("favicon.ico", 64) or "🥘"
 
-os.environ["GOOGLE_API_KEY"] = API_KEY
-genai.configure(api_key=API_KEY)
+st.set_page_config(page_title="Goumin", page_icon=favicon, layout="wide")
 
-# --- DOSSIERS ---
-DB_FILE = "database.json"
-MEDIA_FOLDER = "media"
-TEMP_FOLDER = "temp"
-Path(MEDIA_FOLDER).mkdir(exist_ok=True)
-Path(TEMP_FOLDER).mkdir(exist_ok=True)
+# --- CONFIGURATION (chemins, modèle, quotas : variables GOUMIN_*, voir goumin/config.py) ---
+CONFIG = Config.from_env()
 
 # --- CSS PREMIUM (DESIGN APPLE) ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap');
-    html, body, [class*="css"] { font-family: 'Poppins', sans-serif; }
-    .stApp { background-color: #F7F7F7; }
-
-    /* Ajustement précis de la taille du logo */
-    [data-testid="stColumn"]:nth-child(2) img {
-        max-width: 150px !important; /* Change 150px par la taille voulue */
-        margin: 0 auto;
-    }
+@st.cache_resource
+def load_css(path="style.css"):
+    # Lu et compacté une fois par process ; Streamlit exige de le réémettre à chaque rerun
+    css = re.sub(r"/\*.*?\*/", "", Path(path).read_text(encoding="utf-8"), flags=re.S)
+    return "<style>" + re.sub(r"\s*([{};:,>])\s*", r"\1", re.sub(r"\s+", " ", css)).strip() + "</style>"
 
-    /* Force le format carré pour les images de recettes */
-    [data-testid="stImage"] img {
-        width: 100%;
-        aspect-ratio: 1 / 1; /* Ratio carré parfait */
-        object-fit: cover;   /* Remplit le carré sans déformer l'image */
-        border-radius: 20px !important;
-    }
-    
-    /* CARTES RECETTES (Style iOS) */
-    div[data-testid="stVerticalBlock"] > div[style*="border"] {
-        background-color: #F7F7F7; 
-        border-radius: 24px !important; /* Plus arrondi */
-        border: none !important;
-        box-shadow: 0 10px 20px rgba(0,0,0,0.05); 
-        padding: 20px; 
-        margin-bottom: 10px;
-    }
-    
-    /* IMAGES ARRONDIES */
-    img { border-radius: 16px !important; object-fit: cover; }
-    
-    /* BOUTONS (Gros et faciles à toucher) */
-    .stButton>button {
-        width: 100%; border-radius: 16px; font-weight: 700; min-height: 55px; border: none;
-        background: linear-gradient(135deg, #FF6B6B 0%, #FF4757 100%); color: white;
-        font-size: 16px !important;
-        box-shadow: 0 4px 15px rgba(255, 71, 87, 0.3);
-    }
-    .stButton>button:active { transform: scale(0.98); }
-    
-    /* CHAMPS TEXTE */
-    .stTextInput>div>div>input {
-        border-radius: 16px; border: 1px solid #E5E5EA; padding: 12px; font-size: 16px;
-    }
-
-    /* TABS (Style Boutons Pillules) */
-    .stTabs [data-baseweb="tab-list"] { 
-        gap: 8px; 
-        overflow-x: auto; /* Permet de scroller les onglets horizontalement sur mobile */
-        white-space: nowrap;
-        padding-bottom: 5px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        background-color: #FFFFFF; border-radius: 20px; border: none; 
-        padding: 8px 20px; font-weight: 600; font-size: 14px;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-    }
-    .stTabs [aria-selected="true"] { background-color: #FF4757 !important; color: white !important; }
-
-    /* TEXTES */
-    h1 { font-size: 28px !important; text-align: center; color: #1C1C1E; }
-    h2 { font-size: 22px !important; color: #1C1C1E; }
-    h3 { font-size: 18px !important; color: #3A3A3C; }
-    
-    /* CUSTOM BADGES */
-    .score-badge {
-        padding: 6px 12px; border-radius: 12px; color: white; font-weight: bold; 
-        font-size: 0.9em; display: inline-block; margin-bottom: 5px;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # --- SESSION STATE ---
 if 'current_recipe' not in st.session_state: st.session_state.current_recipe = None
 if 'generated_recipes' not in st.session_state: st.session_state.generated_recipes = None
 if 'alternative_result' not in st.session_state: st.session_state.alternative_result = None
 if 'frigo_suggestions' not in st.session_state: st.session_state.frigo_suggestions = None
+if 'fridge_matches' not in st.session_state: st.session_state.fridge_matches = None
 if 'workout_plan' not in st.session_state: st.session_state.workout_plan = None
 if 'selected_recipe_id' not in st.session_state: st.session_state.selected_recipe_id = None
 if 'cookies_path' not in st.session_state: st.session_state.cookies_path = None
-if 'shopping_list' not in st.session_state: st.session_state.shopping_list = []    
-
-# --- SECURITE ---
-safety_settings = {
-    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-}
-
-# --- DATABASE ---
-def load_db():
-    if not os.path.exists(DB_FILE): return []
-    try:
-        with open(DB_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Correction rétroactive des champs manquants
-            for r in data:
-                if 'tags' not in r: r['tags'] = []
-                if 'nutrition' not in r: r['nutrition'] = {}
-                if 'score' not in r: r['score'] = 50
-                if 'portion_text' not in r: r['portion_text'] = "Non spécifié"
-            return data
-    except: return []
-
-def save_db(data):
-    with open(DB_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-
-def save_image_locally(url_image, nom_fichier):
-    try:
-        if not url_image: return None
-        if "pollinations" in url_image: return url_image
-        if "http" not in url_image: return None
-        img_data = requests.get(url_image).content
-        chemin = os.path.join(MEDIA_FOLDER, f"{nom_fichier}.jpg")
-        with open(chemin, 'wb') as handler: handler.write(img_data)
-        return chemin
-    except: return None
-
-def save_uploaded_file(uploaded_file, nom_fichier):
-    try:
-        ext = uploaded_file.name.split('.')[-1]
-        chemin = os.path.join(MEDIA_FOLDER, f"{nom_fichier}.{ext}")
-        with open(chemin, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        return chemin
-    except: return None
-
-def add_recipe(recipe, url, thumb_url):
-    db = load_db()
-    uid = datetime.now().strftime("%Y%m%d_%H%M%S")
-    local_img = save_image_locally(thumb_url, uid)
-    final_img = local_img if local_img else thumb_url
-
-    entry = {
-        "id": uid, "date": datetime.now().strftime("%d/%m/%Y"),
-        "nom": recipe.get('nom', 'Sans nom'), "temps": recipe.get('temps', '?'),
-        "tags": recipe.get('tags', []), "nutrition": recipe.get('nutrition', {}),
-        "score": recipe.get('score', 50), "portion_text": recipe.get('portion_text', 'Standard'),
-        "url": url, "ingredients": recipe.get('ingredients', []),
-        "etapes": recipe.get('etapes', []), "image_path": final_img
-    }
-    db.append(entry)
-    save_db(db)
-
-def update_recipe_image(rid, new_path):
-    db = load_db()
-    for r in db:
-        if r['id'] == rid:
-            r['image_path'] = new_path
-            break
-    save_db(db)
-
-def delete_recipe(rid):
-    db = load_db()
-    new_db = [r for r in db if r['id'] != rid]
-    img = os.path.join(MEDIA_FOLDER, rid + ".jpg")
-    if os.path.exists(img):
-        try: os.remove(img)
-        except: pass
-    save_db(new_db)
-
-# --- MOTEUR IA ---
-
-def clean_ai_json(text):
-    try:
-        text = text.replace("```json", "").replace("```", "").strip()
-        if text.startswith("["): return json.loads(text[:text.rfind(']')+1])
-        start, end = text.find('{'), text.rfind('}') + 1
-        return json.loads(text[start:end]) if start != -1 else json.loads(text)
-    except: return {"error": "Erreur format JSON", "raw": text}
-
-def clean_ingredient_name(text):
-    """Nettoie une ligne d'ingrédient pour ne garder que le nom du produit."""
-    # 1. Enlever ce qui est entre parenthèses (ex: "riz (cuit)")
-    text = re.sub(r'\([^)]*\)', '', text)
-    
-    # 2. Enlever les quantités au début (ex: "100g de", "2 c.à.s de", "1/2 tasse")
-    # Cette regex cherche : Chiffres -> Unités optionnelles -> "de/d'" optionnel
-    pattern = r"^[\d\/\-\.,\s]+(?:g|kg|ml|cl|l|oz|lb|cuillères?|c\.à\.s|c\.à\.c|tasses?|verres?|pincées?|tranches?|bottes?|poignées?|gousses?|filets?)\s*(?:à\s*(?:soupe|café|dessert))?\s*(?:de\s+|d'|d’|du\s+|des\s+)?"
-    
-    # On remplace le pattern trouvé par rien
-    clean_text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-    
-    # 3. Nettoyage final (espaces en trop et majuscule)
-    return clean_text.strip().capitalize()
-
-def generate_image_url(food_name):
-    clean_name = urllib.parse.quote(food_name)
-    return f"https://image.pollinations.ai/prompt/delicious_{clean_name}_food_photography_high_quality?width=400&height=300&nologo=true"
-
-# --- DOWNLOADER AVEC GESTION DES COOKIES (SECRETS OU UPLOAD) ---
-def download_video(url):
-    # 1. Priorité aux cookies uploadés manuellement (Sidebar)
-    cookies_to_use = st.session_state.cookies_path
-    
-    # 2. Sinon, on cherche dans les SECRETS Streamlit (Cloud)
-    if not cookies_to_use and "INSTAGRAM_COOKIES" in st.secrets:
-        secret_cookies_path = os.path.join(TEMP_FOLDER, "secret_cookies.txt")
-        # On écrit les secrets dans un fichier temporaire car yt-dlp a besoin d'un fichier
+if 'lib_page' not in st.session_state: st.session_state.lib_page = 0
+if 'import_jobs' not in st.session_state: st.session_state.import_jobs = []
+if 'toast' in st.session_state:
+    msg, icon = st.session_state.pop('toast')
+    st.toast(msg, icon=icon)
+
+# --- MOTEUR (BASE, CACHES, IA, IMPORTS) ---
+@st.cache_resource
+def engine():
+    # Une seule instance par process, partagée par toutes les sessions.
+    # La clé API est lue ici (une fois), le SDK Gemini ne sera chargé qu'au premier appel IA.
+    gemini.configure(st.secrets["GOOGLE_API_KEY"] if "GOOGLE_API_KEY" in st.secrets else None)
+    config = CONFIG
+    if "INSTAGRAM_COOKIES" in st.secrets:
+        # Cookies des SECRETS (Cloud) par défaut ; ceux uploadés dans la sidebar ont la priorité.
+        # On les écrit dans un fichier temporaire car yt-dlp a besoin d'un fichier
+        Path(config.temp_folder).mkdir(exist_ok=True)
+        secret_cookies_path = os.path.join(config.temp_folder, "secret_cookies.txt")
         with open(secret_cookies_path, "w", encoding="utf-8") as f:
             f.write(st.secrets["INSTAGRAM_COOKIES"])
-        cookies_to_use = secret_cookies_path
-
-    ydl_opts = {
-        'format': 'best',
-        'outtmpl': f'{TEMP_FOLDER}/video_%(id)s.%(ext)s',
-        'quiet': True, 'no_warnings': True, 'ignoreerrors': True, 'nocheckcertificate': True,
-        # On se déguise en iPhone
-        'user_agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_8 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1',
-    }
-    
-    # Si on a trouvé des cookies, on les utilise
-    if cookies_to_use:
-        ydl_opts['cookiefile'] = cookies_to_use
-
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            if not info: return None, None, None
-            return ydl.prepare_filename(info), info.get('title', 'Recette'), info.get('thumbnail')
-    except Exception as e: return None, str(e), None
-
-def process_ai_full(video_path, title):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        video_file = genai.upload_file(path=video_path)
-        while video_file.state.name == "PROCESSING": time.sleep(1); video_file = genai.get_file(video_file.name)
-        
-        # PROMPT MODIFIÉ : "ingredients": ["item1", "item2"] (liste simple de strings)
-        prompt = f"""
-        Analyse: "{title}". Recette + Nutrition.
-        INSTRUCTION: 1. Recette complète. 2. Nutri 1 PART. 3. Score Santé Sévère /100.
-        IMPORTANT: 'ingredients' doit être une liste simple de textes (Ex: ["2 oeufs", "100g farine"]). Pas de catégories.
-        JSON STRICT: {{ "nom": "...", "temps": "...", "tags": [], "score": 85, "portion_text": "Selon vidéo", "nutrition": {{ "cal": "...", "prot": "...", "carb": "...", "fat": "..." }}, "ingredients": ["..."], "etapes": [] }}
-        """
-        response = model.generate_content([video_file, prompt], safety_settings=safety_settings)
-        genai.delete_file(video_file.name)
-        return clean_ai_json(response.text)
-    except Exception as e:
-        if os.path.exists(video_path):
-             try: os.remove(video_path)
-             except: pass
-        return {"error": str(e)}
-
-def generate_recipe_from_text(text_description):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"""
-        Crée une recette saine basée sur ce texte : "{text_description}".
-        INSTRUCTION: Recette complète, note sévère, nutrition précise.
-        JSON STRICT: {{ "nom": "...", "temps": "...", "tags": [], "score": 85, "portion_text": "1 personne", "nutrition": {{ "cal": "...", "prot": "...", "carb": "...", "fat": "..." }}, "ingredients": [], "etapes": [] }}
-        """
-        response = model.generate_content(prompt, safety_settings=safety_settings)
-        return clean_ai_json(response.text)
-    except Exception as e: return {"error": str(e)}
-
-def suggest_frigo_recipes(ingredient, nb_pers):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"""
-        J'ai SEULEMENT: "{ingredient}".
-        Propose 3 recettes simples. Ingrédients pour {nb_pers} PERSONNES.
-        IMPORTANT: 'ingredients' doit être une liste simple de textes. Pas de catégories.
-        LISTE JSON: [ {{ "nom": "...", "temps": "...", "score": 75, "portion_text": "Pour {nb_pers} p.", "nutrition": {{ "cal": "...", "prot": "...", "carb": "...", "fat": "..." }}, "ingredients": ["..."], "etapes_courtes": "..." }} ]
-        """
-        response = model.generate_content(prompt, safety_settings=safety_settings)
-        return clean_ai_json(response.text)
-    except Exception as e: return {"error": str(e)}
-
-def generate_chef_proposals(req, frigo_items, options, nb_pers):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        
-        constraint_txt = ""
-        if "Healthy" in options: constraint_txt += "Recettes très saines. "
-        if "Economique" in options: constraint_txt += "Ingrédients pas chers. "
-        if "Rapide" in options: constraint_txt += "Prêt en 15 min. "
-        if "Peu d'ing." in options: constraint_txt += "Max 5 ingrédients. "
-        
-        frigo_txt = f"Utiliser en priorité: {frigo_items}." if frigo_items else ""
-
-        prompt = f"""
-        3 recettes pour : "{req}". {frigo_txt} Contraintes : {constraint_txt}
-        Quantités: {nb_pers} Pers. Nutri: 1 Pers.
-        IMPORTANT: 'ingredients' doit être une liste simple de textes. Pas de catégories.
-        LISTE JSON: [ {{ "nom": "...", "type": "Rapide", "score": 80, "portion_text": "Pour {nb_pers} p.", "nutrition": {{...}}, "ingredients": ["...", "..."], "etapes": [...] }}, ... ]
-        """
-        response = model.generate_content(prompt, safety_settings=safety_settings)
-        return clean_ai_json(response.text)
-    except Exception as e: return {"error": str(e)}
-    
-def generate_workout(time_min, intensity, place, tools):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"""
-        Sport. Temps: {time_min} min. Int: {intensity}. Lieu: {place}. Matos: {tools}.
-        JSON STRICT: {{ "titre": "...", "resume": "...", "echauffement": [], "circuit": [ {{"exo": "...", "rep": "...", "repos": "..."}} ], "cooldown": [] }}
-        """
-        response = model.generate_content(prompt, safety_settings=safety_settings)
-        return clean_ai_json(response.text)
-    except Exception as e: return {"error": str(e)}
-
-def analyze_alternative(prod):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"""Analyse "{prod}". JSON STRICT: {{ "verdict": "Bon/Mauvais/Moyen", "analyse": "...", "alternative": "...", "recette_rapide": "..." }}"""
-        response = model.generate_content(prompt, safety_settings=safety_settings)
-        return clean_ai_json(response.text)
-    except Exception as e: return {"error": str(e)}
+        config = dataclasses.replace(config, cookies_path=secret_cookies_path)
+    return Engine(config)
+
+def user_key():
+    # Compte Streamlit (st.user) si l'utilisateur est connecté : sa liste le suit sur tous ses appareils.
+    # Sinon, en secours, un identifiant gardé dans l'URL (?u=...) : la liste se retrouve en rouvrant le même lien
+    if st.user.get("is_logged_in"):
+        owner = st.user.get("email") or st.user.get("sub")
+        if "u" in st.query_params:  # Liste commencée avant la connexion : rattachée au compte
+            get_store().move_shopping_items(st.query_params["u"], owner)
+            del st.query_params["u"]
+        return owner
+    if "u" not in st.query_params: st.query_params["u"] = secrets.token_urlsafe(8)
+    return st.query_params["u"]
+
+def is_admin():
+    # Onglet Admin : comptes listés dans GOUMIN_ADMINS ("*" : tout le monde, pratique en local)
+    admins = {a.strip().lower() for a in CONFIG.admin_emails.split(",") if a.strip()}
+    if "*" in admins: return True
+    return bool(st.user.get("is_logged_in")) and (st.user.get("email") or "").lower() in admins
+
+def shopping():
+    # Relue en base à chaque exécution (pas gardée en session) : deux onglets du même utilisateur voient la même liste
+    return engine().shopping_list(user_key())
+
+def get_store():
+    return engine().store
+
+@st.cache_resource
+def backfill_job():
+    # Etat partagé du rapatriement d'images (un seul à la fois pour tout le process)
+    return {"thread": None, "progress": (0, 0), "stats": None}
+
+def start_backfill():
+    job, eng = backfill_job(), engine()
+    def run():
+        job["stats"] = eng.backfill_images(progress=lambda d, t: job.update(progress=(d, t)))
+    job["stats"], job["progress"] = None, (0, 0)
+    job["thread"] = threading.Thread(target=run, name="goumin-backfill", daemon=True)
+    job["thread"].start()
+
+# --- TACHES EN ARRIERE-PLAN ---
+@st.cache_resource
+def job_queue():
+    return JobQueue(max_workers=CONFIG.import_workers)
+
+def submit_import(url):
+    """Lance l'import en arrière-plan et renvoie la tâche (suivie ensuite par son id)."""
+    # session_state et les ressources en cache ne se lisent pas depuis un worker : on les capture ici
+    cookies_path, eng = st.session_state.cookies_path, engine()
+    def run(job):
+        recipe, thumb = eng.import_video(url, log=job.log, stage=job.stage, cookies_path=cookies_path,
+                                         on_partial=lambda partial: setattr(job, 'partial', partial))
+        if recipe is None: raise RuntimeError(BLOCKED_MSG)
+        if is_error(recipe): raise RuntimeError(recipe['error'])
+        return {"recipe": recipe, "thumb": thumb, "url": url}
+    return job_queue().submit(run, label=url)
+
+def submit_bulk_import(urls):
+    """Import en masse en arrière-plan : chaque vidéo va directement dans la bibliothèque.
+
+    Relancer la même liste reprend où elle s'était arrêtée (journal de progression dans le dossier temp).
+    """
+    cookies_path, eng = st.session_state.cookies_path, engine()
+    checkpoint = Checkpoint(checkpoint_path(CONFIG.temp_folder, urls))
+    def run(job):
+        job.stage("running")
+        def import_one(url): return eng.pipeline.import_and_save(url, cookies_path=cookies_path)
+        def progress(n, total, entry):
+            job.partial = (n, total)
+            if entry["status"] == "failed": job.log(f"❌ {entry['url']} : {entry['error']}")
+            elif entry.get("doublon_de"): job.log(f"♊ {entry['nom']} : doublon probable d'une recette existante")
+        stats = run_bulk(urls, import_one, workers=CONFIG.bulk_workers, checkpoint=checkpoint, progress=progress)
+        job.log(f"{stats['done']} importées, {stats['failed']} en échec, {stats['skipped']} déjà faites, {stats['duplicates']} doublons probables.")
+        return {"bulk": stats}
+    return job_queue().submit(run, label=f"{len(urls)} vidéos", kind="bulk")
 
 # --- UI HELPERS ---
 
-def display_score(score):
-    try: s = int(score)
-    except: s = 50
+def display_score(s):
+    # Score déjà normalisé en entier 0..100 par parse_recipe
     if s >= 80: color = "#2ed573"
     elif s >= 50: color = "#ffa502"
     else: color = "#ff4757"
@@ -362,40 +155,170 @@ def display_score(score):
 
 def display_nutrition_row(nutri_data):
     c1, c2, c3, c4 = st.columns(4)
-    c1.caption(f"🔥 {nutri_data.get('cal', '?')}")
-    c2.caption(f"🥩 {nutri_data.get('prot', '?')}")
-    c3.caption(f"🍞 {nutri_data.get('carb', '?')}")
-    c4.caption(f"🥑 {nutri_data.get('fat', '?')}")
+    c1.caption(f"🔥 {nutri_data.cal}")
+    c2.caption(f"🥩 {nutri_data.prot}")
+    c3.caption(f"🍞 {nutri_data.carb}")
+    c4.caption(f"🥑 {nutri_data.fat}")
 
-def display_recipe_card_full(r, url, thumb, show_save=False):
+def display_recipe_card_full(r, url, thumb, show_save=False, partial=False, context="card"):
+    # partial=True : recette en cours de rédaction (streaming), on affiche ce qui est déjà arrivé
     # --- GESTION DE L'IMAGE ---
     placeholder = "https://images.unsplash.com/photo-1498837167922-ddd27525d352?q=80&w=1000&auto=format&fit=crop"
     
-    final_img = None
-    if thumb and thumb != "AI_GENERATED" and ("http" in thumb or os.path.exists(thumb)):
-        final_img = thumb
+    if partial:
+        st.caption("✍️ Le chef écrit la recette...")
     else:
-        final_img = generate_image_url(r.get('nom', 'Plat délicieux'))
+        final_img = None
+        if thumb and thumb != "AI_GENERATED" and ("http" in thumb or os.path.exists(thumb)):
+            final_img = thumb
+        else:
+            nom = r.nom or 'Plat délicieux'
+            final_img = engine().dish_images([nom])[nom]
 
-    # On utilise un container pour pouvoir appliquer des styles spécifiques si besoin
-    st.image(final_img if final_img else placeholder, use_container_width=True)
+        # On utilise un container pour pouvoir appliquer des styles spécifiques si besoin
+        st.image(final_img if final_img else placeholder, use_container_width=True)
 
     # --- LE RESTE DU CONTENU (Titre, Scores, Tabs...) ---
-    st.markdown(f"<h2 style='text-align:center; margin-top:10px;'>{r.get('nom', 'Recette')}</h2>", unsafe_allow_html=True)
+    st.markdown(f"<h2 style='text-align:center; margin-top:10px;'>{r.nom}</h2>", unsafe_allow_html=True)
     
     # Ligne d'infos rapides (Déjà dans ton code normalement)
     c1, c2, c3 = st.columns(3)
-    with c1: st.markdown(f"<div style='text-align:center'>⏱️<br><b>{r.get('temps', '?')}</b></div>", unsafe_allow_html=True)
+    with c1: st.markdown(f"<div style='text-align:center'>⏱️<br><b>{r.temps}</b></div>", unsafe_allow_html=True)
     with c2: 
-        score = r.get('score', 50)
+        score = r.score
         color = "#2ed573" if score >= 80 else "#ffa502" if score >= 50 else "#ff4757"
         st.markdown(f"<div style='text-align:center'>❤️<br><span style='color:{color}; font-weight:bold'>{score}/100</span></div>", unsafe_allow_html=True)
-    with c3: st.markdown(f"<div style='text-align:center'>👥<br><b>{r.get('portion_text', 'Standard')}</b></div>", unsafe_allow_html=True)
+    with c3: st.markdown(f"<div style='text-align:center'>👥<br><b>{r.portion_text}</b></div>", unsafe_allow_html=True)
     
     st.divider()
     
-    # ... la suite avec tes onglets (Ingrédients, Étapes, etc.)
+    t_ing, t_steps, t_nutri = st.tabs(["🛒 Ingrédients", "📝 Étapes", "🔥 Nutrition"])
+    with t_ing:
+        lines, base = r.ingredients, servings(r.portion_text)
+        if base and not partial:
+            # Quantités recalculées sur place, sans redemander à l'IA
+            # context : la même recette peut être affichée deux fois (import en cours + bibliothèque)
+            nb = st.number_input("👥 Personnes", 1, max(20, base * 4), base, key=f"pers_{context}_{r.id or r.nom}")
+            if nb != base: lines = rescale_recipe(r, nb)
+        for ing in lines: st.write(f"- {ing}")
+        if not partial and lines and st.button("🛒 Ajouter à la liste de courses", key=f"shop_add_{context}_{r.id or r.nom}"):
+            shopping().add_recipe(r, lines)
+            st.session_state.toast = (f"Ingrédients de « {r.nom} » ajoutés à la liste", "🛒")
+            st.rerun()
+    with t_steps:
+        for i, step in enumerate(r.etapes, start=1): st.write(f"**{i}.** {step}")
+    with t_nutri:
+        display_nutrition_row(r.nutrition)
+
+    if show_save and not partial and not r.id:  # Recette avec un id : déjà en bibliothèque
+        # Doublon probable (signatures locales, sans IA) : on prévient avant d'enregistrer
+        twins = engine().find_duplicates(r)
+        if twins: st.warning("♊ Déjà dans ta bibliothèque ? " + ", ".join(f"« {t.nom} » ({sim:.0%})" for t, sim in twins))
+        if st.button("💾 Enregistrer quand même" if twins else "💾 Ajouter à la bibliothèque", key="save_recipe"):
+            engine().add_recipe(r, url, thumb)
+            st.session_state.current_recipe = None
+            st.session_state.toast = (f"« {r.nom} » ajoutée à la bibliothèque", "📚")
+            st.rerun()
+
+def has_photo(item):
+    path = pick_image(item, "thumb")
+    return bool(path) and (os.path.exists(path) or "http" in path)
+
+def display_similar_recipes(r):
+    # Trouvées par seaux LSH (goumin.similar) : quelques comparaisons, même sur une grosse bibliothèque
+    similar = engine().similar_recipes(r.id, limit=3)
+    if not similar: return
+    st.markdown("**🍽️ Recettes similaires**")
+    generated = engine().dish_images([o.nom for o, _ in similar if not has_photo(o)])
+    cols = st.columns(3)
+    for i, (other, sim) in enumerate(similar):
+        with cols[i]:
+            st.image(pick_image(other, "thumb") if has_photo(other) else generated[other.nom], use_container_width=True)
+            st.caption(f"{other.nom} · {sim:.0%}")
+            if st.button("Voir", key=f"similar_{other.id}"):
+                st.session_state.selected_recipe_id = other.id
+                st.rerun()
             
+def display_chef_proposals(recipes, partial=False):
+    # partial=True : propositions encore en streaming (pas d'image ni de bouton)
+    st.divider()
+    cols = st.columns(3)
+    recipes = recipes[:3]
+    images = {} if partial else engine().dish_images([r.nom for r in recipes])
+    for i, r in enumerate(recipes):
+        with cols[i]:
+            st.subheader(r.type or 'Recette')
+            if partial: st.caption("✍️ ...")
+            else: st.image(images[r.nom], use_container_width=True)
+            st.write(f"**{r.nom}**")
+            if partial:
+                for ing in r.ingredients[:5]: st.caption(f"- {ing}")
+                continue
+            display_score(r.score)
+            if st.button("Voir", key=f"view_{i}"):
+                st.session_state.current_recipe = r
+                st.session_state.current_url = "Chef IA"
+                st.session_state.current_thumb = "AI_GENERATED"
+                st.rerun()
+
+def display_fridge_matches(matches):
+    """Recettes de la bibliothèque faisables avec le frigo. Renvoie True si l'utilisateur veut quand même le Chef IA."""
+    good = [(r, m) for r, m in matches if m.good]
+    st.markdown("**📚 Dans ta bibliothèque**" if good else "**📚 Presque faisable avec ta bibliothèque**")
+    cols = st.columns(len(matches))
+    for i, (r, m) in enumerate(matches):
+        with cols[i]:
+            st.write(f"**{r.nom}**")
+            st.progress(m.coverage, text=f"{m.coverage:.0%} des ingrédients")
+            st.caption("Rien à acheter 🎉" if not m.missing else "À acheter : " + ", ".join(m.missing))
+            if st.button("Voir", key=f"fridge_view_{r.id}"):
+                st.session_state.current_recipe = r
+                st.session_state.current_url = r.url
+                st.session_state.current_thumb = pick_image(r, "medium")
+                st.rerun()
+    return st.button("🤖 Demander quand même au Chef IA", key="fridge_ask_ai") if good else False
+
+JOB_LABELS = {
+    "queued": "⏳ En attente", "downloading": "📥 Téléchargement", "uploading": "📤 Envoi à l'IA",
+    "processing": "⚙️ Traitement vidéo", "generating": "👨‍🍳 Rédaction", "running": "📦 Import en masse",
+    "done": "✅ Fini", "failed": "❌ Echec",
+}
+
+def import_jobs_panel(polling):
+    # Fragment : relancé seul toutes les 2 s tant qu'un import tourne
+    @st.fragment(run_every=2 if polling else None)
+    def panel():
+        queue = job_queue()
+        for jid in reversed(st.session_state.import_jobs):
+            job = queue.get(jid)
+            if not job: continue
+            with st.container(border=True):
+                st.markdown(f"**{JOB_LABELS[job.state]}** · {job.label[:60]} · {job.elapsed:.0f} s")
+                if job.timings: st.caption(" · ".join(f"{JOB_LABELS[k]} {v:.1f}s" for k, v in job.timings.items()))
+                if job.kind == "bulk" and job.partial:
+                    st.progress(job.partial[0] / max(job.partial[1], 1), text=f"{job.partial[0]}/{job.partial[1]} vidéos")
+                for msg in job.messages[-2:]: st.caption(msg)
+                if job.state == "generating" and job.partial:
+                    display_recipe_card_full(job.partial, None, None, partial=True)
+                if job.kind == "bulk":
+                    if job.state == "failed": st.error(job.error)
+                    elif job.finished: st.caption("Les recettes sont dans la 📚 Bibliothèque.")
+                elif job.state == "done" and st.button("Voir la recette", key=f"open_{jid}"):
+                    st.session_state.current_recipe = job.result['recipe']
+                    st.session_state.current_url = job.result['url']
+                    st.session_state.current_thumb = job.result['thumb']
+                    st.session_state.import_jobs.remove(jid)
+                    st.rerun()
+                elif job.state == "failed":
+                    if job.error == BLOCKED_MSG:
+                        st.warning("⚠️ Instagram a bloqué le téléchargement.")
+                        if st.button("Passer en import manuel", key=f"manual_{jid}"):
+                            st.session_state.show_manual_input = True
+                            st.session_state.import_jobs.remove(jid)
+                            st.rerun()
+                    else: st.error(job.error)
+    panel()
+
 # --- CONTENU COMPLET COMPARATEUR (REMIS A NEUF) ---
 def show_comparator_examples():
     examples = {
@@ -466,23 +389,37 @@ with st.sidebar:
         st.info("Mode Manuel : Si Instagram bloque, upload cookies.txt ici.")
         uploaded_cookies = st.file_uploader("Fichier cookies.txt", type=["txt"])
         if uploaded_cookies:
-            cookie_path = os.path.join(TEMP_FOLDER, "cookies.txt")
+            cookie_path = os.path.join(CONFIG.temp_folder, "cookies.txt")
             with open(cookie_path, "wb") as f: f.write(uploaded_cookies.getbuffer())
             st.session_state.cookies_path = cookie_path
             st.success("Cookies chargés ! ✅")
         else:
             st.session_state.cookies_path = None
 
+    # Images distantes -> fichiers locaux, en tâche de fond
+    st.divider()
+    job = backfill_job()
+    running = job["thread"] is not None and job["thread"].is_alive()
+    if st.button("🖼️ Rapatrier les images", disabled=running): start_backfill(); running = True
+    if running: st.caption(f"Images en cours : {job['progress'][0]}/{job['progress'][1]}")
+    elif job["stats"]: st.caption(f"✅ {job['stats']['ok']} images rapatriées, {job['stats']['failed']} en échec.")
+
+    # Cache des réponses IA
+    ai_stats = engine().ai_cache.stats()
+    st.caption(f"🧠 Cache IA : {ai_stats['hits']} hits / {ai_stats['misses']} miss · {ai_stats['entries']} réponses")
+    if st.button("Vider le cache IA"): engine().ai_cache.clear(); st.rerun()
+
 # --- MAIN ---
 
 # --- LOGO DE L'APPLICATION AVEC SECURITE ---
 c_l1, c_l2, c_l3 = st.columns([2, 1, 2]) 
 with c_l2:
-    st.image("logo.png", use_container_width=True)
+    st.image(brand_image("logo.png", 300), use_container_width=True)  # Affiché à 150 px max (CSS), 300 pour le retina
 
 st.write("")
 
-tabs = st.tabs(["👨‍🍳 My name is Chef", "🛒 Courses", "🔄 Comparateur", "🏋️ Coach", "📚 Bibliothèque"])
+tabs = st.tabs(["👨‍🍳 My name is Chef", "🛒 Courses", "🔄 Comparateur", "🏋️ Coach", "📚 Bibliothèque"]
+               + (["📈 Admin"] if is_admin() else []))
 
 # 1. CUISINE (FUSION IMPORT & CHEF)
 with tabs[0]:
@@ -497,23 +434,20 @@ with tabs[0]:
         
         if st.button("Analyser la vidéo"):
             if url:
-                with st.status("Analyse...", expanded=True) as status:
-                    video_path, title, thumb = download_video(url)
-                    
-                    if video_path:
-                        status.write("Vidéo récupérée. IA en cours...")
-                        recipe = process_ai_full(video_path, title)
-                        status.update(label="Fini", state="complete")
-                        if "error" in recipe: st.error(recipe['error'])
-                        else:
-                            st.session_state.current_recipe = recipe
-                            st.session_state.current_url = url
-                            st.session_state.current_thumb = thumb
-                            st.rerun()
-                    else:
-                        status.update(label="Bloqué par Insta", state="error")
-                        st.warning("⚠️ Instagram a bloqué le téléchargement.")
-                        st.session_state.show_manual_input = True
+                st.session_state.import_jobs.append(submit_import(url).id)
+
+        # IMPORT EN MASSE (liste collée ou fichier .txt, une vidéo par ligne)
+        with st.expander("📦 Importer plusieurs vidéos"):
+            pasted = st.text_area("Liens (un par ligne)", key="bulk_urls")
+            bulk_file = st.file_uploader("ou fichier de liens", type=["txt", "csv"], key="bulk_file")
+            urls = read_urls(pasted + "\n" + (bulk_file.getvalue().decode("utf-8", "ignore") if bulk_file else ""))
+            if st.button(f"Importer {len(urls)} vidéos dans la bibliothèque", disabled=not urls, key="bulk_go"):
+                st.session_state.import_jobs.append(submit_bulk_import(urls).id)
+
+        # Suivi des imports : seul ce bloc se rafraîchit, le reste de la page ne bloque pas
+        queue = job_queue()
+        jobs = [j for j in (queue.get(jid) for jid in st.session_state.import_jobs) if j]
+        if jobs: import_jobs_panel(any(not j.finished for j in jobs))
 
         # PLAN B (IMPORT MANUEL)
         if st.session_state.get('show_manual_input'):
@@ -521,15 +455,20 @@ with tabs[0]:
             st.info("💡 Colle la description ou le nom du plat.")
             manual_text = st.text_area("📋 Description / Nom du plat :")
             if st.button("Lancer avec le texte"):
-                with st.spinner("Génération..."):
-                    recipe = generate_recipe_from_text(manual_text)
-                    if "error" in recipe: st.error("Erreur")
-                    else:
-                        st.session_state.current_recipe = recipe
-                        st.session_state.current_url = "Import Manuel"
-                        st.session_state.current_thumb = generate_image_url(recipe.get('nom', 'Plat'))
-                        st.session_state.show_manual_input = False
-                        st.rerun()
+                # La recette s'affiche au fil de la réponse, la dernière valeur est la version finale
+                live = st.empty()
+                recipe = {"error": "Pas de réponse"}
+                for recipe in engine().generate_recipe_from_text(manual_text, stream=True):
+                    if not is_error(recipe):
+                        with live.container(): display_recipe_card_full(recipe, None, None, partial=True)
+                live.empty()
+                if is_error(recipe): st.error("Erreur")
+                else:
+                    st.session_state.current_recipe = recipe
+                    st.session_state.current_url = "Import Manuel"
+                    st.session_state.current_thumb = "AI_GENERATED"
+                    st.session_state.show_manual_input = False
+                    st.rerun()
 
     # --- MODE CHEF IA ---
     else:
@@ -549,72 +488,88 @@ with tabs[0]:
         if opts[2].checkbox("⚡ Rapide"): options_selected.append("Rapide")
         if opts[3].checkbox("📉 Peu d'ing."): options_selected.append("Peu d'ing.")
 
-        if st.button("Inventer mes recettes"):
-            with st.spinner("Le chef réfléchit..."):
-                res = generate_chef_proposals(req, frigo, options_selected, nb_p_c)
-                if "error" in res: st.error("Erreur IA")
-                elif isinstance(res, list): st.session_state.generated_recipes = res
+        b1, b2 = st.columns([3, 1])
+        invent = b1.button("Inventer mes recettes")
+        # "Autres idées" ignore le cache : même demande, nouvelles propositions
+        reroll = b2.button("🎲 Autres idées", disabled=not st.session_state.generated_recipes)
+        if invent:
+            # Frigo renseigné : d'abord la bibliothèque (quelques ms), le Chef IA seulement si rien ne convient
+            st.session_state.fridge_matches = engine().fridge_matches(frigo, req) if frigo.strip() else None
+            if any(m.good for _, m in st.session_state.fridge_matches or []): invent = False
+        if st.session_state.fridge_matches:
+            invent = display_fridge_matches(st.session_state.fridge_matches) or invent
+        if invent or reroll:
+            # Les propositions apparaissent dès que leur nom est lisible
+            live = st.empty()
+            res = {"error": "Pas de réponse"}
+            for res in engine().generate_chef_proposals(req, frigo, options_selected, nb_p_c, use_cache=not reroll, stream=True):
+                if isinstance(res, list):
+                    with live.container(): display_chef_proposals(res, partial=True)
+            live.empty()
+            if is_error(res): st.error("Erreur IA")
+            elif isinstance(res, list): st.session_state.generated_recipes = res
         
         # Affichage des propositions du Chef
         if st.session_state.generated_recipes:
-            st.divider()
-            cols = st.columns(3)
-            for i, r in enumerate(st.session_state.generated_recipes):
-                with cols[i]:
-                    st.subheader(r.get('type', 'Recette'))
-                    st.image(generate_image_url(r.get('nom')), use_container_width=True)
-                    st.write(f"**{r.get('nom')}**")
-                    display_score(r.get('score'))
-                    if st.button("Voir", key=f"view_{i}"):
-                        st.session_state.current_recipe = r
-                        st.session_state.current_url = "Chef IA"
-                        st.session_state.current_thumb = "AI_GENERATED"
-                        st.rerun()
+            display_chef_proposals(st.session_state.generated_recipes)
 
     # --- ZONE D'AFFICHAGE COMMUNE (RECETTE ACTIVE) ---
     if st.session_state.current_recipe:
         st.divider()
-        st.success(f"Recette sélectionnée : {st.session_state.current_recipe.get('nom')}")
-        display_recipe_card_full(st.session_state.current_recipe, st.session_state.current_url, st.session_state.current_thumb, show_save=True)
+        st.success(f"Recette sélectionnée : {st.session_state.current_recipe.nom}")
+        display_recipe_card_full(st.session_state.current_recipe, st.session_state.current_url, st.session_state.current_thumb, show_save=True, context="current")
 
 # 3. NOUVEL ONGLET LISTE DE COURSES
+def toggle_shopping_item(iid):
+    shopping().toggle(iid, st.session_state[f"shop_{iid}"])
+
+@st.fragment
+def shopping_panel():
+    # Fragment : cocher un article ne relance que ce bloc, pas toute l'application
+    courses = shopping()
+    if not len(courses):
+        st.info("Ta liste est vide. Ajoute les ingrédients d'une recette avec 🛒 !")
+        return
+    b1, b2 = st.columns(2)
+    if b1.button("✅ Retirer les articles cochés"): courses.clear(checked_only=True)
+    if b2.button("🗑️ Vider la liste"):
+        courses.clear()
+        st.rerun(scope="fragment")
+
+    for aisle, items in courses.by_aisle():
+        st.markdown(f"**{aisle}**")
+        for item in items:
+            st.checkbox(item.text, value=item.checked, key=f"shop_{item.id}", on_change=toggle_shopping_item,
+                        args=(item.id,), help="Pour : " + ", ".join(item.sources) if item.sources else None)
+
+    # Export simple (texte à copier)
+    st.divider()
+    st.text_area("Copier pour envoyer par SMS :", courses.as_text())
+
 with tabs[1]:
     st.header("🛒 Ma Liste de Courses")
-    
-    if not st.session_state.shopping_list:
-        st.info("Ta liste est vide. Coche des ingrédients dans les recettes !")
-    else:
-        # Bouton pour tout effacer
-        if st.button("🗑️ Vider la liste"):
-            st.session_state.shopping_list = []
-            st.rerun()
-            
-        st.divider()
-        for item in st.session_state.shopping_list:
-            # On affiche juste l'item, ou une checkbox pour le "rayer" (retirer)
-            if st.checkbox(item, value=True, key=f"list_view_{item}"):
-                pass # Si on décoche, ça le retire au prochain rerun
-            else:
-                st.session_state.shopping_list.remove(item)
-                st.rerun()
-        
-        # Export simple (texte à copier)
-        st.divider()
-        st.text_area("Copier pour envoyer par SMS :", "\n".join(["- " + i for i in st.session_state.shopping_list]))
+    shopping_panel()
         
 # 4. COMPARATEUR
 with tabs[2]:
     st.subheader("🔍 Analyser un autre produit")
     prod = st.text_input("Nom du produit (Ex: Kinder Bueno)")
     if st.button("Comparer ce produit"):
-        st.session_state.alternative_result = analyze_alternative(prod)
+        # Produit de la base produits : verdict immédiat, l'IA ne rédige que l'alternative
+        product = engine().find_product(prod)
+        st.session_state.alternative_result = engine().product_analysis(product) if product else engine().analyze_unknown_product(prod)
 
     if st.session_state.alternative_result:
         res = st.session_state.alternative_result
-        if "error" not in res:
+        if not is_error(res):
+            if res.get('product'): st.caption(f"📦 {res['product'].label} · base produits")
             st.success(res.get('verdict'))
             st.write(res.get('analyse'))
-            st.info(f"Mieux : {res.get('alternative')}")
+            if res.get('product') and 'alternative' not in res:
+                with st.spinner("Recherche d'une alternative maison..."):
+                    alt = engine().product_alternative(res['product'])
+                res['alternative'] = None if is_error(alt) else alt.get('alternative')
+            if res.get('alternative'): st.info(f"Mieux : {res.get('alternative')}")
     st.divider()
     st.header("Comparateur Expert")
     show_comparator_examples() # Affiche les 5 exemples complets
@@ -634,24 +589,30 @@ with tabs[3]:
             matos = st.multiselect("Matériel dispo :", ["Haltères", "Vélo Appart", "Elastique", "Tapis"])
             
         if st.button("Créer ma séance"):
-            with st.spinner("Coaching..."):
-                plan = generate_workout(duree, intensite, lieu, str(matos))
-                st.session_state.workout_plan = plan
+            # Séance construite sur place (instantané) ; le coach IA ne fait que la reformuler, sur demande
+            st.session_state.workout_plan = engine().generate_workout(duree, intensite, lieu, matos)
         
-        if st.session_state.workout_plan:
+        if is_error(st.session_state.workout_plan):
+            st.error("Séance illisible, réessaie.")
+        elif st.session_state.workout_plan:
             p = st.session_state.workout_plan
-            st.subheader(f"🔥 {p.get('titre')}")
-            st.write(p.get('resume'))
+            if st.button("✨ Reformuler avec le coach IA", key="workout_enrich"):
+                with st.spinner("Coaching..."):
+                    enriched = engine().enrich_workout(p)
+                if enriched is p: st.warning("Le coach IA n'a pas répondu : séance d'origine conservée.")
+                p = st.session_state.workout_plan = enriched
+            st.subheader(f"🔥 {p.titre}")
+            st.write(p.resume)
             
             st.markdown("### 1. Echauffement")
-            for e in p.get('echauffement', []): st.write(f"- {e}")
+            for e in p.echauffement: st.write(f"- {e}")
             
             st.markdown("### 2. Circuit")
-            for ex in p.get('circuit', []):
-                st.write(f"💪 **{ex.get('exo')}** | {ex.get('rep')} | Repos: {ex.get('repos')}")
+            for ex in p.circuit:
+                st.write(f"💪 **{ex.exo}** | {ex.rep} | Repos: {ex.repos}")
                 
             st.markdown("### 3. Retour au calme")
-            for c in p.get('cooldown', []): st.write(f"- {c}")
+            for c in p.cooldown: st.write(f"- {c}")
             
     # CALCULATEURS
     c1, c2 = st.columns(2)
@@ -727,11 +688,10 @@ with tabs[3]:
 
 with tabs[4]:
     if st.button("🔄 Actualiser"): st.rerun()
-    db = load_db()
     
     # --- VUE DÉTAILLÉE (Si on a cliqué sur une recette) ---
     if st.session_state.selected_recipe_id:
-        r = next((item for item in db if item["id"] == st.session_state.selected_recipe_id), None)
+        r = get_store().get(st.session_state.selected_recipe_id)
         if r:
             # --- BARRE D'ACTIONS (Retour et Actualiser sur la même ligne) ---
             col_back, col_refresh = st.columns([1, 1])
@@ -745,8 +705,13 @@ with tabs[4]:
                 if st.button("🔄 Actualiser", key="refresh_recipe_btn"):
                     st.rerun()
             
+            twin = r.extra.get("doublon_de") and get_store().get(r.extra["doublon_de"])
+            if twin: st.info(f"♊ Doublon probable de « {twin.nom} »")
+
             # Affichage de la fiche recette mobile
-            display_recipe_card_full(r, r.get('url'), r.get('image_path'), show_save=False)
+            display_recipe_card_full(r, r.url, pick_image(r, "medium"), show_save=False, context="library")
+            st.divider()
+            display_similar_recipes(r)
             
             # Modifier l'image
             st.divider()
@@ -756,43 +721,154 @@ with tabs[4]:
                 with c2: uploaded_file = st.file_uploader("Upload image", type=['png', 'jpg', 'jpeg'])
                 
                 if st.button("💾 Sauvegarder nouvelle image"):
-                    new_path = None
-                    if uploaded_file: new_path = save_uploaded_file(uploaded_file, r['id'])
-                    elif new_url_input: new_path = new_url_input
-                    if new_path: update_recipe_image(r['id'], new_path); st.success("Mise à jour !"); time.sleep(1); st.rerun()
+                    new_path, variants = None, None
+                    if uploaded_file: variants = engine().save_uploaded_image(uploaded_file.getvalue())
+                    elif new_url_input:
+                        variants = engine().save_image(new_url_input)
+                        new_path = new_url_input  # Si le téléchargement échoue, on garde le lien
+                    if variants: new_path = variants['medium']
+                    if new_path: engine().update_recipe_image(r.id, new_path, variants); st.success("Mise à jour !"); time.sleep(1); st.rerun()
 
     # --- VUE GRILLE (Si aucune recette n'est sélectionnée) ---
     else:
-        # C'est ici que tu avais l'erreur d'indentation
-        if not db:
-            st.info("Ta bibliothèque est vide.") # <- Cette ligne est maintenant bien décalée
+        store = get_store()
+        if not store.count():
+            st.info("Ta bibliothèque est vide.")
         else:
+            # Tri / filtre / taille de page : on revient à la page 1 dès qu'un réglage change
+            def reset_page(): st.session_state.lib_page = 0
+            sorts = {"🕒 Plus récentes": "recent", "❤️ Meilleur score": "score", "📅 Date": "date", "⏳ Plus anciennes": "oldest",
+                     "🔥 Moins caloriques": "kcal", "🥩 Plus protéinées": "prot"}
+            # Recherche en cours : tri par pertinence proposé (et choisi) en premier
+            if st.session_state.get("lib_query", "").strip(): sorts = {"🎯 Pertinence": "relevance", **sorts}
+            f1, f2, f3 = st.columns([2, 2, 1])
+            sort_label = f1.selectbox("Trier par", list(sorts), on_change=reset_page)
+            tag = f2.selectbox("Tag", ["Tous"] + store.tags(), on_change=reset_page)
+            sizes = sorted({6, 12, 24, 48, CONFIG.page_size})
+            page_size = f3.selectbox("Par page", sizes, index=sizes.index(CONFIG.page_size), on_change=reset_page)
+
+            # Recherche (sans accents, tolère les fautes) et filtres
+            query = st.text_input("🔎 Rechercher", placeholder="Nom, tag ou ingrédient (ex: courgette feta)",
+                                  key="lib_query", on_change=reset_page)
+            with st.expander("Filtres"):
+                g1, g2 = st.columns(2)
+                score_range = g1.slider("Score", 0, 100, (0, 100), key="lib_score", on_change=reset_page)
+                max_minutes = g2.number_input("Temps max (min)", 0, 600, 0, step=5, key="lib_minutes",
+                                              help="0 = sans limite", on_change=reset_page)
+                max_cal = g1.number_input("Calories max / pers.", 0, 3000, 0, step=50, key="lib_cal",
+                                          help="0 = sans limite", on_change=reset_page)
+                min_prot = g2.number_input("Protéines min (g)", 0, 200, 0, step=5, key="lib_prot", on_change=reset_page)
+
+            tag = None if tag == "Tous" else tag
+            filters = {}
+            if score_range != (0, 100): filters["score"] = score_range
+            if max_minutes: filters["minutes"] = (None, max_minutes)
+            if max_cal: filters["cal"] = (None, max_cal)
+            if min_prot: filters["prot"] = (min_prot, None)
+            searching = bool(query.strip() or filters)
+
+            if searching:
+                # Index en mémoire : ids classés par pertinence, puis par score
+                found = engine().search(query, tag=tag, **filters)
+                # Tri choisi appliqué aux résultats : numérique en colonnes NumPy, par date / ajout dans SQLite
+                numeric_sorts = {"score": ("score", True), "kcal": ("kcal", False), "prot": ("prot_g", True)}
+                order = sorts[sort_label]
+                if order in numeric_sorts:
+                    field, descending = numeric_sorts[order]
+                    found = engine().library_columns().rank(field, descending, ids=found)
+                elif order != "relevance": found = store.sort_ids(found, order)
+                total = len(found)
+            else:
+                total = store.count(tag=tag)
+            nb_pages = max(1, -(-total // page_size))
+            page = min(st.session_state.lib_page, nb_pages - 1)
+
+            # Seule la tranche visible est lue et affichée
+            if searching:
+                items = store.get_many(found[page * page_size:(page + 1) * page_size])
+                if not total: st.info("Aucune recette ne correspond.")
+            else:
+                items = store.page(offset=page * page_size, limit=page_size, order=sorts[sort_label], tag=tag)
+
+            # Moyennes de la bibliothèque (ou des résultats de la recherche)
+            with st.expander("📊 Nutrition moyenne"):
+                cols = engine().library_columns()
+                selection = found if searching else None
+                means = cols.means(selection)
+                if means["kcal"] is None: st.caption("Aucune valeur nutritionnelle connue.")
+                else:
+                    m1, m2, m3, m4 = st.columns(4)
+                    for col, label, f, unit in ((m1, "🔥 Calories", "kcal", " kcal"), (m2, "🥩 Protéines", "prot_g", " g"),
+                                                (m3, "🍞 Glucides", "carb_g", " g"), (m4, "🥑 Lipides", "fat_g", " g")):
+                        col.metric(label, "?" if means[f] is None else f"{means[f]:.0f}{unit}")
+                    st.caption(f"Par personne, sur {cols.known('kcal', selection)} recettes renseignées.")
+                    best = store.get_many(cols.rank("prot_pct", ids=selection, limit=3, known_only=True))
+                    if best: st.caption("💪 Les plus riches en protéines : " + " · ".join(r.nom for r in best))
+
+            # Images générées des recettes sans photo : un seul lot, en parallèle
+            generated = engine().dish_images([item.nom for item in items if not has_photo(item)])
+
             # MODE MOBILE : 2 COLONNES (au lieu de 6)
             cols = st.columns(2) 
-            for i, item in enumerate(reversed(db)):
+            for i, item in enumerate(items):
                 with cols[i % 2]: # On alterne colonne 1 / colonne 2
                     with st.container(border=True):
-                        # Image
-                        img_path = item.get('image_path')
-                        if img_path and (os.path.exists(img_path) or "http" in img_path):
-                             st.image(img_path, use_container_width=True)
+                        # Image (plus petite variante disponible)
+                        if has_photo(item):
+                             st.image(pick_image(item, "thumb"), use_container_width=True)
                         else:
-                             st.image(generate_image_url(item['nom']), use_container_width=True)
+                             st.image(generated[item.nom], use_container_width=True)
                         
                         # Titre court en gras
-                        st.markdown(f"<div style='font-weight:bold; font-size:1.1em; margin-bottom:5px; height:50px; overflow:hidden;'>{item['nom'][:40]}..</div>", unsafe_allow_html=True)
+                        st.markdown(f"<div style='font-weight:bold; font-size:1.1em; margin-bottom:5px; height:50px; overflow:hidden;'>{item.nom[:40]}..</div>", unsafe_allow_html=True)
                         
                         # Score
-                        display_score(item.get('score'))
+                        display_score(item.score)
                         
                         st.write("") # Petit espace
                         
                         # Bouton VOIR (Prend toute la largeur)
-                        if st.button("Voir", key=f"see_{item['id']}"):
-                            st.session_state.selected_recipe_id = item['id']
+                        if st.button("Voir", key=f"see_{item.id}"):
+                            st.session_state.selected_recipe_id = item.id
                             st.rerun()
                         
                         # Bouton SUPPRIMER (Discret en dessous)
-                        if st.button("🗑️", key=f"del_{item['id']}"):
-                            delete_recipe(item['id'])
+                        if st.button("🗑️", key=f"del_{item.id}"):
+                            engine().delete_recipe(item.id)
                             st.rerun()
+
+            # PAGINATION
+            p1, p2, p3 = st.columns([1, 2, 1])
+            if p1.button("⬅️", key="lib_prev", disabled=page == 0):
+                st.session_state.lib_page = page - 1
+                st.rerun()
+            p2.markdown(f"<div style='text-align:center'>Page {page + 1} / {nb_pages} · {total} recettes</div>", unsafe_allow_html=True)
+            if p3.button("➡️", key="lib_next", disabled=page >= nb_pages - 1):
+                st.session_state.lib_page = page + 1
+                st.rerun()
+
+# 6. ADMIN (MESURES DES IMPORTS ET DE L'IA)
+if len(tabs) > 5:
+    with tabs[5]:
+        st.header("📈 Mesures")
+        tel = engine().telemetry
+        stats = tel.stats()
+        if not stats: st.info("Aucune mesure pour l'instant : lance un import ou une recette IA.")
+        else:
+            ms = lambda v: round(v * 1000, 1)
+            st.dataframe([{"étape": stage, "appels": s["count"], "erreurs": s["errors"], "p50 (ms)": ms(s["p50"]),
+                           "p95 (ms)": ms(s["p95"]), "moyenne (ms)": ms(s["mean"])}
+                          for stage, s in sorted(stats.items())], hide_index=True, use_container_width=True)
+        counters = tel.counters()
+        counter = lambda name, **labels: counters.get((name, tuple(sorted(labels.items()))), 0)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Envoyé à Gemini", f"{counter('upload_bytes') / 1e6:.1f} Mo")
+        m2.metric("Jetons (entrée / sortie)", f"{counter('gemini_tokens', kind='prompt'):g} / {counter('gemini_tokens', kind='output'):g}")
+        m3.metric("Cache IA (hits / miss)", f"{counter('ai_cache', result='hit'):g} / {counter('ai_cache', result='miss'):g}")
+        m4.metric("Vidéos réutilisées", f"{counter('imports_reused'):g}")
+        if tel.errors:
+            st.subheader("Dernières erreurs")
+            for when, stage, error in reversed(tel.errors): st.caption(f"{when} · **{stage}** · {error[:200]}")
+        with st.expander("Format Prometheus"):
+            st.code(tel.prometheus_text(), language="text")
+            if CONFIG.metrics_file: st.caption(f"Aussi écrit dans `{CONFIG.metrics_file}` ; journal détaillé : `{CONFIG.trace_file}`")
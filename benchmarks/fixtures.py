@@ -0,0 +1,215 @@
+"""Données et services factices des benchmarks : bibliothèques synthétiques, yt-dlp, Gemini et images locaux.
+
+    recipes = synthetic_recipes(10_000)                       # Toujours les mêmes pour une même graine
+    calls = install_standins(download_s=0.5, generate_s=2.0)  # Plus aucun appel réseau dans ce process
+
+Les remplaçants n'imitent que ce que Goumin utilise des vraies bibliothèques : YoutubeDL.extract_info /
+prepare_filename, upload_file / get_file / delete_file et GenerativeModel.generate_content (streaming ou non),
+et le Fetcher partagé (images générées, miniatures), avec une latence réglable. Les réponses de Gemini
+sont des recettes plausibles, tirées du titre ou du prompt.
+"""
+import functools
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from datetime import date, timedelta
+
+from goumin.fetcher import Fetcher
+from goumin.models import Nutrition, Recipe
+
+# --- BIBLIOTHEQUE SYNTHETIQUE ---
+# (nom, unités possibles, quantités) : lignes du style "200 g de pâtes", "2 oeufs", "1 c. à soupe de miel"
+INGREDIENTS = [
+    ("pâtes", ["g"], (100, 500)), ("riz basmati", ["g"], (100, 400)), ("pommes de terre", ["g"], (200, 1500)),
+    ("oeufs", [""], (1, 6)), ("farine", ["g"], (50, 500)), ("lait", ["ml", "cl"], (10, 500)),
+    ("crème fraîche", ["cl", "g"], (10, 250)), ("beurre", ["g"], (10, 125)), ("parmesan", ["g"], (20, 100)),
+    ("feta", ["g"], (50, 200)), ("mozzarella", ["g", "boule"], (1, 250)), ("chèvre frais", ["g"], (50, 150)),
+    ("poulet", ["g", "filets"], (1, 600)), ("saumon", ["g", "pavés"], (1, 400)), ("lardons", ["g"], (50, 200)),
+    ("boeuf haché", ["g"], (200, 600)), ("thon", ["g", "boîte"], (1, 200)), ("crevettes", ["g"], (100, 400)),
+    ("courgettes", [""], (1, 4)), ("tomates", ["", "g"], (1, 500)), ("oignon", [""], (1, 3)),
+    ("ail", ["gousses"], (1, 4)), ("champignons", ["g"], (100, 400)), ("épinards", ["g"], (100, 400)),
+    ("poireaux", [""], (1, 4)), ("carottes", ["", "g"], (1, 500)), ("poivron rouge", [""], (1, 3)),
+    ("aubergine", [""], (1, 2)), ("avocat", [""], (1, 3)), ("citron", [""], (1, 2)),
+    ("lentilles corail", ["g"], (100, 300)), ("pois chiches", ["g", "boîte"], (1, 400)), ("quinoa", ["g"], (80, 300)),
+    ("lait de coco", ["cl", "ml"], (10, 400)), ("curry", ["c. à café", "c. à soupe"], (1, 3)),
+    ("miel", ["c. à soupe"], (1, 3)), ("sucre", ["g"], (20, 200)), ("chocolat noir", ["g"], (50, 200)),
+    ("pommes", [""], (1, 6)), ("bananes", [""], (1, 4)), ("huile d'olive", ["c. à soupe", "cl"], (1, 5)),
+    ("bouillon de légumes", ["cube", "cl"], (1, 50)), ("coriandre", ["bouquet", "brins"], (1, 5)),
+]
+STAPLE_LINES = ["Sel, poivre", "1 pincée de sel", "Poivre du moulin", "2 c. à soupe d'huile d'olive"]
+DISHES = ["Gratin", "Curry", "Salade", "Poêlée", "Risotto", "Tarte", "Soupe", "Wok", "Omelette", "Gâteau",
+          "Bowl", "Lasagnes", "Quiche", "Velouté", "Cake", "Pâtes", "Galettes", "Crumble", "Tajine", "Buddha bowl"]
+SUFFIXES = ["", "", " maison", " express", " du soir", " de mamie", " healthy", " à la poêle", " au four"]
+TAGS = ["Rapide", "Healthy", "Végé", "Dessert", "Economique", "Protéiné", "Batch cooking", "Sans gluten"]
+
+
+def _line(rng, name, units, span):
+    unit = rng.choice(units)
+    metric = unit in ("g", "ml", "cl")
+    qty = rng.randint(*span) if metric else rng.randint(1, min(span[1], 6))
+    if not unit: return f"{qty} {name}"
+    of = "d'" if name[0] in "aeiouyéh" else "de "
+    return f"{qty}{rng.choice(['', ' ']) if metric else ' '}{unit} {of}{name}"
+
+
+def synthetic_recipe(rng, rid):
+    picks = rng.sample(INGREDIENTS, rng.randint(4, 9))
+    main, second = picks[0][0], picks[1][0]
+    nom = f"{rng.choice(DISHES)} {'aux' if main.endswith('s') else 'au'} {main} et {second}{rng.choice(SUFFIXES)}"
+    ingredients = [_line(rng, *p) for p in picks] + rng.sample(STAPLE_LINES, rng.randint(0, 2))
+    return Recipe(
+        nom=nom, temps=f"{rng.choice([10, 15, 20, 25, 30, 40, 45, 60, 90])} min", tags=rng.sample(TAGS, rng.randint(1, 3)),
+        score=rng.randint(20, 98), portion_text=f"Pour {rng.choice([1, 2, 4, 6])} p.",
+        nutrition=Nutrition(cal=f"{rng.randint(150, 950)} kcal", prot=f"{rng.randint(3, 60)}g",
+                            carb=f"{rng.randint(5, 120)}g", fat=f"{rng.randint(2, 60)}g"),
+        ingredients=ingredients, etapes=[f"Étape {i + 1} : préparer {p[0]}." for i, p in enumerate(picks[:rng.randint(3, 6)])],
+        id=rid, date=(date(2023, 1, 1) + timedelta(days=rng.randint(0, 1000))).strftime("%d/%m/%Y"),
+        url=f"https://www.tiktok.com/@goumin/video/{rng.getrandbits(60)}",
+        # Miniature distante, comme un import : la grille n'a pas à générer d'image (domaine .test : jamais résolu)
+        image_path=f"https://images.goumin.test/{rid or rng.getrandbits(40)}.jpg",
+    )
+
+
+def synthetic_recipes(n, seed=0, start=0):
+    """`n` recettes réalistes (noms, lignes d'ingrédients avec unités, nutrition, tags), ids uniques et stables."""
+    rng = random.Random(f"{seed}:{start}")
+    return [synthetic_recipe(rng, f"20240101_000000_{seed:02x}{i:08x}") for i in range(start, start + n)]
+
+
+# --- REMPLAÇANTS YT-DLP ET GEMINI ---
+class _Latency:
+    download_s = 0.0     # Téléchargement d'une vidéo (yt-dlp)
+    upload_s = 0.0       # Envoi d'un fichier à Gemini
+    generate_s = 0.0     # Réponse complète de Gemini (étalée sur les morceaux en streaming)
+    image_s = 0.0        # Téléchargement d'une image (plat généré, miniature)
+    video_bytes = 2_000_000
+    chunks = 8
+
+
+LATENCY = _Latency()
+CALLS = Counter()
+_calls_lock = threading.Lock()
+
+
+def _count(name):
+    with _calls_lock: CALLS[name] += 1
+
+
+class StandinYoutubeDL:
+    """yt_dlp.YoutubeDL : l'id de la vidéo est la fin de l'URL ; download=True écrit une fausse vidéo."""
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): return False
+
+    def extract_info(self, url, download=True, process=True):
+        vid = url.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+        info = {"id": vid, "ext": "mp4", "extractor_key": "TikTok", "title": f"Recette {vid}", "thumbnail": None}
+        if not download:
+            _count("probe")
+            return info
+        _count("download")
+        time.sleep(LATENCY.download_s)
+        with open(self.prepare_filename(info), "wb") as f: f.write(os.urandom(LATENCY.video_bytes))
+        return info
+
+    def prepare_filename(self, info):
+        return self.opts["outtmpl"] % info
+
+
+class _File:
+    def __init__(self, name):
+        self.name, self.state = name, types.SimpleNamespace(name="ACTIVE")
+
+
+class _Response:
+    def __init__(self, text, prompt_tokens=0, output_tokens=0):
+        self.text = text
+        self.usage_metadata = types.SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens)
+
+
+def _answer(prompt):
+    """Réponse plausible au prompt : liste de recettes pour le Chef, sinon une recette tirée du titre."""
+    rng = random.Random(prompt)
+    if "LISTE JSON" in prompt:
+        return [dict(synthetic_recipe(rng, "").to_dict(), type=t) for t in ("Rapide", "Healthy", "Gourmand")]
+    return synthetic_recipe(rng, "").to_dict()
+
+
+class StandinModel:
+    """google.generativeai.GenerativeModel, sans réseau."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        _count("generate")
+        prompt = contents if isinstance(contents, str) else contents[-1]
+        text = json.dumps(_answer(prompt), ensure_ascii=False)
+        tokens = len(prompt) // 4 + 258 * (0 if isinstance(contents, str) else len(contents) - 1), len(text) // 4
+        if not stream:
+            time.sleep(LATENCY.generate_s)
+            return _Response(text, *tokens)
+        return self._stream(text, tokens)
+
+    @staticmethod
+    def _stream(text, tokens):
+        size = -(-len(text) // LATENCY.chunks)
+        for i in range(0, len(text), size):
+            time.sleep(LATENCY.generate_s / LATENCY.chunks)
+            last = i + size >= len(text)
+            yield _Response(text[i:i + size], *(tokens if last else (0, 0)))  # Totaux sur le dernier morceau, comme Gemini
+
+
+def _upload_file(path):
+    _count("upload")
+    time.sleep(LATENCY.upload_s)
+    return _File(os.path.basename(path))
+
+
+@functools.cache
+def _jpeg():
+    from PIL import Image
+    out = io.BytesIO()
+    Image.new("RGB", (400, 300), (230, 160, 90)).save(out, "JPEG", quality=80)
+    return out.getvalue()
+
+
+class StandinFetcher(Fetcher):
+    """Fetcher : toute URL renvoie la même petite image JPEG."""
+
+    def get_bytes(self, url, timeout=None):
+        _count("image")
+        time.sleep(LATENCY.image_s)
+        return _jpeg()
+
+
+def install_standins(download_s=0.0, upload_s=0.0, generate_s=0.0, image_s=0.0, video_bytes=2_000_000, ffmpeg=False):
+    """Remplace yt-dlp, Gemini et le Fetcher partagé dans ce process (à appeler avant de créer l'Engine).
+
+    Renvoie le compteur d'appels (download, probe, upload, generate, image).
+    ffmpeg=False : la vidéo est envoyée telle quelle (la fausse vidéo n'est pas décodable).
+    """
+    from goumin import fetcher, gemini, video
+    LATENCY.download_s, LATENCY.upload_s, LATENCY.generate_s = download_s, upload_s, generate_s
+    LATENCY.image_s, LATENCY.video_bytes = image_s, video_bytes
+    fetcher._shared = StandinFetcher()
+    sys.modules["yt_dlp"] = types.SimpleNamespace(YoutubeDL=StandinYoutubeDL)
+    genai = types.SimpleNamespace(GenerativeModel=StandinModel, GenerationConfig=dict, upload_file=_upload_file,
+                                  get_file=_File, delete_file=lambda name: None)
+    # functools.cache : gemini.configure() appelle cache_clear() sur ces deux fonctions
+    gemini.client = functools.cache(lambda: genai)
+    gemini.model = functools.cache(StandinModel)
+    gemini.safety_settings = lambda: None
+    if not ffmpeg: video.ffmpeg_binary = lambda: None
+    CALLS.clear()
+    return CALLS
@@ -0,0 +1,235 @@
+"""Tenue en charge : opérations de la bibliothèque sur 1k / 10k / 100k recettes, et import vidéo complet.
+
+    python benchmarks/library.py [--sizes 1000,10000,100000] [--ops 200] [--imports 20]
+                                 [--download-latency 0.5] [--ai-latency 2] [--json library.json]
+    python benchmarks/library.py --compare avant.json apres.json
+
+Pour chaque taille, une bibliothèque synthétique (benchmarks/fixtures.py) est écrite dans une base temporaire :
+écriture complète (replace_all, l'ancien save_db), relecture complète (all, l'ancien load_db), première page,
+add_recipe / delete_recipe de l'Engine, clean_ingredient_name sur toutes les lignes d'ingrédients, puis
+affichage de la grille de la Bibliothèque (AppTest, dans un interpréteur neuf : premier run, rerun, page
+suivante, tri, recherche). L'import vidéo complet passe par le vrai pipeline avec yt-dlp et Gemini
+remplacés par des versions locales à latence réglable (en série, en parallèle, puis vidéos déjà analysées).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fixtures import install_standins, synthetic_recipes  # noqa: E402
+from goumin.config import Config  # noqa: E402
+from goumin.engine import Engine  # noqa: E402
+from goumin.ingredients import clean_ingredient_name, parse_ingredient  # noqa: E402
+from goumin.storage import RecipeStore  # noqa: E402
+from goumin.telemetry import Telemetry  # noqa: E402
+
+REGRESSION = 1.2  # --compare : signalé au-delà de +20 %
+
+GRID_PROBE = """
+import json, statistics, time
+from streamlit.testing.v1 import AppTest
+
+def timed(step):
+    t = time.perf_counter(); step(); return time.perf_counter() - t
+
+at = AppTest.from_file({app!r}, default_timeout=600)
+result = {{"cold_run_s": timed(at.run)}}
+result["rerun_s"] = statistics.median(timed(at.run) for _ in range({reruns}))
+result["next_page_s"] = timed(at.button(key="lib_next").click().run)
+sort = next(s for s in at.selectbox if s.label == "Trier par")
+result["sort_score_s"] = timed(sort.set_value("❤️ Meilleur score").run)
+result["search_s"] = timed(at.text_input(key="lib_query").input("courgettes feta").run)
+result["errors"] = [str(e.value) for e in at.exception]
+print(json.dumps(result))
+"""
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t
+
+
+def summary(seconds):
+    """{"median_ms", "p95_ms"} d'une liste de durées en secondes."""
+    ordered = sorted(seconds)
+    return {"median_ms": round(statistics.median(ordered) * 1000, 3),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3)}
+
+
+def bench_config(folder):
+    # Pas de quota ni de journal : on mesure le code, pas les limites de débit
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    return Config(db_file=f"{folder}/goumin.db", ai_cache_file=f"{folder}/ai_cache.db", media_folder=f"{folder}/media",
+                  temp_folder=f"{folder}/temp", ydl_per_minute=0, gemini_per_minute=0, trace_file="", metrics_file="",
+                  legacy_json=f"{folder}/database.json")
+
+
+# --- BIBLIOTHEQUE ---
+def bench_library(size, ops, folder, reruns, grid=True):
+    config = bench_config(folder)
+    recipes = synthetic_recipes(size)
+    engine = Engine(config)
+    result = {"size": size}
+
+    result["write_all_s"] = round(timed(engine.store.replace_all, recipes), 3)
+    result["open_s"] = round(timed(lambda: RecipeStore(config.db_file).count()), 4)
+    result["load_all_s"] = round(timed(engine.store.all), 3)
+    result["first_page"] = summary([timed(engine.store.page, 0, config.page_size) for _ in range(20)])
+
+    # add_recipe : le premier appel charge les signatures de toute la bibliothèque (détection des doublons)
+    extra = synthetic_recipes(ops, start=size)
+    added = []
+    result["add_first_s"] = round(timed(lambda: added.append(engine.add_recipe(extra[0], extra[0].url, None))), 4)
+    times = []
+    for r in extra[1:]:
+        t = time.perf_counter()
+        added.append(engine.add_recipe(r, r.url, None))
+        times.append(time.perf_counter() - t)
+    result["add_recipe"] = summary(times)
+    result["delete_recipe"] = summary([timed(engine.delete_recipe, r.id) for r in added])
+
+    lines = [line for r in recipes for line in r.ingredients]
+    parse_ingredient.cache_clear()
+    cold = timed(lambda: [clean_ingredient_name(line) for line in lines])
+    warm = timed(lambda: [clean_ingredient_name(line) for line in lines])
+    result["clean_ingredient_name"] = {"lines": len(lines), "distinct": len(set(lines)),
+                                       "cold_s": round(cold, 3), "warm_s": round(warm, 3)}
+
+    result["grid"] = None
+    if not grid: return result
+    env = dict(os.environ, PYTHONPATH=str(ROOT), GOUMIN_DB=config.db_file, GOUMIN_AI_CACHE=config.ai_cache_file,
+               GOUMIN_MEDIA=config.media_folder, GOUMIN_TEMP=config.temp_folder, GOUMIN_TRACE="", GOUMIN_METRICS="")
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    out = subprocess.run([sys.executable, "-c", GRID_PROBE.format(app=str(ROOT / "app.py"), reruns=reruns)],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result["grid"] = {k: round(v, 4) if isinstance(v, float) else v
+                      for k, v in json.loads(out.stdout.strip().splitlines()[-1]).items()}
+    return result
+
+
+# --- IMPORT VIDEO DE BOUT EN BOUT ---
+def bench_imports(count, folder, download_s, ai_s, video_mb):
+    calls = install_standins(download_s=download_s, upload_s=download_s / 4, generate_s=ai_s,
+                             video_bytes=int(video_mb * 1e6))
+    config = bench_config(folder)
+    engine = Engine(config)
+    urls = [f"https://www.tiktok.com/@goumin/video/{7300000000000000000 + i}" for i in range(2 * count)]
+    result = {"download_latency_s": download_s, "ai_latency_s": ai_s, "video_mb": video_mb}
+
+    def phase(name, urls, workers=1):
+        engine.telemetry = engine.pipeline.telemetry = Telemetry()
+        failed = []
+        def one(url):
+            t = time.perf_counter()
+            try: engine.pipeline.import_and_save(url)
+            except RuntimeError as e: failed.append(str(e))
+            return time.perf_counter() - t
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool: times = list(pool.map(one, urls))
+        wall = time.perf_counter() - start
+        stages = {stage: {"p50_ms": round(s["p50"] * 1000, 2), "p95_ms": round(s["p95"] * 1000, 2), "errors": s["errors"]}
+                  for stage, s in engine.telemetry.stats().items()}
+        result[name] = {"imports": len(urls), "failed": len(failed), "errors": sorted(set(failed))[:5],
+                        "workers": workers, **summary(times), "wall_s": round(wall, 3),
+                        "per_minute": round(60 * len(urls) / wall, 1), "stages": stages}
+
+    phase("sequential", urls[:count])
+    phase("parallel", urls[count:], workers=config.import_workers)
+    phase("reused", urls[:count])  # Vidéos déjà analysées : ni téléchargement ni IA
+    result["calls"] = dict(calls)
+    return result
+
+
+# --- COMPARAISON ---
+def flatten(data, prefix=""):
+    """{"a.b.c": valeur} pour les durées (clés en _s / _ms) d'un résultat."""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict): flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and key.endswith(("_s", "_ms")): flat[name] = value
+    return flat
+
+
+def compare(old_path, new_path):
+    old, new = (json.loads(Path(p).read_text(encoding="utf-8")) for p in (old_path, new_path))
+    regressions = 0
+    for section in ("libraries", "imports"):
+        a, b = old.get(section), new.get(section)
+        if section == "libraries":  # Comparées taille par taille
+            a, b = ({str(x["size"]): x for x in lib or []} for lib in (a, b))
+        old_flat, new_flat = flatten(a or {}), flatten(b or {})
+        for name in sorted(old_flat.keys() & new_flat.keys()):
+            before, after = old_flat[name], new_flat[name]
+            ratio = after / before if before else 1.0
+            flag = "⚠️" if ratio > REGRESSION else "  "
+            regressions += ratio > REGRESSION
+            print(f"{flag} {section}.{name:55} {before:10.3f} → {after:10.3f}  (x{ratio:.2f})")
+    print(f"{regressions} mesure(s) plus lente(s) de plus de {(REGRESSION - 1) * 100:.0f} %")
+    return regressions
+
+
+def git_version():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError: return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure la bibliothèque et l'import vidéo de Goumin sur des données synthétiques.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Tailles de bibliothèque, séparées par des virgules")
+    parser.add_argument("--ops", type=int, default=200, help="add_recipe / delete_recipe mesurés par taille")
+    parser.add_argument("--reruns", type=int, default=3)
+    parser.add_argument("--imports", type=int, default=20, help="Imports vidéo par phase (0 : pas d'import)")
+    parser.add_argument("--download-latency", type=float, default=0.5, help="Secondes par téléchargement yt-dlp")
+    parser.add_argument("--ai-latency", type=float, default=2.0, help="Secondes par réponse Gemini")
+    parser.add_argument("--video-mb", type=float, default=2.0)
+    parser.add_argument("--no-grid", action="store_true", help="Sans l'affichage de la grille (AppTest)")
+    parser.add_argument("--json", help="Écrit aussi les résultats dans ce fichier")
+    parser.add_argument("--compare", nargs=2, metavar=("AVANT", "APRES"), help="Compare deux fichiers de résultats")
+    args = parser.parse_args(argv)
+    if args.compare: return compare(*args.compare)
+
+    results = {"version": git_version(), "date": datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(), "args": vars(args), "libraries": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            lib = bench_library(size, args.ops, f"{tmp}/lib_{size}", args.reruns, grid=not args.no_grid)
+            results["libraries"].append(lib)
+            grid = lib["grid"]
+            print(f"{size:>7} recettes : écriture {lib['write_all_s']:.2f} s, relecture {lib['load_all_s']:.2f} s, "
+                  f"page {lib['first_page']['median_ms']:.2f} ms, add {lib['add_recipe']['median_ms']:.2f} ms "
+                  f"(1er {lib['add_first_s'] * 1000:.0f} ms), delete {lib['delete_recipe']['median_ms']:.2f} ms")
+            clean = lib["clean_ingredient_name"]
+            print(f"          clean_ingredient_name : {clean['lines']} lignes ({clean['distinct']} distinctes) "
+                  f"{clean['cold_s']:.2f} s à froid, {clean['warm_s']:.2f} s en cache")
+            if grid: print(f"          grille : premier run {grid['cold_run_s']:.2f} s, rerun {grid['rerun_s']:.2f} s, "
+                           f"page suivante {grid['next_page_s']:.2f} s, tri {grid['sort_score_s']:.2f} s, "
+                           f"recherche {grid['search_s']:.2f} s {grid['errors'] or ''}")
+        if args.imports:
+            imports = bench_imports(args.imports, f"{tmp}/imports", args.download_latency, args.ai_latency, args.video_mb)
+            results["imports"] = imports
+            for phase in ("sequential", "parallel", "reused"):
+                p = imports[phase]
+                print(f"import {phase:10} : {p['imports']} vidéos, {p['workers']} en parallèle, médiane "
+                      f"{p['median_ms']:.0f} ms, p95 {p['p95_ms']:.0f} ms, {p['per_minute']:.1f} / min")
+
+    if args.json: Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Charge multi-sessions : N sessions Streamlit simulées (AppTest) en même temps, sur une même base.
+
+    python benchmarks/sessions.py [--sessions 8] [--rounds 3] [--library 2000]
+                                  [--download-latency 0.5] [--ai-latency 2] [--json sessions.json]
+
+Chaque session rejoue en boucle un parcours d'utilisateur : import d'une vidéo (suivi jusqu'au bout,
+puis ajout à la bibliothèque), propositions du Chef IA (une ajoutée), navigation dans la Bibliothèque
+(page suivante, recherche, ouverture d'une fiche) et suppression de la recette ajoutée par le Chef.
+yt-dlp, Gemini et les images sont ceux de benchmarks/fixtures.py.
+
+AppTest remplace le Runtime Streamlit (global au process) à chaque exécution : deux AppTest ne peuvent
+pas tourner en même temps dans un process. Chaque session a donc son process, lancé en même temps que
+les autres ; toutes partagent la base SQLite et le cache IA, comme plusieurs workers d'un déploiement.
+
+Rapport : latence de chaque interaction (médiane, p95, max), exécutions du script par interaction
+(y compris les st.rerun), écritures perdues (recette ajoutée introuvable, recette supprimée encore là)
+et mémoire de chaque session (pic RSS de son process, RSS gagnée entre le premier affichage et la fin des parcours).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fixtures import install_standins, synthetic_recipes  # noqa: E402
+from goumin.storage import RecipeStore  # noqa: E402
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+IMPORT_TIMEOUT = 120  # Secondes max pour qu'un import se termine
+CHEF_MODE = "👨‍🍳 Inventer une recette (Chef IA)"
+IMPORT_MODE = "📥 Importer une vidéo (TikTok/Insta)"
+
+# Exécutions du script pendant chaque at.run() (un st.rerun en ajoute une), comptées par thread
+_runs = threading.local()
+_original_run = LocalScriptRunner.run
+
+
+def _counting_run(self, *args, **kwargs):
+    try: return _original_run(self, *args, **kwargs)
+    finally: _runs.count = getattr(_runs, "count", 0) + sum(e == ScriptRunnerEvent.SCRIPT_STARTED for e in self.events)
+
+
+def query(db_file, sql, *params):
+    # Lecture directe de la base (sans passer par l'application) pour vérifier les écritures
+    with sqlite3.connect(db_file) as conn: return conn.execute(sql, params).fetchall()
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ko sous Linux
+
+
+def rss_mb():
+    """Mémoire résidente actuelle (Linux) ; ailleurs, le pic."""
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError: return peak_mb()
+
+
+class Session:
+    """Une session navigateur : son AppTest, ses mesures et ce qu'elle a écrit dans la base."""
+
+    def __init__(self, sid, db_file, timeout):
+        self.sid, self.db_file = sid, db_file
+        self.at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout)
+        self.timings = defaultdict(list)   # interaction -> [(secondes, exécutions du script)]
+        self.saved = {}                    # id -> nom, recettes ajoutées par cette session
+        self.deleted = set()
+        self.failures = []
+
+    def step(self, name, action):
+        """Une interaction : action() déclenche un ou plusieurs at.run()."""
+        _runs.count = 0
+        t = time.perf_counter()
+        action()
+        self.timings[name].append((time.perf_counter() - t, _runs.count))
+        if self.at.exception: raise RuntimeError(f"{name} : {self.at.exception[0].value}")
+
+    def widget(self, kind, label=None, key=None):
+        found = [w for w in getattr(self.at, kind) if (label is None or w.label == label) and (key is None or w.key == key)]
+        return found[0] if found else None
+
+    def button_with_prefix(self, prefix):
+        return next((b for b in self.at.button if b.key and b.key.startswith(prefix)), None)
+
+    def save_current(self, url):
+        """Ajoute la recette affichée à la bibliothèque, puis vérifie qu'elle y est bien."""
+        nom = self.at.session_state["current_recipe"].nom
+        self.step("save", lambda: self.at.button(key="save_recipe").click().run())
+        found = query(self.db_file, "SELECT id FROM recipes WHERE nom = ? AND json_extract(data, '$.url') = ?", nom, url)
+        ids = [rid for (rid,) in found if rid not in self.saved]
+        if not ids: self.failures.append(f"ajout introuvable : {nom} ({url})")
+        else: self.saved[ids[0]] = nom
+        return ids[0] if ids else None
+
+    # --- PARCOURS ---
+    def start(self):
+        self.step("open_app", self.at.run)
+
+    def import_video(self, n):
+        url = f"https://www.tiktok.com/@goumin/video/{7400000000000000000 + self.sid * 1000 + n}"
+        self.step("import_submit", lambda: (self.widget("text_input", "Lien de la vidéo").input(url),
+                                            self.widget("button", "Analyser la vidéo").click().run()))
+
+        def wait():
+            deadline = time.monotonic() + IMPORT_TIMEOUT
+            while not self.button_with_prefix("open_") and time.monotonic() < deadline:
+                time.sleep(0.2)
+                self.at.run()  # Comme le fragment qui se relance toutes les 2 s dans le navigateur
+        self.step("import_wait", wait)
+        button = self.button_with_prefix("open_")
+        if not button: raise RuntimeError(f"import non terminé : {[e.value for e in self.at.error]}")
+        self.step("import_open", lambda: button.click().run())
+        self.save_current(url)
+
+    def chef(self, n):
+        self.step("mode", lambda: self.at.radio[0].set_value(CHEF_MODE).run())
+        self.step("chef_request", lambda: self.widget("text_input", "J'ai envie de quoi ?").input(f"idée {self.sid}-{n}").run())
+        self.step("chef_invent", lambda: self.widget("button", "Inventer mes recettes").click().run())
+        self.step("chef_view", lambda: self.at.button(key="view_0").click().run())
+        rid = self.save_current("Chef IA")
+        self.step("mode", lambda: self.at.radio[0].set_value(IMPORT_MODE).run())
+        return rid
+
+    def browse(self):
+        nxt = self.widget("button", key="lib_next")
+        if nxt and not nxt.disabled: self.step("library_next", lambda: nxt.click().run())
+        self.step("library_search", lambda: self.at.text_input(key="lib_query").input("courgettes").run())
+        see = self.button_with_prefix("see_")
+        if see:
+            self.step("recipe_open", lambda: see.click().run())
+            self.step("recipe_back", lambda: self.at.button(key="back_btn").click().run())
+        self.step("library_search", lambda: self.at.text_input(key="lib_query").input("").run())
+
+    def delete(self, rid):
+        # On retrouve sa propre recette par la recherche, comme un utilisateur
+        self.step("library_search", lambda: self.at.text_input(key="lib_query").input(self.saved[rid]).run())
+        button = self.widget("button", key=f"del_{rid}")
+        if not button: self.failures.append(f"recette à supprimer absente de la recherche : {self.saved[rid]}")
+        else:
+            self.step("delete", lambda: button.click().run())
+            self.deleted.add(rid)
+        self.step("library_search", lambda: self.at.text_input(key="lib_query").input("").run())
+
+    def play(self, rounds):
+        try:
+            for n in range(rounds):
+                self.import_video(n)
+                rid = self.chef(n)
+                self.browse()
+                if rid: self.delete(rid)
+        except Exception as e:
+            self.failures.append(f"{type(e).__name__}: {e}")
+            traceback.print_exc()
+
+
+def session_process(sid, options, barrier, out):
+    """Corps du process d'une session : premier affichage, départ commun, parcours, puis résultats dans `out`."""
+    LocalScriptRunner.run = _counting_run
+    calls = install_standins(download_s=options["download_latency"], upload_s=options["download_latency"] / 4,
+                             generate_s=options["ai_latency"])
+    session = Session(sid, options["db_file"], options["timeout"])
+    try: session.start()
+    except Exception as e: session.failures.append(f"ouverture : {type(e).__name__}: {e}")
+    try: barrier.wait(timeout=options["timeout"])
+    except threading.BrokenBarrierError: session.failures.append("départ commun manqué")
+    opened = rss_mb()
+    start = time.perf_counter()
+    if not session.failures: session.play(options["rounds"])
+    out.put({"sid": sid, "seconds": time.perf_counter() - start, "timings": dict(session.timings),
+             "saved": session.saved, "deleted": sorted(session.deleted), "failures": session.failures,
+             "calls": dict(calls), "opened_mb": opened, "end_mb": rss_mb(), "peak_mb": peak_mb()})
+
+
+def summarize(results):
+    by_step = defaultdict(list)
+    for r in results:
+        for name, values in r["timings"].items(): by_step[name] += values
+    report = {}
+    for name, values in by_step.items():
+        seconds = sorted(v[0] for v in values)
+        runs = [v[1] for v in values]
+        report[name] = {"count": len(values), "median_ms": round(statistics.median(seconds) * 1000, 1),
+                        "p95_ms": round(seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))] * 1000, 1),
+                        "max_ms": round(seconds[-1] * 1000, 1), "script_runs": round(statistics.mean(runs), 2),
+                        "script_runs_max": max(runs)}
+    return report
+
+
+def check_writes(db_file, results, seeded):
+    """Écritures perdues : recette ajoutée (et pas supprimée) absente, recette supprimée encore présente."""
+    present = {rid for (rid,) in query(db_file, "SELECT id FROM recipes")}
+    deleted = {rid for r in results for rid in r["deleted"]}
+    kept = {rid for r in results for rid in r["saved"]} - deleted
+    lost, resurrected = sorted(kept - present), sorted(deleted & present)
+    expected = seeded + len(kept)
+    return {"saved": sum(len(r["saved"]) for r in results), "deleted": len(deleted), "lost": lost,
+            "resurrected": resurrected, "expected_count": expected, "count": len(present),
+            "ok": not lost and not resurrected and expected == len(present)}
+
+
+def memory(results):
+    peaks = [r["peak_mb"] for r in results]
+    growth = [r["end_mb"] - r["opened_mb"] for r in results]
+    return {"peak_rss_mb": {"median": round(statistics.median(peaks), 1), "max": round(max(peaks), 1)},
+            "growth_mb": {"median": round(statistics.median(growth), 1), "max": round(max(growth), 1)}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simule plusieurs sessions Streamlit simultanées sur Goumin.")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="Parcours complets par session")
+    parser.add_argument("--library", type=int, default=2000, help="Recettes déjà en bibliothèque au départ")
+    parser.add_argument("--download-latency", type=float, default=0.5)
+    parser.add_argument("--ai-latency", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=120, help="Secondes max par exécution du script")
+    parser.add_argument("--json", help="Écrit aussi les résultats dans ce fichier")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Quotas à 0 : on mesure la contention entre sessions, pas les limites de débit
+        os.environ.update(GOUMIN_DB=f"{tmp}/goumin.db", GOUMIN_AI_CACHE=f"{tmp}/ai_cache.db", GOUMIN_MEDIA=f"{tmp}/media",
+                          GOUMIN_TEMP=f"{tmp}/temp", GOUMIN_TRACE="", GOUMIN_METRICS="", GOUMIN_YDL_PER_MIN="0",
+                          GOUMIN_GEMINI_PER_MIN="0", GOUMIN_PRODUCTS=f"{tmp}/products.idx")
+        os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+        os.chdir(ROOT)  # style.css, logo.png...
+        db_file = os.environ["GOUMIN_DB"]
+        RecipeStore(db_file).replace_all(synthetic_recipes(args.library))
+
+        options = {"db_file": db_file, "rounds": args.rounds, "timeout": args.timeout,
+                   "download_latency": args.download_latency, "ai_latency": args.ai_latency}
+        ctx = multiprocessing.get_context("spawn")
+        barrier, out = ctx.Barrier(args.sessions), ctx.Queue()
+        procs = [ctx.Process(target=session_process, args=(i, options, barrier, out), name=f"session-{i}")
+                 for i in range(args.sessions)]
+        for p in procs: p.start()
+        results = []
+        for _ in procs:
+            try: results.append(out.get(timeout=args.timeout * (10 + 20 * args.rounds)))
+            except queue.Empty: break
+        for p in procs: p.join(timeout=10)
+        results.sort(key=lambda r: r["sid"])
+        calls = Counter()
+        for r in results: calls.update(r["calls"])
+
+        report = {"args": vars(args), "wall_s": round(max((r["seconds"] for r in results), default=0), 2),
+                  "sessions_reported": len(results), "interactions": summarize(results),
+                  "writes": check_writes(db_file, results, args.library), "calls": dict(calls),
+                  "memory": memory(results) if results else None,
+                  "failures": {r["sid"]: r["failures"] for r in results if r["failures"]}}
+
+    print(f"{len(results)}/{args.sessions} sessions × {args.rounds} parcours en {report['wall_s']:.1f} s")
+    print(f"{'interaction':16} {'n':>4} {'médiane':>9} {'p95':>9} {'max':>9} {'runs':>5}")
+    for name, r in report["interactions"].items():
+        print(f"{name:16} {r['count']:>4} {r['median_ms']:>7.0f}ms {r['p95_ms']:>7.0f}ms {r['max_ms']:>7.0f}ms {r['script_runs']:>5}")
+    w, m = report["writes"], report["memory"]
+    print(f"écritures : {w['saved']} ajouts, {w['deleted']} suppressions, {len(w['lost'])} perdues, "
+          f"{len(w['resurrected'])} supprimées encore présentes, {w['count']}/{w['expected_count']} recettes "
+          f"{'✅' if w['ok'] else '❌'}")
+    if m: print(f"mémoire par session : pic {m['peak_rss_mb']['median']:.0f} Mo (max {m['peak_rss_mb']['max']:.0f}), "
+                f"+{m['growth_mb']['median']:.1f} Mo depuis l'ouverture (max +{m['growth_mb']['max']:.1f})")
+    for sid, failures in report["failures"].items(): print(f"session {sid} : {failures[:3]}")
+
+    if args.json: Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
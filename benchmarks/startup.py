@@ -0,0 +1,76 @@
+"""Coût du démarrage : import des modules lourds et durée d'un run / rerun de l'application.
+
+    python benchmarks/startup.py [--runs 5] [--json startup.json]
+
+Chaque mesure tourne dans un interpréteur neuf (comme un conteneur qui redémarre, .pyc déjà compilés).
+L'application est exécutée avec streamlit.testing (AppTest) sur une base et des caches temporaires :
+premier run (démarrage à froid du script) puis reruns (ressources déjà en cache).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ["streamlit", "google.generativeai", "yt_dlp", "PIL.Image", "goumin.engine", "goumin.cli"]
+LAZY = ["google.generativeai", "yt_dlp"]  # Ne doivent pas être chargés par un simple affichage
+
+IMPORT_PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+APP_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+t = time.perf_counter(); at.run(); cold = time.perf_counter() - t
+reruns = []
+for _ in range({reruns}):
+    t = time.perf_counter(); at.run(); reruns.append(time.perf_counter() - t)
+print(json.dumps({{"cold": cold, "reruns": reruns, "errors": [str(e.value) for e in at.exception],
+                  "loaded": {{m: m in sys.modules for m in {lazy!r}}}}}))
+"""
+
+
+def run_python(code, env):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure le temps d'import et de rerun de Goumin.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Écrit aussi les résultats dans ce fichier")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=str(ROOT), GOUMIN_DB=f"{tmp}/goumin.db", GOUMIN_AI_CACHE=f"{tmp}/ai_cache.db",
+                   GOUMIN_MEDIA=f"{tmp}/media", GOUMIN_TEMP=f"{tmp}/temp")
+        env.setdefault("GOOGLE_API_KEY", "benchmark")
+
+        results = {"imports_s": {}}
+        for module in MODULES:
+            times = [float(run_python(IMPORT_PROBE.format(module=module), env)) for _ in range(args.runs)]
+            results["imports_s"][module] = round(statistics.median(times), 4)
+            print(f"import {module:22} {statistics.median(times) * 1000:8.1f} ms")
+
+        app = json.loads(run_python(APP_PROBE.format(app=str(ROOT / "app.py"), reruns=args.runs, lazy=LAZY), env))
+        results["app"] = {"cold_run_s": round(app["cold"], 4), "rerun_median_s": round(statistics.median(app["reruns"]), 4),
+                          "errors": app["errors"], "loaded_after_render": app["loaded"]}
+        print(f"app: premier run {app['cold'] * 1000:.0f} ms, rerun médian {statistics.median(app['reruns']) * 1000:.0f} ms")
+        for module, loaded in app["loaded"].items():
+            print(f"  {module} chargé après affichage : {'oui' if loaded else 'non'}")
+
+    if args.json: Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
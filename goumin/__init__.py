@@ -0,0 +1 @@
+"""Moteur Goumin : briques réutilisables hors de l'interface Streamlit."""
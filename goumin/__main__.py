@@ -0,0 +1,5 @@
+import sys
+
+from goumin.cli import main
+
+sys.exit(main())
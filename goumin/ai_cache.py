@@ -0,0 +1,74 @@
+"""Cache disque des réponses Gemini : clé = modèle + prompt normalisé, TTL et éviction LRU."""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+
+def normalize_prompt(prompt):
+    # Mêmes mots = même question : on ignore la casse et les espaces de mise en page
+    return re.sub(r"\s+", " ", prompt).strip().casefold()
+
+
+def cache_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\0{normalize_prompt(prompt)}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """Réponses texte de Gemini, partagées entre sessions et conservées entre redémarrages."""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key         TEXT PRIMARY KEY,
+                model       TEXT NOT NULL,
+                created     REAL NOT NULL,
+                last_access REAL NOT NULL,
+                text        TEXT NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+
+    def get(self, model_name, prompt):
+        key, now = cache_key(model_name, prompt), time.time()
+        with self._lock:
+            row = self._db.execute("SELECT created, text FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[0] <= self.ttl:
+                self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[1]
+            if row: self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, model_name, prompt, text):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses(key, model, created, last_access, text) VALUES (?, ?, ?, ?, ?)",
+                             (cache_key(model_name, prompt), model_name, now, now, text))
+            self._evict(now)
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        extra = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if extra > 0:
+            self._db.execute("DELETE FROM responses WHERE key IN "
+                             "(SELECT key FROM responses ORDER BY last_access LIMIT ?)", (extra,))
+
+    def clear(self):
+        with self._lock: self._db.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": size,
+                "hit_rate": self.hits / total if total else 0.0}
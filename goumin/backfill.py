@@ -0,0 +1,59 @@
+"""Rapatrie en local les images distantes de la bibliothèque.
+
+Usage : python -m goumin.backfill [--db goumin.db] [--media media] [--workers 8]
+"""
+import argparse
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from goumin.fetcher import Fetcher, get_fetcher
+from goumin.images import ingest_image
+from goumin.storage import RecipeStore
+
+
+def is_remote(path):
+    return isinstance(path, str) and path.startswith(("http://", "https://"))
+
+
+def backfill_remote_images(store, media_folder, fetcher=None, progress=None):
+    """Télécharge en parallèle chaque image_path distante et réécrit la recette vers les fichiers locaux.
+
+    `progress(done, total)` est appelé après chaque image. Renvoie {"total", "ok", "failed", "skipped"}.
+    """
+    fetcher = fetcher or get_fetcher()
+    Path(media_folder).mkdir(exist_ok=True)
+    todo = [r for r in store.all() if is_remote(r.image_path) and not r.images.get("hash")]
+    stats = {"total": len(todo), "ok": 0, "failed": 0, "skipped": 0}
+
+    futures = {fetcher.submit(r.image_path): r for r in todo}
+    for done, fut in enumerate(as_completed(futures), start=1):
+        r = futures[fut]
+        try:
+            variants = ingest_image(fut.result(), media_folder)
+            updated = variants and store.update(r.id, expect={"image_path": r.image_path},
+                                                image_path=variants["medium"], images=variants)
+        except Exception: variants = None  # Une recette en échec n'arrête pas le rapatriement des autres
+        if not variants:
+            stats["failed"] += 1
+        elif updated:
+            stats["ok"] += 1
+        else:
+            stats["skipped"] += 1  # Recette supprimée ou image changée pendant le téléchargement
+        if progress: progress(done, stats["total"])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Télécharge les images distantes de la bibliothèque.")
+    parser.add_argument("--db", default="goumin.db")
+    parser.add_argument("--media", default="media")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    stats = backfill_remote_images(RecipeStore(args.db), args.media, Fetcher(max_workers=args.workers),
+                                   progress=lambda d, t: print(f"\r{d}/{t}", end="", flush=True))
+    print(f"\n{stats['ok']} images rapatriées, {stats['failed']} en échec, {stats['skipped']} ignorées.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Import en masse d'une liste de liens vidéo, avec reprise après interruption.
+
+En ligne de commande : python -m goumin import liens.txt (voir goumin.cli).
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from goumin.imports import canonical_url
+
+
+def read_urls(text):
+    """Liens d'un texte collé ou d'un fichier : un par ligne (ou séparés par des espaces), sans doublons."""
+    urls, seen = [], set()
+    for line in text.splitlines():
+        if line.lstrip().startswith("#"): continue
+        for token in line.split():
+            if not token.startswith(("http://", "https://")): continue
+            key = canonical_url(token)
+            if key not in seen:
+                seen.add(key)
+                urls.append(token)
+    return urls
+
+
+def checkpoint_path(folder, urls):
+    """Fichier de progression propre à une liste : relancer la même liste reprend là où elle s'est arrêtée."""
+    # "v2" : les journaux d'avant confondaient les liens watch?v= (même clé pour des vidéos différentes)
+    digest = hashlib.sha256("\n".join(["v2", *sorted(canonical_url(u) for u in urls)]).encode()).hexdigest()[:16]
+    return os.path.join(folder, f"bulk_{digest}.jsonl")
+
+
+class Checkpoint:
+    """Journal JSONL des liens traités, une ligne par lien terminé (écrite dès la fin de l'import)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try: entry = json.loads(line)
+                    except ValueError: continue  # Dernière ligne coupée par un arrêt brutal
+                    # Clé recalculée depuis le lien d'origine : suit les évolutions de canonical_url
+                    self.entries[canonical_url(entry.get("lien") or entry["url"])] = entry
+
+    def is_done(self, url):
+        return self.entries.get(canonical_url(url), {}).get("status") == "done"
+
+    def record(self, url, status, **info):
+        entry = {"url": canonical_url(url), "lien": url, "status": status, **info}
+        with self._lock:
+            self.entries[entry["url"]] = entry
+            if not self.path: return entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return entry
+
+
+def run_bulk(urls, import_one, workers=3, checkpoint=None, progress=None):
+    """Importe chaque lien, au plus `workers` à la fois. Les liens déjà importés (checkpoint) sont sautés.
+
+    `import_one(url)` renvoie la recette enregistrée ou lève une exception.
+    `progress(fini, total, entrée)` est appelé après chaque lien.
+    Renvoie {"total", "done", "failed", "skipped", "duplicates"} (duplicates : doublons probables signalés).
+    """
+    checkpoint = checkpoint or Checkpoint(None)
+    todo = [u for u in urls if not checkpoint.is_done(u)]
+    stats = {"total": len(urls), "done": 0, "failed": 0, "skipped": len(urls) - len(todo), "duplicates": 0}
+    if not todo: return stats
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="goumin-bulk") as pool:
+        futures = {pool.submit(import_one, url): url for url in todo}
+        for n, fut in enumerate(as_completed(futures), start=1):
+            url = futures[fut]
+            try:
+                recipe = fut.result()
+                twin = recipe.extra.get("doublon_de")
+                entry = checkpoint.record(url, "done", id=recipe.id, nom=recipe.nom, doublon_de=twin)
+                stats["done"] += 1
+                if twin: stats["duplicates"] += 1
+            except Exception as e:
+                entry = checkpoint.record(url, "failed", error=str(e) or type(e).__name__)
+                stats["failed"] += 1
+            if progress: progress(stats["skipped"] + n, stats["total"], entry)
+    return stats
@@ -0,0 +1,136 @@
+"""Ligne de commande Goumin, hors du serveur web.
+
+    python -m goumin import liens.txt [--workers 3] [--ydl-per-min 20] [--ai-per-min 10]
+    python -m goumin chef "pâtes" [--frigo "2 courgettes"] [--option Rapide] [--pers 2] [--json]
+    python -m goumin export [--format json|md] [-o bibliotheque.json]
+    python -m goumin produits en.openfoodfacts.org.products.csv.gz [-o products.idx]
+    python -m goumin recalcul     # nutrition en nombres et signatures de toutes les recettes
+
+Options communes : --db, --media, --temp, --model (sinon variables GOUMIN_*, voir goumin.config).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from goumin import gemini
+from goumin.bulk import Checkpoint, checkpoint_path, read_urls, run_bulk
+from goumin.config import Config
+from goumin.engine import Engine
+from goumin.models import is_error
+from goumin.products import compile_products, read_products
+
+CHEF_OPTIONS = ["Healthy", "Economique", "Rapide", "Peu d'ing."]
+
+
+def recipe_markdown(r):
+    lines = [f"# {r.nom}", "", f"⏱️ {r.temps} · ❤️ {r.score}/100 · 👥 {r.portion_text}"]
+    if r.url: lines.append(f"Source : {r.url}")
+    lines += ["", "## Ingrédients", *[f"- {ing}" for ing in r.ingredients]]
+    lines += ["", "## Étapes", *[f"{i}. {step}" for i, step in enumerate(r.etapes, start=1)]]
+    n = r.nutrition
+    lines += ["", f"🔥 {n.cal} · 🥩 {n.prot} · 🍞 {n.carb} · 🥑 {n.fat}", ""]
+    return "\n".join(lines)
+
+
+def cmd_import(engine, args):
+    if args.sources == ["-"]: text = sys.stdin.read()
+    else: text = "\n".join(Path(s).read_text(encoding="utf-8") if Path(s).is_file() else s for s in args.sources)
+    urls = read_urls(text)
+    ckpt = args.checkpoint or checkpoint_path(engine.config.temp_folder, urls)
+
+    def show(n, total, entry):
+        detail = entry.get("nom") if entry["status"] == "done" else entry.get("error")
+        print(f"[{n}/{total}] {entry['status']:6} {entry['url']} {detail or ''}", flush=True)
+
+    stats = run_bulk(urls, engine.pipeline.import_and_save, workers=engine.config.bulk_workers,
+                     checkpoint=Checkpoint(ckpt), progress=show)
+    print(f"{stats['done']} importées, {stats['failed']} en échec, {stats['skipped']} déjà faites, {stats['duplicates']} doublons probables. Progression : {ckpt}")
+    return 1 if stats["failed"] else 0
+
+
+def cmd_chef(engine, args):
+    res = engine.generate_chef_proposals(args.envie, args.frigo, args.option or [], args.pers, use_cache=not args.no_cache)
+    if is_error(res):
+        print(f"Erreur IA : {res['error']}", file=sys.stderr)
+        return 1
+    if args.json: print(json.dumps([r.to_dict() for r in res], ensure_ascii=False, indent=2))
+    else: print("\n".join(f"[{r.type or 'Recette'}]\n{recipe_markdown(r)}" for r in res))
+    return 0
+
+
+def cmd_export(engine, args):
+    recipes = engine.store.all()
+    if args.format == "md": text = "\n".join(recipe_markdown(r) for r in recipes)
+    else: text = json.dumps([r.to_dict() for r in recipes], ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        print(f"{len(recipes)} recettes exportées dans {args.output}", file=sys.stderr)
+    else: print(text)
+    return 0
+
+
+def cmd_products(engine, args):
+    dest = args.output or engine.config.products_file
+    count = compile_products(read_products(args.dump), dest)
+    print(f"{count} produits compilés dans {dest}", file=sys.stderr)
+    return 0
+
+
+def cmd_recompute(engine, args):
+    done = engine.store.refresh_derived(force=True)
+    print(f"Recalculé pour {engine.store.count()} recettes : {', '.join(done)}", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="goumin", description="Moteur Goumin en ligne de commande.")
+    parser.add_argument("--db")
+    parser.add_argument("--media")
+    parser.add_argument("--temp")
+    parser.add_argument("--model")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Importe des vidéos dans la bibliothèque (reprend une liste interrompue)")
+    p.add_argument("sources", nargs="+", help="Fichiers de liens (un par ligne), liens, ou '-' pour l'entrée standard")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--ydl-per-min", type=int, help="Appels yt-dlp par minute (0 = illimité)")
+    p.add_argument("--ai-per-min", type=int, help="Générations Gemini par minute (0 = illimité)")
+    p.add_argument("--proxy", choices=["video", "keyframes"])
+    p.add_argument("--cookies", help="cookies.txt pour Instagram")
+    p.add_argument("--checkpoint", help="Journal de progression (défaut : temp/bulk_<hash de la liste>.jsonl)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("chef", help="Propose 3 recettes")
+    p.add_argument("envie")
+    p.add_argument("--frigo", default="")
+    p.add_argument("--option", action="append", choices=CHEF_OPTIONS)
+    p.add_argument("--pers", type=int, default=2)
+    p.add_argument("--no-cache", action="store_true", help="Nouvelles propositions, sans le cache des réponses")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_chef)
+
+    p = sub.add_parser("export", help="Exporte la bibliothèque")
+    p.add_argument("--format", choices=["json", "md"], default="json")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("produits", help="Compile un export Open Food Facts en base produits du Comparateur")
+    p.add_argument("dump", help="CSV à tabulations ou JSONL (.gz accepté)")
+    p.add_argument("-o", "--output", help="Index produit (défaut : GOUMIN_PRODUCTS ou products.idx)")
+    p.set_defaults(func=cmd_products)
+
+    p = sub.add_parser("recalcul", help="Recalcule les données dérivées (nutrition en nombres, signatures)")
+    p.set_defaults(func=cmd_recompute)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = Config.from_env(
+        db_file=args.db, media_folder=args.media, temp_folder=args.temp, gemini_model=args.model,
+        bulk_workers=getattr(args, "workers", None), ydl_per_minute=getattr(args, "ydl_per_min", None),
+        gemini_per_minute=getattr(args, "ai_per_min", None), video_proxy_mode=getattr(args, "proxy", None),
+        cookies_path=getattr(args, "cookies", None))
+    if args.command not in ("export", "produits", "recalcul"): gemini.configure()
+    return args.func(Engine(config), args)
@@ -0,0 +1,85 @@
+"""Vue en colonnes de la bibliothèque (tableaux NumPy) : tris, classements et totaux sans boucle Python.
+
+    cols = LibraryColumns.load(store)
+    cols.rank("prot_pct", limit=5)     # 5 recettes les plus riches en protéines
+    cols.totals(ids)                   # {"kcal": ..., "prot_g": ...} d'une sélection
+
+Lue directement dans les colonnes numériques de la base (RecipeStore.columns), sans relire le JSON.
+Valeur inconnue = NaN : ignorée par les totaux et moyennes, classée en dernier, exclue par les filtres.
+"""
+import numpy as np
+
+from goumin.storage import NUMERIC_COLUMNS
+
+MACROS = ("kcal", "prot_g", "carb_g", "fat_g")
+
+
+class LibraryColumns:
+    def __init__(self, ids, values):
+        self.ids = np.array(ids, dtype=object)
+        self._pos = {rid: i for i, rid in enumerate(ids)}
+        # None -> NaN à la conversion en float
+        self.data = {f: np.array(v, dtype=float) for f, v in values.items()}
+        kcal, prot = self.data.get("kcal"), self.data.get("prot_g")
+        if kcal is not None and prot is not None:
+            # Part des calories venant des protéines (4 kcal / g), en %
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.data["prot_pct"] = np.where(kcal > 0, 400 * prot / kcal, np.nan)
+
+    @classmethod
+    def load(cls, store, fields=NUMERIC_COLUMNS):
+        return cls(*store.columns(fields))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, ids):
+        """Indices des ids dans les colonnes (ids inconnus ignorés)."""
+        pos = self._pos
+        return np.fromiter((pos[rid] for rid in ids if rid in pos), dtype=np.intp)
+
+    def mask(self, **bounds):
+        """Recettes dont chaque champ est dans ses bornes : mask(kcal=(None, 600), prot_g=(25, None))."""
+        keep = np.ones(len(self), dtype=bool)
+        for f, (lo, hi) in bounds.items():
+            values = self.data[f]
+            if lo is not None: keep &= values >= lo
+            if hi is not None: keep &= values <= hi
+        return keep
+
+    def rank(self, field, descending=True, ids=None, mask=None, limit=None, known_only=False):
+        """Ids classés selon `field` (valeurs inconnues à la fin, ou écartées si known_only)."""
+        idx = self.positions(ids) if ids is not None else np.arange(len(self))
+        if mask is not None: idx = idx[mask[idx]]
+        if known_only: idx = idx[~np.isnan(self.data[field][idx])]
+        values = self.data[field][idx]
+        # NaN -> +inf pour finir dernier dans les deux sens
+        key = np.where(np.isnan(values), np.inf, -values if descending else values)
+        if limit is not None and limit < len(idx):
+            top = np.argpartition(key, limit - 1)[:limit]   # Les `limit` meilleurs, sans tout trier
+            order = top[np.argsort(key[top], kind="stable")]
+        else:
+            order = np.argsort(key, kind="stable")
+        return self.ids[idx[order]].tolist()
+
+    def _select(self, ids):
+        return slice(None) if ids is None else self.positions(ids)
+
+    def totals(self, ids=None, fields=MACROS):
+        """Somme de chaque champ sur la sélection (toute la bibliothèque par défaut)."""
+        sel = self._select(ids)
+        return {f: float(np.nansum(self.data[f][sel])) for f in fields}
+
+    def means(self, ids=None, fields=MACROS):
+        """Moyenne de chaque champ sur les recettes où il est connu (None si aucune)."""
+        sel = self._select(ids)
+        result = {}
+        for f in fields:
+            values = self.data[f][sel]
+            known = ~np.isnan(values)
+            result[f] = float(values[known].mean()) if known.any() else None
+        return result
+
+    def known(self, field, ids=None):
+        """Nombre de recettes dont `field` est renseigné."""
+        return int(np.count_nonzero(~np.isnan(self.data[field][self._select(ids)])))
@@ -0,0 +1,56 @@
+"""Configuration explicite du moteur (chemins, modèle, quotas), lue depuis l'environnement si besoin."""
+import os
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Config:
+    db_file: str = "goumin.db"
+    legacy_json: str = "database.json"  # Ancien stockage, importé une fois dans db_file
+    media_folder: str = "media"
+    temp_folder: str = "temp"
+    gemini_model: str = "gemini-2.5-flash"
+    video_proxy_mode: str = "video"     # "video" ou "keyframes"
+    cookies_path: str = None            # cookies.txt par défaut pour yt-dlp (Instagram)
+    image_cache_mb: int = 200
+    ai_cache_file: str = "ai_cache.db"
+    ai_cache_ttl_h: int = 24 * 7
+    ai_cache_max: int = 5000
+    import_workers: int = 3             # Imports vidéo en parallèle (toutes sessions)
+    bulk_workers: int = 3               # Vidéos en parallèle dans un import en masse
+    ydl_per_minute: int = 20            # Appels yt-dlp par minute (0 = illimité)
+    gemini_per_minute: int = 10         # Analyses vidéo Gemini par minute, imports seulement (0 = illimité)
+    page_size: int = 12                 # Recettes par page dans la Bibliothèque
+    products_file: str = "products.idx"  # Base produits du Comparateur (python -m goumin produits <dump>)
+    trace_file: str = "trace.jsonl"     # Journal des étapes d'import et des appels IA (goumin.telemetry)
+    trace_max_mb: int = 10              # Taille d'un fichier de journal avant rotation (3 anciens gardés)
+    metrics_file: str = "metrics.prom"  # Mesures au format texte Prometheus
+    admin_emails: str = ""              # Comptes qui voient l'onglet Admin, séparés par des virgules ("*" : tous)
+
+    @property
+    def generated_folder(self):
+        # Cache des images pollinations.ai
+        return os.path.join(self.media_folder, "generated")
+
+    @classmethod
+    def from_env(cls, environ=os.environ, **overrides):
+        """Valeurs par défaut, remplacées par les variables GOUMIN_* puis par `overrides`."""
+        env = {
+            "db_file": "GOUMIN_DB", "media_folder": "GOUMIN_MEDIA", "temp_folder": "GOUMIN_TEMP",
+            "gemini_model": "GOUMIN_GEMINI_MODEL", "video_proxy_mode": "GOUMIN_VIDEO_PROXY",
+            "cookies_path": "GOUMIN_COOKIES", "image_cache_mb": "GOUMIN_IMAGE_CACHE_MB",
+            "ai_cache_file": "GOUMIN_AI_CACHE", "ai_cache_ttl_h": "GOUMIN_AI_CACHE_TTL_H",
+            "ai_cache_max": "GOUMIN_AI_CACHE_MAX", "import_workers": "GOUMIN_IMPORT_WORKERS",
+            "bulk_workers": "GOUMIN_BULK_WORKERS", "ydl_per_minute": "GOUMIN_YDL_PER_MIN",
+            "gemini_per_minute": "GOUMIN_GEMINI_PER_MIN", "page_size": "GOUMIN_PAGE_SIZE",
+            "products_file": "GOUMIN_PRODUCTS", "trace_file": "GOUMIN_TRACE", "trace_max_mb": "GOUMIN_TRACE_MB",
+            "metrics_file": "GOUMIN_METRICS", "admin_emails": "GOUMIN_ADMINS",
+        }
+        config = cls()
+        for name, var in env.items():
+            if var in environ:
+                value = environ[var]
+                setattr(config, name, int(value) if isinstance(getattr(config, name), int) else value)
+        for name, value in overrides.items():
+            if value is not None: setattr(config, name, value)
+        return config
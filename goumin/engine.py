@@ -0,0 +1,317 @@
+"""Moteur Goumin sans interface : appels Gemini, bibliothèque, images et imports vidéo.
+
+    engine = Engine(Config.from_env())
+    engine.generate_chef_proposals("pâtes", "", ["Rapide"], 2)
+
+Rien ici ne dépend de Streamlit : l'application, la ligne de commande (python -m goumin)
+et les scripts de traitement par lots partagent ce même code.
+"""
+import dataclasses
+import json
+import os
+import threading
+from pathlib import Path
+
+from goumin import gemini
+from goumin.ai_cache import ResponseCache
+from goumin.backfill import backfill_remote_images
+from goumin.config import Config
+from goumin.fridge import FridgeIndex, fridge_items
+from goumin.gemini import json_config, parse_ai_response, parse_object
+from goumin.image_cache import GeneratedImageCache
+from goumin.images import ingest_image, remove_variants
+from goumin.jsonstream import StreamingJSONParser
+from goumin.models import (AIResponseError, RECIPE_LIST_SCHEMA, RECIPE_SCHEMA, WORKOUT_SCHEMA,
+                           is_error, parse_recipe, parse_recipes, parse_workout)
+from goumin.pipeline import ImportPipeline
+from goumin.products import LABELS, ProductIndex, product_verdict
+from goumin.ratelimit import RateLimiter
+from goumin.search import SearchIndex
+from goumin.shopping import ShoppingList
+from goumin.similar import DUPLICATE_SIMILARITY, SIMILAR_MIN, SimilarIndex, signature
+from goumin.storage import RecipeStore
+from goumin.telemetry import Telemetry
+
+class Engine:
+    """Toutes les ressources partagées d'un process (base, caches, quotas). Une instance suffit, sûre entre threads."""
+
+    def __init__(self, config=None, store=None):
+        self.config = c = config or Config()
+        for folder in (c.media_folder, c.temp_folder): Path(folder).mkdir(exist_ok=True)
+        self.store = store or RecipeStore(c.db_file, legacy_json=c.legacy_json)
+        self.ai_cache = ResponseCache(c.ai_cache_file, ttl=c.ai_cache_ttl_h * 3600, max_entries=c.ai_cache_max)
+        self.image_cache = GeneratedImageCache(c.generated_folder, max_bytes=c.image_cache_mb * 1024 * 1024)
+        self.ydl_limiter = RateLimiter(c.ydl_per_minute)
+        self.ai_limiter = RateLimiter(c.gemini_per_minute)
+        self.telemetry = Telemetry(c.trace_file, max_bytes=c.trace_max_mb * 1024 * 1024, metrics_path=c.metrics_file)
+        self.pipeline = ImportPipeline(self.store, media_folder=c.media_folder, temp_folder=c.temp_folder,
+                                       model_name=c.gemini_model, proxy_mode=c.video_proxy_mode,
+                                       cookies_path=c.cookies_path, ydl_limiter=self.ydl_limiter,
+                                       ai_limiter=self.ai_limiter, find_duplicates=self.find_duplicates,
+                                       telemetry=self.telemetry)
+        self.index = SearchIndex()  # Construit à la première recherche
+        self.fridge = FridgeIndex()
+        self.similar = SimilarIndex()
+        self._columns = (None, None)
+        self._products = (None, None)  # (mtime du fichier, ProductIndex ou None)
+        self._products_lock = threading.Lock()
+
+    # --- BIBLIOTHEQUE ---
+    def save_image(self, url_image):
+        """Télécharge une image et la range en variantes (miniature / moyenne). Renvoie les variantes ou None."""
+        return self.pipeline.save_image(url_image)
+
+    def save_uploaded_image(self, data):
+        try: return ingest_image(data, self.config.media_folder)
+        except Exception: return None
+
+    def add_recipe(self, recipe, url, thumb_url):
+        return self.pipeline.add_recipe(recipe, url, thumb_url)
+
+    def update_recipe_image(self, rid, new_path, variants=None):
+        old = self.store.get(rid)
+        self.store.update(rid, image_path=new_path, images=variants or {})
+        if old: self.release_images(old)
+
+    def release_images(self, recipe):
+        """Supprime les fichiers d'image d'une recette s'ils ne servent plus à aucune autre."""
+        digest = recipe.images.get('hash')
+        if digest and not self.store.image_refs(digest):
+            remove_variants(digest, self.config.media_folder)
+
+    def delete_recipe(self, rid):
+        r = self.store.get(rid)
+        self.store.delete(rid)
+        if r: self.release_images(r)
+        # Anciennes recettes : image enregistrée sous media/<id>.jpg
+        img = os.path.join(self.config.media_folder, rid + ".jpg")
+        if os.path.exists(img):
+            try: os.remove(img)
+            except OSError: pass
+
+    def backfill_images(self, progress=None):
+        return backfill_remote_images(self.store, self.config.media_folder, progress=progress)
+
+    def dish_images(self, names):
+        """Image générée de chaque plat : fichier local du cache, sinon une image d'attente locale.
+
+        Les manquantes sont générées en arrière-plan (un seul téléchargement : le navigateur ne les demande pas).
+        """
+        cached = self.image_cache.get_many(names)
+        return {n: cached.get(n) or self.image_cache.placeholder() for n in names}
+
+    def search(self, query="", **filters):
+        """Ids des recettes correspondant à la requête et aux filtres (voir SearchIndex.search)."""
+        self.index.sync(self.store)
+        return self.index.search(query, **filters)
+
+    def fridge_matches(self, frigo, query="", limit=3):
+        """[(Recipe, FridgeMatch)] : recettes de la bibliothèque faisables avec le frigo (et l'envie `query`)."""
+        items = fridge_items(frigo)
+        if not items: return []
+        ids = set(self.search(query)) if query.strip() else None
+        self.fridge.sync(self.store)
+        matches = self.fridge.match(items, limit, ids)
+        recipes = {r.id: r for r in self.store.get_many([m.id for m in matches])}
+        return [(recipes[m.id], m) for m in matches if m.id in recipes]
+
+    def _similar_to(self, sig, limit, exclude, min_similarity=SIMILAR_MIN):
+        pairs = self.similar.similar(sig, limit, exclude=exclude, min_similarity=min_similarity)
+        recipes = {r.id: r for r in self.store.get_many([rid for rid, _ in pairs])}
+        return [(recipes[rid], sim) for rid, sim in pairs if rid in recipes]
+
+    def find_duplicates(self, recipe, limit=3):
+        """[(Recipe, ressemblance)] déjà en bibliothèque qui sont probablement le même plat que `recipe`."""
+        self.similar.sync(self.store)
+        return self._similar_to(signature(recipe), limit, recipe.id, DUPLICATE_SIMILARITY)
+
+    def similar_recipes(self, rid, limit=6):
+        """[(Recipe, ressemblance)] les plus proches de la recette `rid` (d'après les signatures enregistrées)."""
+        self.similar.sync(self.store)
+        return self._similar_to(self.similar.sigs.get(rid), limit, rid)
+
+    def library_columns(self):
+        """Vue NumPy de la bibliothèque (goumin.columns), relue seulement si la base a changé."""
+        from goumin.columns import LibraryColumns  # NumPy chargé à la première utilisation
+        seq, cols = self._columns
+        last = self.store.last_change()
+        if cols is None or seq != last:
+            cols = LibraryColumns.load(self.store)
+            self._columns = (last, cols)
+        return cols
+
+    def shopping_list(self, owner):
+        """Liste de courses enregistrée de cet utilisateur."""
+        return ShoppingList(self.store, owner)
+
+    # --- IMPORT VIDEO ---
+    def import_video(self, url, log=None, stage=None, cookies_path=None, on_partial=None):
+        return self.pipeline.import_video(url, log=log, stage=stage, cookies_path=cookies_path, on_partial=on_partial)
+
+    # --- GEMINI ---
+    def ask_gemini_json(self, prompt, use_cache=True, model_name=None, parse=parse_object, schema=None):
+        """Appel Gemini texte -> objet validé par `parse`, servi depuis le cache disque si la même question a déjà été posée.
+
+        use_cache=False force un nouvel appel (la nouvelle réponse remplace l'ancienne dans le cache).
+        """
+        model_name = model_name or self.config.gemini_model
+        text = self.ai_cache.get(model_name, prompt) if use_cache else None
+        self.telemetry.count("ai_cache", result="hit" if text is not None else "miss")
+        if text is not None: return parse_ai_response(text, parse)
+        model = gemini.model(model_name)
+        with self.telemetry.trace(), self.telemetry.span("gemini", model=model_name) as span:
+            response = model.generate_content(prompt, safety_settings=gemini.safety_settings(), generation_config=json_config(schema))
+            self.telemetry.usage(span, getattr(response, "usage_metadata", None))
+            result = parse_ai_response(response.text, parse)
+            if is_error(result): span.fail(result["error"])
+        if not is_error(result): self.ai_cache.put(model_name, prompt, response.text)
+        return result
+
+    def stream_gemini_json(self, prompt, use_cache=True, model_name=None, parse=parse_object, parse_partial=None):
+        """Comme ask_gemini_json, en streaming : produit `parse_partial(JSON partiel)` au fil de la réponse.
+
+        La dernière valeur produite est le résultat final validé (ou {"error": ...}).
+        """
+        model_name = model_name or self.config.gemini_model
+        text = self.ai_cache.get(model_name, prompt) if use_cache else None
+        self.telemetry.count("ai_cache", result="hit" if text is not None else "miss")
+        if text is not None:
+            yield parse_ai_response(text, parse)
+            return
+        try:
+            model = gemini.model(model_name)
+            parser = StreamingJSONParser()
+            # Mode JSON sans schéma, pour garder l'ordre des champs du prompt (voir ImportPipeline.process_ai_full)
+            # Pas de trace() ici : une variable de contexte posée dans un générateur déborderait chez l'appelant
+            with self.telemetry.span("gemini_stream", model=model_name) as span:
+                chunk = None
+                for chunk in model.generate_content(prompt, safety_settings=gemini.safety_settings(),
+                                                    generation_config=json_config(), stream=True):
+                    partial = parser.feed(chunk.text)
+                    if partial is None: continue
+                    try: yield parse_partial(partial) if parse_partial else partial
+                    except AIResponseError: continue
+                self.telemetry.usage(span, getattr(chunk, "usage_metadata", None))
+                result = parse_ai_response(parser.text, parse)
+                if is_error(result): span.fail(result["error"])
+            if not is_error(result): self.ai_cache.put(model_name, prompt, parser.text)
+            yield result
+        except Exception as e: yield {"error": str(e)}
+
+    def generate_recipe_from_text(self, text_description, use_cache=True, stream=False):
+        try:
+            prompt = f"""
+            Crée une recette saine basée sur ce texte : "{text_description}".
+            INSTRUCTION: Recette complète, note sévère, nutrition précise.
+            JSON STRICT: {{ "nom": "...", "temps": "...", "tags": [], "score": 85, "portion_text": "1 personne", "nutrition": {{ "cal": "...", "prot": "...", "carb": "...", "fat": "..." }}, "ingredients": [], "etapes": [] }}
+            """
+            if stream: return self.stream_gemini_json(prompt, use_cache, parse=parse_recipe,
+                                                      parse_partial=lambda d: parse_recipe(d, strict=False))
+            return self.ask_gemini_json(prompt, use_cache, parse=parse_recipe, schema=RECIPE_SCHEMA)
+        except Exception as e: return {"error": str(e)}
+
+    def suggest_frigo_recipes(self, ingredient, nb_pers, use_cache=True):
+        try:
+            prompt = f"""
+            J'ai SEULEMENT: "{ingredient}".
+            Propose 3 recettes simples. Ingrédients pour {nb_pers} PERSONNES.
+            IMPORTANT: 'ingredients' doit être une liste simple de textes. Pas de catégories.
+            LISTE JSON: [ {{ "nom": "...", "temps": "...", "score": 75, "portion_text": "Pour {nb_pers} p.", "nutrition": {{ "cal": "...", "prot": "...", "carb": "...", "fat": "..." }}, "ingredients": ["..."], "etapes_courtes": "..." }} ]
+            """
+            return self.ask_gemini_json(prompt, use_cache, parse=parse_recipes, schema=RECIPE_LIST_SCHEMA)
+        except Exception as e: return {"error": str(e)}
+
+    def generate_chef_proposals(self, req, frigo_items, options, nb_pers, use_cache=True, stream=False):
+        try:
+            constraint_txt = ""
+            if "Healthy" in options: constraint_txt += "Recettes très saines. "
+            if "Economique" in options: constraint_txt += "Ingrédients pas chers. "
+            if "Rapide" in options: constraint_txt += "Prêt en 15 min. "
+            if "Peu d'ing." in options: constraint_txt += "Max 5 ingrédients. "
+
+            frigo_txt = f"Utiliser en priorité: {frigo_items}." if frigo_items else ""
+
+            prompt = f"""
+            3 recettes pour : "{req}". {frigo_txt} Contraintes : {constraint_txt}
+            Quantités: {nb_pers} Pers. Nutri: 1 Pers.
+            IMPORTANT: 'ingredients' doit être une liste simple de textes. Pas de catégories.
+            LISTE JSON: [ {{ "nom": "...", "type": "Rapide", "score": 80, "portion_text": "Pour {nb_pers} p.", "nutrition": {{...}}, "ingredients": ["...", "..."], "etapes": [...] }}, ... ]
+            """
+            if stream: return self.stream_gemini_json(prompt, use_cache, parse=parse_recipes,
+                                                      parse_partial=lambda d: parse_recipes(d, strict=False))
+            return self.ask_gemini_json(prompt, use_cache, parse=parse_recipes, schema=RECIPE_LIST_SCHEMA)
+        except Exception as e: return {"error": str(e)}
+
+    # --- COACH ---
+    def generate_workout(self, time_min, intensity, place, tools=(), use_cache=True, enrich=False):
+        """Séance construite sur place (goumin.workouts) ; enrich=True la fait en plus reformuler par Gemini."""
+        from goumin.workouts import workout_plan  # Séances courantes précalculées au premier appel, pas au démarrage
+        plan = workout_plan(time_min, intensity, place, tools)
+        return self.enrich_workout(plan, use_cache) if enrich else plan
+
+    def enrich_workout(self, plan, use_cache=True):
+        """Même séance, consignes reformulées par Gemini. Réponse inutilisable : la séance d'origine."""
+        try:
+            prompt = f"""
+            Coach sportif. Reformule cette séance (titre, résumé, consignes) de façon motivante et précise.
+            Garde les mêmes exercices, dans le même ordre. Séance : {json.dumps(plan.to_dict(), ensure_ascii=False)}
+            JSON STRICT: {{ "titre": "...", "resume": "...", "echauffement": [], "circuit": [ {{"exo": "...", "rep": "...", "repos": "..."}} ], "cooldown": [] }}
+            """
+            res = self.ask_gemini_json(prompt, use_cache, parse=parse_workout, schema=WORKOUT_SCHEMA)
+        except Exception: return plan
+        if is_error(res) or len(res.circuit) != len(plan.circuit): return plan
+        # Répétitions et repos : ceux calculés pour tenir dans la durée, pas ceux de l'IA
+        return dataclasses.replace(res, circuit=[dataclasses.replace(ex, rep=mine.rep, repos=mine.repos)
+                                                 for ex, mine in zip(res.circuit, plan.circuit)])
+
+    # --- COMPARATEUR ---
+    def products(self):
+        """Base produits compilée (goumin.products), None si absente ou illisible. Rouverte si le fichier a été recompilé."""
+        path = self.config.products_file
+        try: mtime = os.stat(path).st_mtime_ns
+        except OSError: return None
+        with self._products_lock:
+            stamp, index = self._products
+            if stamp == mtime: return index
+            if index: index.close()  # L'ancien mmap (fermé après ses recherches en cours), sinon gardé ouvert
+            try: index = ProductIndex(path)
+            except (OSError, ValueError): index = None  # Fichier vide ou tronqué (compilation en cours...)
+            self._products = (mtime, index)
+            return index
+
+    def find_product(self, name):
+        if not name.strip(): return None
+        # Index réservé le temps de la recherche : une recompilation ne le ferme qu'après
+        while (index := self.products()) and not index.acquire(): pass  # Remplacé entre-temps : on prend le nouveau
+        if not index: return None
+        try: return index.lookup(name)
+        finally: index.release()
+
+    def product_analysis(self, product):
+        """Verdict calculé sur place (Nutri-Score, composition), sans IA."""
+        return {**product_verdict(product), "product": product}
+
+    def product_alternative(self, product, use_cache=True):
+        """Alternative maison à un produit de la base : seul appel IA du Comparateur pour un produit connu."""
+        try:
+            facts = ", ".join(f"{LABELS[n]} {v:g}" for n, v in product.nutrients().items())
+            prompt = f"""Produit : "{product.label}". Pour 100 g : {facts}. Propose une alternative maison plus saine.
+            JSON STRICT: {{ "alternative": "...", "recette_rapide": "..." }}"""
+            return self.ask_gemini_json(prompt, use_cache)
+        except Exception as e: return {"error": str(e)}
+
+    def analyze_alternative(self, prod, use_cache=True):
+        """Produit de la base produits : verdict local + alternative IA. Produit inconnu : tout par Gemini."""
+        product = self.find_product(prod)
+        if not product: return self.analyze_unknown_product(prod, use_cache)
+        res = self.product_analysis(product)
+        alt = self.product_alternative(product, use_cache)
+        if not is_error(alt): res.update(alternative=alt.get("alternative"), recette_rapide=alt.get("recette_rapide"))
+        return res
+
+    def analyze_unknown_product(self, prod, use_cache=True):
+        """Produit absent de la base produits : verdict et alternative par Gemini."""
+        try:
+            prompt = f"""Analyse "{prod}". JSON STRICT: {{ "verdict": "Bon/Mauvais/Moyen", "analyse": "...", "alternative": "...", "recette_rapide": "..." }}"""
+            return self.ask_gemini_json(prompt, use_cache)
+        except Exception as e: return {"error": str(e)}
@@ -0,0 +1,59 @@
+"""Téléchargements HTTP partagés : pool de connexions, timeouts, retries et parallélisme borné."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "Mozilla/5.0 (compatible; Goumin/1.0)"
+MAX_BYTES = 20 * 1024 * 1024  # On refuse les "images" de plus de 20 Mo
+
+
+class Fetcher:
+    """Session requests réutilisée + pool de threads pour les téléchargements en parallèle."""
+
+    def __init__(self, max_workers=8, timeout=(5, 30), retries=3, backoff=0.5):
+        self.timeout = timeout
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="goumin-fetch")
+
+    def get_bytes(self, url, timeout=None):
+        """Contenu de l'URL, ou None en cas d'erreur HTTP, de timeout ou de fichier trop gros."""
+        try:
+            with self.session.get(url, timeout=timeout or self.timeout, stream=True) as resp:
+                if resp.status_code != 200: return None
+                chunks, size = [], 0
+                for chunk in resp.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > MAX_BYTES: return None
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except requests.RequestException: return None
+
+    def submit(self, url, timeout=None):
+        return self._pool.submit(self.get_bytes, url, timeout)
+
+    def fetch_many(self, urls, timeout=None):
+        """Télécharge plusieurs URLs en parallèle. Renvoie {url: octets ou None}."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        futures = {u: self.submit(u, timeout) for u in urls}
+        return {u: f.result() for u, f in futures.items()}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Fetcher unique du process (créé au premier appel)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None: _shared = Fetcher()
+        return _shared
@@ -0,0 +1,119 @@
+"""« Qu'est-ce que je peux cuisiner ? » : recettes de la bibliothèque classées selon le contenu du frigo.
+
+Index inversé ingrédient -> recettes, sur les noms canoniques (goumin.ingredients). Une recette est
+d'autant mieux placée qu'il manque peu d'ingrédients et que le frigo en couvre une grande part.
+Les basiques du placard (sel, poivre, huile...) sont supposés disponibles.
+Le Chef IA n'est appelé que si aucune recette locale ne convient (FridgeMatch.good).
+"""
+import heapq
+import re
+from dataclasses import dataclass
+
+from goumin.ingredients import parse_ingredient, parse_ingredients
+from goumin.search import JournalIndex, edit_distance, max_typos, tokenize
+
+# Toujours à la maison : ni demandés, ni comptés comme manquants
+STAPLES = frozenset(["sel", "poivre", "sel et poivre", "huile", "huile d'olive", "huile neutre", "eau", "sucre",
+                     "vinaigre", "épice", "herbes de provence"])
+# Recette locale jugée suffisante : au moins 60 % des ingrédients et au plus 2 à acheter
+GOOD_COVERAGE = 0.6
+MAX_MISSING = 2
+
+_SPLIT = re.compile(r"[,;\n+/]|\bet\b|\bavec\b", re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class FridgeMatch:
+    id: str
+    coverage: float    # Part des ingrédients (hors basiques) déjà dans le frigo
+    missing: list      # Noms des ingrédients à acheter
+    score: int
+
+    @property
+    def good(self):
+        return self.coverage >= GOOD_COVERAGE and len(self.missing) <= MAX_MISSING
+
+
+def fridge_items(text):
+    """'2 courgettes, des oeufs et du chèvre' -> [('courgette',), ('oeuf',), ('chevre',)] (mots du nom canonique)."""
+    items = []
+    for part in _SPLIT.split(text or ""):
+        words = tuple(tokenize(parse_ingredient(part.strip()).name)) if part.strip() else ()
+        if words and words not in items: items.append(words)
+    return items
+
+
+class FridgeIndex(JournalIndex):
+    """Premier mot de chaque ingrédient -> {id: [(n° d'ingrédient, mots)]}, et ingrédients utiles de chaque recette."""
+
+    def __init__(self):
+        super().__init__()
+        self.needs = {}       # id -> [(nom canonique, mots)] hors basiques
+        self.scores = {}
+        self.heads = {}
+
+    def add(self, recipe):
+        needs, seen = [], set()
+        for ing in parse_ingredients(recipe.ingredients):
+            words = tuple(tokenize(ing.name))
+            if ing.name in STAPLES or not words or words in seen: continue
+            seen.add(words)
+            needs.append((ing.name, words))
+        with self._lock:
+            self.remove(recipe.id)
+            if not needs: return
+            self.needs[recipe.id], self.scores[recipe.id] = needs, recipe.score
+            for i, (_, words) in enumerate(needs):
+                self.heads.setdefault(words[0], {}).setdefault(recipe.id, []).append((i, frozenset(words)))
+
+    def remove(self, rid):
+        with self._lock:
+            needs = self.needs.pop(rid, None)
+            if needs is None: return
+            self.scores.pop(rid, None)
+            for head in {words[0] for _, words in needs}:
+                del self.heads[head][rid]
+                if not self.heads[head]: del self.heads[head]
+
+    def rebuild(self, recipes):
+        with self._lock:
+            self.needs, self.scores, self.heads = {}, {}, {}
+            for r in recipes: self.add(r)
+
+    def _heads_for(self, head):
+        # Mot exact, sinon à une ou deux fautes près ("courgete")
+        if head in self.heads: return [head]
+        limit = max_typos(head)
+        return [h for h in self.heads if limit and edit_distance(head, h, limit) <= limit]
+
+    def _cover(self, words, covered, ids):
+        """Ajoute à `covered` (id -> n° d'ingrédients) les ingrédients couverts par `words`. Renvoie le nombre trouvé."""
+        found, rest = 0, set(words[1:])
+        for head in self._heads_for(words[0]):
+            for rid, entries in self.heads[head].items():
+                if ids is not None and rid not in ids: continue
+                hits = [i for i, recipe_words in entries if rest <= recipe_words]
+                if hits:
+                    covered.setdefault(rid, set()).update(hits)
+                    found += 1
+        return found
+
+    def match(self, items, limit=3, ids=None):
+        """Meilleures recettes pour ces ingrédients (voir fridge_items), limitées à `ids` si donné.
+
+        Un ingrédient du frigo couvre celui d'une recette s'ils commencent par le même mot et que
+        tous ses mots s'y retrouvent : "tomate" couvre "tomate cerise", pas "sauce tomate".
+        """
+        with self._lock:
+            covered = {}  # id -> {n° d'ingrédient}
+            for words in items:
+                # "saumon citron riz" sans virgules : chaque mot est un ingrédient
+                if not self._cover(words, covered, ids) and len(words) > 1:
+                    for w in words: self._cover((w,), covered, ids)
+            # Classement sur les seuls comptes ; la liste des manquants n'est faite que pour les gagnants
+            needs, scores = self.needs, self.scores
+            best = heapq.nsmallest(limit, covered.items(), key=lambda kv: (
+                len(needs[kv[0]]) - len(kv[1]), -len(kv[1]) / len(needs[kv[0]]), -scores[kv[0]]))
+            return [FridgeMatch(rid, len(done) / len(needs[rid]),
+                                [name for i, (name, _) in enumerate(needs[rid]) if i not in done], scores[rid])
+                    for rid, done in best]
@@ -0,0 +1,68 @@
+"""Réglages Gemini communs à l'application et à la ligne de commande.
+
+google.generativeai met ~1 s à s'importer : il n'est chargé qu'au premier appel réel
+(client()), puis configuré une seule fois par process. Les objets GenerativeModel sont
+réutilisés d'un appel à l'autre (model()).
+"""
+import functools
+import os
+import tomllib
+
+from goumin.models import AIResponseError, extract_json
+
+
+def configure(api_key=None, secrets_file=".streamlit/secrets.toml"):
+    """Clé API : argument, sinon $GOOGLE_API_KEY, sinon le fichier de secrets Streamlit.
+
+    Ne charge pas le SDK : la clé est seulement retenue pour le premier appel.
+    """
+    if not api_key: api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key and os.path.exists(secrets_file):
+        with open(secrets_file, "rb") as f: api_key = tomllib.load(f).get("GOOGLE_API_KEY")
+    if not api_key: raise RuntimeError("GOOGLE_API_KEY manquante (variable d'environnement ou secrets.toml)")
+    if os.environ.get("GOOGLE_API_KEY") != api_key:
+        os.environ["GOOGLE_API_KEY"] = api_key
+        client.cache_clear()
+        model.cache_clear()
+
+
+@functools.cache
+def client():
+    """Module google.generativeai, importé et configuré au premier appel seulement."""
+    import google.generativeai as genai
+    genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+    return genai
+
+
+@functools.cache
+def model(name):
+    # Un GenerativeModel par nom de modèle et par process (sans état entre deux requêtes)
+    return client().GenerativeModel(name)
+
+
+@functools.cache
+def safety_settings():
+    from google.generativeai.types import HarmBlockThreshold, HarmCategory
+    return {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+
+
+def json_config(schema=None):
+    # Sortie JSON native de Gemini ; avec schéma, la structure est garantie côté serveur
+    return client().GenerationConfig(response_mime_type="application/json", response_schema=schema)
+
+
+def parse_ai_response(text, parse):
+    """Seul point de validation des réponses IA : texte -> modèle typé (réparé), ou {"error": ...}."""
+    try: return parse(extract_json(text))
+    except AIResponseError as e: return {"error": str(e), "raw": text}
+
+
+def parse_object(data):
+    # Réponses sans modèle dédié (comparateur) : on exige juste un objet JSON
+    if not isinstance(data, dict): raise AIResponseError("Objet JSON attendu")
+    return data
@@ -0,0 +1,139 @@
+"""Cache disque des images générées par pollinations.ai, clé = nom du plat normalisé, éviction LRU."""
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+import unicodedata
+import urllib.parse
+from concurrent.futures import Future
+from pathlib import Path
+
+from PIL import Image
+
+from goumin.fetcher import get_fetcher
+
+GENERATOR_URL = os.environ.get("GOUMIN_IMAGE_GEN_URL", "https://image.pollinations.ai")
+GENERATION_TIMEOUT = (5, 45)  # La génération côté serveur prend souvent plus de 10 s
+FAILURE_TTL = 300             # Secondes avant de retenter un plat dont la génération a échoué
+PLACEHOLDER_COLOR = (243, 231, 214)  # Fond crème de l'application
+
+
+def normalize_dish_name(name):
+    """'  Pâtes  Carbonara!' -> 'pates carbonara'"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def generated_image_url(food_name, base_url=GENERATOR_URL):
+    clean_name = urllib.parse.quote(food_name)
+    return f"{base_url}/prompt/delicious_{clean_name}_food_photography_high_quality?width=400&height=300&nologo=true"
+
+
+def is_image(data):
+    """Vrai si les octets sont une image lisible (pas une page d'erreur servie avec un code 200)."""
+    try:
+        Image.open(io.BytesIO(data)).verify()
+        return True
+    except Exception: return False
+
+
+class GeneratedImageCache:
+    """Une image par plat, téléchargée une seule fois. La date de modification sert d'horodatage LRU."""
+
+    def __init__(self, folder, max_bytes=200 * 1024 * 1024, base_url=GENERATOR_URL, fetcher=None):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.base_url = base_url
+        self.fetcher = fetcher or get_fetcher()
+        self._lock = threading.Lock()
+        self._pending = {}   # plat normalisé -> Future du chemin, génération en cours
+        self._failed = {}    # plat normalisé -> instant (monotonic) du dernier échec
+        self._size = sum(p.stat().st_size for p in self.folder.glob("*.jpg"))
+
+    def path_for(self, name):
+        key = hashlib.sha1(normalize_dish_name(name).encode()).hexdigest()[:24]
+        return self.folder / f"{key}.jpg"
+
+    def placeholder(self):
+        """Image locale neutre, affichée le temps que l'image du plat soit générée (hors LRU : .png)."""
+        path = self.folder / "placeholder.png"
+        if not path.exists():
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            Image.new("RGB", (400, 300), PLACEHOLDER_COLOR).save(tmp, "PNG")
+            os.replace(tmp, path)
+        return str(path)
+
+    def lookup(self, name):
+        """Chemin local si l'image est déjà en cache (et la marque comme récemment utilisée), sinon None."""
+        path = self.path_for(name)
+        try: os.utime(path)
+        except OSError: return None
+        return str(path)
+
+    def get(self, name):
+        """Chemin local de l'image du plat, en attendant sa génération si besoin (None si elle échoue)."""
+        return self.get_many([name], wait=True).get(name)
+
+    def get_many(self, names, wait=False):
+        """{nom: chemin local ou None}. Les images manquantes sont générées en parallèle, en arrière-plan.
+
+        wait=False : rend la main tout de suite (None pour les manquantes, prêtes à un prochain affichage).
+        Un plat dont la génération a échoué n'est pas retenté avant FAILURE_TTL secondes.
+        """
+        result = {n: self.lookup(n) for n in names}
+        futures = {}
+        for n, path in result.items():
+            if path is None and (fut := self._generate(n)): futures[n] = fut
+        if wait:
+            for n, fut in futures.items(): result[n] = fut.result()
+        return result
+
+    def _generate(self, name):
+        """Future du chemin de l'image (génération lancée si elle ne l'est pas déjà), None si échec récent."""
+        key = normalize_dish_name(name)
+        with self._lock:
+            if key in self._pending: return self._pending[key]
+            if time.monotonic() - self._failed.get(key, -FAILURE_TTL) < FAILURE_TTL: return None
+            fut = self._pending[key] = Future()
+        download = self.fetcher.submit(generated_image_url(name, self.base_url), GENERATION_TIMEOUT)
+        download.add_done_callback(lambda d: self._finish(key, name, d, fut))
+        return fut
+
+    def _finish(self, key, name, download, fut):
+        try: path = self._store(name, download.result())
+        except Exception: path = None
+        with self._lock:
+            del self._pending[key]
+            if path: self._failed.pop(key, None)
+            else: self._failed[key] = time.monotonic()
+        fut.set_result(path)
+
+    def _store(self, name, data):
+        if not data or not is_image(data): return None
+        path = self.path_for(name)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            old = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._size += len(data) - old
+            self._evict()
+        return str(path)
+
+    def _evict(self):
+        # Les moins récemment utilisées partent en premier
+        if self._size <= self.max_bytes: return
+        files = sorted(self.folder.glob("*.jpg"), key=lambda p: p.stat().st_mtime)
+        for p in files[:-1]:  # On garde toujours la plus récente
+            if self._size <= self.max_bytes: break
+            try:
+                size = p.stat().st_size
+                p.unlink()
+                self._size -= size
+            except OSError: pass
+
+    def size(self):
+        return self._size
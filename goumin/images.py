@@ -0,0 +1,80 @@
+"""Images des recettes : miniatures carrées, stockées sous le hash de leur contenu."""
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image, ImageOps, features
+
+# Taille (px) du carré de chaque variante. La grille affiche ~150 px : 300 pour les écrans retina.
+VARIANTS = {"thumb": 300, "medium": 800}
+# Du plus petit au plus grand, pour choisir la plus petite variante suffisante
+SIZES_ORDER = sorted(VARIANTS, key=VARIANTS.get)
+
+if features.check("webp"):
+    FORMAT, EXT, SAVE_OPTIONS = "WEBP", "webp", {"quality": 80, "method": 4}
+else:
+    FORMAT, EXT, SAVE_OPTIONS = "JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def variant_path(media_folder, digest, name):
+    return os.path.join(media_folder, f"{digest}_{name}.{EXT}")
+
+
+def ingest_image(data, media_folder):
+    """Transforme des octets d'image en variantes carrées recompressées.
+
+    Renvoie {"hash", "thumb", "medium"} ou None si les octets ne sont pas une image ou n'ont pas pu être écrits.
+    Une image déjà vue (même hash) n'est ni retraitée ni stockée une seconde fois.
+    """
+    if not data: return None
+    digest = content_hash(data)
+    paths = {name: variant_path(media_folder, digest, name) for name in VARIANTS}
+    if all(os.path.exists(p) for p in paths.values()):
+        return {"hash": digest, **paths}
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+    except Exception: return None
+
+    for name, size in VARIANTS.items():
+        side = min(size, *img.size)  # jamais d'agrandissement
+        # Ecriture atomique : une autre session peut lire le même fichier
+        tmp = f"{paths[name]}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            ImageOps.fit(img, (side, side), Image.LANCZOS).save(tmp, FORMAT, **SAVE_OPTIONS)
+            os.replace(tmp, paths[name])
+        except Exception:  # Disque plein, erreur d'encodage... : pas d'image, comme pour des octets illisibles
+            try: os.remove(tmp)
+            except OSError: pass
+            return None
+    return {"hash": digest, **paths}
+
+
+def downscaled_png(path, size):
+    """Octets PNG de l'image réduite à `size` px de côté au plus (logo, favicon)."""
+    img = Image.open(path)
+    img.thumbnail((size, size), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def pick_image(recipe, size="thumb"):
+    """Plus petite variante locale d'au moins `size`, sinon l'image d'origine de la recette."""
+    variants = recipe.images or {}
+    for name in SIZES_ORDER[SIZES_ORDER.index(size):] + SIZES_ORDER[:SIZES_ORDER.index(size)][::-1]:
+        path = variants.get(name)
+        if path and os.path.exists(path): return path
+    return recipe.image_path
+
+
+def remove_variants(digest, media_folder):
+    for name in VARIANTS:
+        try: os.remove(variant_path(media_folder, digest, name))
+        except OSError: pass
@@ -0,0 +1,56 @@
+"""Déduplication des imports vidéo : une vidéo (extracteur + id) n'est analysée qu'une fois."""
+import threading
+import urllib.parse
+from concurrent.futures import Future
+
+
+# Paramètres de partage ou de suivi : ils changent d'un partage à l'autre sans changer la vidéo
+TRACKING_PARAMS = {"is_from", "igshid", "igsh", "si", "feature", "fbclid", "gclid", "mibextid", "ref", "refsrc",
+                   "share_app_id", "share_item_id", "sender_device", "sender_web_id", "is_copy_url", "_r", "_t", "t"}
+
+
+def canonical_url(url):
+    """URL sans paramètres de suivi ni fragment : 'https://www.tiktok.com/@a/video/1?is_from=x' -> 'tiktok.com/@a/video/1'.
+
+    Les autres paramètres sont gardés (triés) : ils désignent souvent la vidéo ('youtube.com/watch?v=AAA').
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.").removeprefix("m.")
+    params = sorted((k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                    if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_"))
+    query = f"?{urllib.parse.urlencode(params)}" if params else ""
+    return f"{host}{parts.path.rstrip('/')}{query}"
+
+
+def video_key(info):
+    """Identifiant stable d'une vidéo à partir des métadonnées yt-dlp, ex. 'tiktok:7301234567890'."""
+    if not info or not info.get("id"): return None
+    extractor = info.get("extractor_key") or info.get("ie_key") or info.get("extractor") or "generic"
+    return f"{extractor.lower()}:{info['id']}"
+
+
+class Coalescer:
+    """Regroupe les appels simultanés pour une même clé : un seul calcul, tout le monde reçoit le résultat."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def is_running(self, key):
+        with self._lock: return key in self._inflight
+
+    def run(self, key, fn):
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner: fut = self._inflight[key] = Future()
+        if not owner: return fut.result()
+        try:
+            result = fn()
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock: del self._inflight[key]
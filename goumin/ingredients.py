@@ -0,0 +1,272 @@
+"""Lignes d'ingrédients : quantité, unité et nom canonique, pour la liste de courses et les portions.
+
+    parse_ingredient("1 ½ c. à soupe d'huile d'olive vierge extra")
+    -> Ingredient(qty=1.5, unit="c.à.s", name="huile d'olive", label="huile d'olive vierge extra", note="")
+
+Les motifs sont compilés une fois, les lignes déjà vues sont servies par un cache (les mêmes
+"2 oeufs" ou "sel, poivre" reviennent dans des centaines de recettes). Masses en grammes,
+volumes en millilitres : "1,5 kg" -> (1500.0, "g"). Pas d'unité pour les pièces ("3 oeufs").
+"""
+import functools
+import re
+import unicodedata
+from typing import NamedTuple
+
+_FRACTIONS = {"½": "1/2", "¼": "1/4", "¾": "3/4", "⅓": "1/3", "⅔": "2/3", "⅛": "1/8"}
+
+# Unité canonique -> (écritures reconnues, facteur vers l'unité canonique)
+UNITS = {
+    "g": (["g", "gr", "grammes?"], 1),
+    "kg": (["kg", "kilos?", "kilogrammes?"], 1000),
+    "mg": (["mg"], 0.001),
+    "oz": (["oz"], 28.35),
+    "lb": (["lbs?"], 453.6),
+    "ml": (["ml", "millilitres?"], 1),
+    "cl": (["cl", "centilitres?"], 10),
+    "dl": (["dl", "decilitres?"], 100),
+    "l": (["l", "litres?"], 1000),
+    "c.à.s": (["c\\.? ?a\\.? ?s\\.?", "cs", "cuil\\.? a soupe", "cuilleres? a soupe", "cuillerees? a soupe",
+               "c\\. a soupe", "tbsp", "cuilleres?"], 1),
+    "c.à.c": (["c\\.? ?a\\.? ?c\\.?", "cc", "cuil\\.? a cafe", "cuilleres? a cafe", "cuillerees? a cafe",
+               "c\\. a cafe", "tsp"], 1),
+    "pincée": (["pincees?"], 1),
+    "tranche": (["tranches?"], 1),
+    "gousse": (["gousses?"], 1),
+    "botte": (["bottes?"], 1),
+    "bouquet": (["bouquets?"], 1),
+    "poignée": (["poignees?"], 1),
+    "filet": (["filets?"], 1),
+    "boîte": (["boites?"], 1),
+    "sachet": (["sachets?"], 1),
+    "verre": (["verres?"], 1),
+    "tasse": (["tasses?"], 1),
+    "brin": (["brins?"], 1),
+    "feuille": (["feuilles?"], 1),
+    "morceau": (["morceaux?"], 1),
+}
+# Conversions vers l'unité de base : masses en g, volumes en ml
+BASE_UNIT = {"kg": "g", "mg": "g", "oz": "g", "lb": "g", "cl": "ml", "dl": "ml", "l": "ml"}
+
+# Nom (sans accents, au singulier) -> nom canonique
+SYNONYMS = {
+    "oeuf entier": "oeuf", "oeuf frai": "oeuf", "oeuf bio": "oeuf",
+    "huile d'olive vierge extra": "huile d'olive", "huile d'olive extra vierge": "huile d'olive", "huile olive": "huile d'olive",
+    "creme fraiche epaisse": "crème fraîche", "creme epaisse": "crème fraîche", "creme fraiche": "crème fraîche",
+    "creme liquide": "crème liquide", "creme fraiche liquide": "crème liquide", "creme entiere": "crème liquide",
+    "parmigiano reggiano": "parmesan", "parmesan rape": "parmesan",
+    "beurre doux": "beurre", "beurre demi-sel": "beurre demi-sel",
+    "sel fin": "sel", "gros sel": "sel", "fleur de sel": "sel",
+    "poivre noir": "poivre", "poivre du moulin": "poivre",
+    "sucre en poudre": "sucre", "sucre semoule": "sucre", "sucre blanc": "sucre",
+    "farine de ble": "farine", "farine t55": "farine", "farine t45": "farine",
+    "blanc de poulet": "poulet", "filet de poulet": "poulet", "escalope de poulet": "poulet", "poulet": "poulet",
+    "lardon fume": "lardon", "allumette de lardon": "lardon",
+    "patate": "pomme de terre", "pomme de terre": "pomme de terre",
+    "oignon jaune": "oignon", "oignon blanc": "oignon", "echalote": "échalote",
+    "lait demi-ecreme": "lait", "lait entier": "lait", "lait ecreme": "lait",
+    "persil plat": "persil", "persil frai": "persil", "coriandre fraiche": "coriandre",
+    "ail": "ail", "gousse d'ail": "ail",
+    "spaghetti": "spaghetti", "pate": "pâtes", "pates": "pâtes",
+}
+
+# Mots qui décrivent la préparation, retirés aux extrémités du nom canonique
+_DESCRIPTORS = frozenset("frais fraiche hache hachee rape rapee emince emincee moyen moyenne gros grosse petit petite bio".split())
+# Mots qui finissent par s/x au singulier
+_INVARIABLE = frozenset("pois riz noix ananas mais jus radis cassis anis frais gras epais bras croix".split())
+
+_ACCENTS = {"a": "[aàâä]", "e": "[eéèêë]", "i": "[iîï]", "o": "[oôö]", "u": "[uùûü]", "c": "[cç]"}
+
+
+def _accent_pattern(alias):
+    # "cuilleres?" -> "cuill[eéèêë]r[eéèêë]s?" : les unités sont reconnues avec ou sans accents
+    return "".join(_ACCENTS.get(ch, ch) for ch in alias)
+
+
+_UNIT_ALIASES = sorted(((_accent_pattern(a), unit) for unit, (aliases, _) in UNITS.items() for a in aliases),
+                       key=lambda pair: -len(pair[0]))
+_UNIT_GROUPS = {f"u{i}": unit for i, (_, unit) in enumerate(_UNIT_ALIASES)}
+_NUMBER = r"\d+(?:[.,]\d+)?"
+_QUANTITY = rf"(?:(?P<whole>\d+)\s+)?(?P<num>\d+)\s*/\s*(?P<den>\d+)|(?P<dec>{_NUMBER})|(?P<one>une?)(?=\s)(?!\s+peu\b)"
+_LINE = re.compile(
+    rf"^(?P<lead>\s*[-•*]?\s*)(?P<amount>(?:{_QUANTITY})(?:\s*(?:-|à|a)\s*(?P<hi>{_NUMBER}))?)?\s*"
+    rf"(?:(?:{'|'.join(f'(?P<u{i}>{p})' for i, (p, _) in enumerate(_UNIT_ALIASES))})(?![a-zà-ÿ]))?\s*"
+    r"(?:(?:de|d'|d’|du|des)\s*(?<=['’\s]))?(?P<rest>.*)$",
+    re.IGNORECASE)
+_PARENTHESES = re.compile(r"\s*\(([^)]*)\)")
+_SPACES = re.compile(r"\s+")
+# "Pour 4" : nombre de personnes, sauf s'il est suivi d'une unité ("Pour 100 g", "Pour 1 l de pâte")
+_SERVINGS = re.compile(
+    rf"(\d+)\s*(?:p\b|p\.|pers|personnes?|portions?|parts?)|pour\s+(\d+)(?![\d.,])"
+    rf"(?!\s*(?:{'|'.join(p for p, _ in _UNIT_ALIASES)})(?![a-zà-ÿ]))", re.IGNORECASE)
+SEASONINGS = frozenset({"sel", "poivre", "piment", "muscade", "paprika"})
+# Début d'une précision après une virgule ("tomates, coupées en dés", "sel, selon le goût") : pas un autre ingrédient
+_NOTE_WORDS = frozenset("a au aux en pour selon facultatif optionnel si ou environ de preference bien tres".split())
+
+
+class Ingredient(NamedTuple):
+    qty: float        # None : pas de quantité ("sel, poivre")
+    unit: str         # Unité canonique ("g", "ml", "c.à.s"...), None pour des pièces
+    name: str         # Nom canonique, pour regrouper ("oeuf", "huile d'olive")
+    label: str = ""   # Nom tel qu'écrit dans la recette
+    note: str = ""    # Précisions (parenthèses, après la virgule)
+
+
+def fold(text):
+    """'Crème Brûlée' -> 'creme brulee'"""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower().replace("œ", "oe")
+
+
+def _singular(word):
+    # "tomates" -> "tomate", "poireaux" -> "poireau" ; "pois", "riz" restent tels quels
+    return word[:-1] if len(word) > 3 and word[-1] in "sx" and fold(word) not in _INVARIABLE else word
+
+
+def canonical_name(label):
+    """'Oeufs frais' -> 'oeuf', 'Crème fraîche épaisse' -> 'crème fraîche', 'Tomates' -> 'tomate'."""
+    words = label.lower().replace("œ", "oe").replace("’", "'").split()
+    while words and fold(words[-1]) in _DESCRIPTORS: words.pop()
+    while len(words) > 1 and fold(words[0]) in _DESCRIPTORS: words.pop(0)
+    words = [_singular(w) for w in words]
+    # Pas dans le dictionnaire : le nom écrit, en minuscules et au singulier (accents gardés)
+    return SYNONYMS.get(fold(" ".join(words)), " ".join(words))
+
+
+def _quantity(m):
+    if m.group("dec"): qty = float(m.group("dec").replace(",", "."))
+    elif m.group("one"): qty = 1.0
+    elif m.group("num"):
+        den = int(m.group("den"))
+        qty = int(m.group("whole") or 0) + (int(m.group("num")) / den if den else 0)
+    else: return None
+    # "2-3 tomates" : on garde le haut de la fourchette pour en avoir assez
+    if m.group("hi"): qty = max(qty, float(m.group("hi").replace(",", ".")))
+    return qty
+
+
+@functools.lru_cache(maxsize=20000)
+def parse_ingredient(line):
+    """Une ligne -> Ingredient. Les lignes identiques ne sont analysées qu'une fois par process."""
+    text = line
+    for char, frac in _FRACTIONS.items():
+        if char in text: text = text.replace(char, f" {frac}")
+    notes = _PARENTHESES.findall(text)
+    text = _PARENTHESES.sub("", text)
+    m = _LINE.match(text)
+    qty = _quantity(m)
+    unit = next((u for g, u in _UNIT_GROUPS.items() if m.group(g)), None)
+    rest = m.group("rest")
+    if unit and (qty is None and unit != "pincée" or not rest.strip(" .;:,")):
+        # Pas de nombre ("Feuilles de menthe") ou pas de nom ("2 tranches") : l'unité fait partie du nom
+        rest, unit = text[m.end("amount") if m.group("amount") else m.end("lead"):], None
+    elif unit and qty is None: qty = 1.0  # "Pincée de sel"
+    label, _, after = rest.partition(",")
+    label = _SPACES.sub(" ", label).strip(" .;:")
+    if unit in BASE_UNIT:
+        qty, unit = (qty * UNITS[unit][1] if qty is not None else None), BASE_UNIT[unit]
+    note = ", ".join(n.strip() for n in [*notes, after] if n.strip())
+    if qty is not None: qty = round(qty, 3)
+    return Ingredient(qty, unit, canonical_name(label), label, note)
+
+
+def parse_ingredients(lines):
+    """Toute une liste de lignes en un passage (chaque ligne distincte analysée une seule fois)."""
+    return [parse_ingredient(line) for line in lines]
+
+
+def _bare_name(part):
+    # "poivre", "huile d'olive" : court, sans chiffre, ni participe ("coupées", "haché"), ni précision ("selon le goût")
+    words = part.split()
+    if not 0 < len(words) <= 3 or any(c.isdigit() for c in part): return False
+    first = words[0].lower()
+    return fold(first) not in _NOTE_WORDS and not first.endswith(("é", "ée", "és", "ées"))
+
+
+@functools.lru_cache(maxsize=20000)
+def parse_items(line):
+    """Articles d'une ligne : 'Sel, poivre' -> sel et poivre ; '1 pincée de sel, poivre' -> 1 pincée de sel et poivre.
+
+    Les autres lignes donnent un seul article ('Tomates, coupées en dés', '2 oeufs, battus').
+    """
+    ing = parse_ingredient(line)
+    if "," not in line and " et " not in line: return (ing,)
+    parts = [p.strip(" .;:") for p in re.split(r",|\bet\b", _PARENTHESES.sub("", line))]
+    if ing.qty is None and not ing.unit:
+        if all(_bare_name(p) for p in parts): return tuple(parse_ingredient(p) for p in parts)
+        return (ing,)
+    # Avec une quantité, la suite n'est séparée que si ce sont des assaisonnements ("sel, poivre")
+    others = [parse_ingredient(p) for p in parts[1:]]
+    if "," not in line or not others or any(o.name not in SEASONINGS or o.qty is not None for o in others): return (ing,)
+    return (ing._replace(note=""), *others)
+
+
+def parse_library(recipes):
+    """{id de recette: [Ingredient]} pour toute la bibliothèque."""
+    return {r.id: parse_ingredients(r.ingredients) for r in recipes}
+
+
+def clean_ingredient_name(text):
+    """Nom du produit seul, sans quantité ni unité : '100g de farine (T55)' -> 'Farine'."""
+    return parse_ingredient(text).name.capitalize()
+
+
+# --- PORTIONS ---
+def servings(portion_text):
+    """Nombre de personnes d'un texte de portion : 'Pour 4 p.' -> 4, '1 personne' -> 1, 'Selon vidéo' -> None."""
+    m = _SERVINGS.search(portion_text or "")
+    return int(m.group(1) or m.group(2)) if m else None
+
+
+_FRACTION_SYMBOLS = {0: "", 1 / 4: "¼", 1 / 3: "⅓", 1 / 2: "½", 2 / 3: "⅔", 3 / 4: "¾", 1: ""}
+_METRIC = ("g", "kg", "ml", "l")
+
+
+def _format_qty(qty):
+    """Pièces et cuillères, à la fraction usuelle près : 1.5 -> '1 ½', 0.33 -> '⅓', 12.4 -> '12'."""
+    if qty >= 10: return f"{qty:.0f}"
+    whole = int(qty)
+    frac = min(_FRACTION_SYMBOLS, key=lambda f: abs(f - (qty - whole)))
+    if frac == 1: whole, frac = whole + 1, 0
+    symbol = _FRACTION_SYMBOLS[frac]
+    if not whole: return symbol or f"{qty:.2g}".replace(".", ",")
+    return f"{whole} {symbol}" if symbol else str(whole)
+
+
+def _plural(word):
+    if word[-1:] in "sx" or fold(word) in _INVARIABLE: return word
+    return word + ("x" if word.endswith(("eau", "au")) else "s")
+
+
+def format_ingredient(ing):
+    """Ingredient -> texte : (150, 'g', 'farine') -> '150 g de farine', (1500, 'g', ...) -> '1,5 kg de ...'."""
+    note = f" ({ing.note})" if ing.note else ""
+    if ing.qty is None: return ing.label + note
+    qty, unit, label = ing.qty, ing.unit, ing.label
+    if unit == "g" and qty >= 1000: qty, unit = qty / 1000, "kg"
+    elif unit == "ml" and qty >= 1000: qty, unit = qty / 1000, "l"
+    elif unit in ("g", "ml") and qty >= 50: qty = round(qty / 5) * 5  # 247 g -> 245 g
+    if unit in _METRIC: amount = f"{qty:.3g}".replace(".", ",")
+    else: amount = _format_qty(qty)
+    first, _, others = label.partition(" ")
+    if unit:
+        unit_text = unit if qty <= 1 or unit in _METRIC or "." in unit else _plural(unit)
+        label = f"{unit_text} {'d' + chr(39) if fold(label[:1]) in 'aeiouyh' else 'de '}{label}"
+    elif first:
+        # "1 oeuf" -> "2 oeufs", "2 oeufs" -> "1 oeuf" : accord du premier mot
+        first = _plural(first) if qty > 1 else _singular(first)
+        label = f"{first} {others}".strip()
+    return f"{amount} {label}{note}"
+
+
+def scale_ingredients(lines, factor):
+    """Lignes d'ingrédients multipliées par `factor` ; les lignes sans quantité restent telles quelles."""
+    scaled = []
+    for line, ing in zip(lines, parse_ingredients(lines)):
+        scaled.append(line if ing.qty is None else format_ingredient(ing._replace(qty=ing.qty * factor)))
+    return scaled
+
+
+def rescale_recipe(recipe, nb_pers):
+    """Ingrédients d'une recette pour `nb_pers` personnes, sans nouvel appel à l'IA (None si la portion est inconnue)."""
+    base = servings(recipe.portion_text)
+    if not base: return None
+    return recipe.ingredients if base == nb_pers else scale_ingredients(recipe.ingredients, nb_pers / base)
@@ -0,0 +1,86 @@
+"""File de tâches en arrière-plan (imports vidéo) avec états et durée de chaque étape."""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Etapes d'un import, dans l'ordre
+STAGES = ("queued", "downloading", "uploading", "processing", "generating")
+FINAL_STATES = ("done", "failed")
+
+
+class Job:
+    """Une tâche : état courant, durée (s) de chaque étape passée, messages, résultat ou erreur."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, label, kind="import"):
+        self.id = f"{kind}-{next(self._ids)}"
+        self.kind = kind
+        self.label = label
+        self.state = "queued"
+        self.timings = {}
+        self.messages = []
+        self.result = None
+        self.error = None
+        self.partial = None  # Résultat partiel publié par la tâche pendant qu'elle tourne (streaming)
+        self.created = time.time()
+        self._stage_started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.state in FINAL_STATES
+
+    @property
+    def elapsed(self):
+        return sum(self.timings.values()) + (0 if self.finished else time.monotonic() - self._stage_started)
+
+    def stage(self, name):
+        """Passe à l'étape `name` ; la durée de l'étape précédente est enregistrée."""
+        with self._lock:
+            if self.finished or name == self.state: return
+            now = time.monotonic()
+            self.timings[self.state] = self.timings.get(self.state, 0) + now - self._stage_started
+            self.state, self._stage_started = name, now
+
+    def log(self, message):
+        self.messages.append(message)
+
+    def _close(self, state, result=None, error=None):
+        self.stage(state)
+        self.result, self.error = result, error
+
+
+class JobQueue:
+    """Pool de workers partagé par toutes les sessions. Les tâches terminées les plus anciennes sont oubliées."""
+
+    def __init__(self, max_workers=3, keep=200):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="goumin-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.keep = keep
+
+    def submit(self, fn, label, kind="import"):
+        """Lance fn(job) en arrière-plan. fn renvoie le résultat ou lève une exception (-> failed)."""
+        job = Job(label, kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest = next((j for j in self._jobs.values() if j.finished), None)
+                if oldest is None: break
+                del self._jobs[oldest.id]
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    @staticmethod
+    def _run(job, fn):
+        try: job._close("done", result=fn(job))
+        except Exception as e: job._close("failed", error=str(e) or type(e).__name__)
+
+    def get(self, job_id):
+        with self._lock: return self._jobs.get(job_id)
+
+    def pending(self):
+        with self._lock: return sum(not j.finished for j in self._jobs.values())
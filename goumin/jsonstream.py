@@ -0,0 +1,79 @@
+"""Lecture progressive d'un JSON qui arrive par morceaux (réponses Gemini en streaming).
+
+feed() renvoie à chaque morceau la meilleure version lisible de ce qui est déjà arrivé :
+les chaînes, listes et objets ouverts sont refermés, les éléments incomplets sont retirés.
+"""
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class StreamingJSONParser:
+    """Analyseur incrémental : chaque caractère n'est examiné qu'une fois."""
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0           # Prochain caractère à examiner
+        self._start = None      # Début du JSON (premier { ou [), on ignore ```json et le texte autour
+        self._stack = []        # Conteneurs ouverts
+        self._in_string = False
+        self._escape = False
+        self._safe = None       # (position, pile) où couper pour obtenir un JSON valide
+        self.value = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        self._scan()
+        value = self._attempt()
+        if value is not None: self.value = value
+        return self.value
+
+    def _scan(self):
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._start is None:
+                if c in _CLOSERS:
+                    self._start = i
+                    self._stack.append(c)
+                    self._safe = (i + 1, list(self._stack))
+                continue
+            if not self._stack: break  # JSON terminé, on ignore la suite
+            if self._in_string:
+                if self._escape: self._escape = False
+                elif c == "\\": self._escape = True
+                elif c == '"': self._in_string = False
+            elif c == '"': self._in_string = True
+            elif c in _CLOSERS:
+                self._stack.append(c)
+                self._safe = (i + 1, list(self._stack))
+            elif c in "}]":
+                self._stack.pop()
+                self._safe = (i + 1, list(self._stack))
+            elif c == ",":
+                # Tout ce qui précède la virgule est complet
+                self._safe = (i, list(self._stack))
+        self._pos = len(text)
+
+    @staticmethod
+    def _close(body, stack):
+        return body + "".join(_CLOSERS[c] for c in reversed(stack))
+
+    def _attempt(self):
+        if self._start is None: return None
+        body = self.text[self._start:self._pos]
+        # 1. Tel quel (en refermant la chaîne en cours) : montre aussi le texte en train d'arriver
+        candidates = [self._close(body + ('"' if self._in_string and not self._escape else ""), self._stack)]
+        # 2. Coupé au dernier élément complet
+        if self._safe:
+            end, stack = self._safe
+            candidates.append(self._close(self.text[self._start:end].rstrip().rstrip(","), stack))
+        for candidate in candidates:
+            try: return json.loads(candidate)
+            except ValueError: continue
+        return None
+
+
+def parse_partial(text):
+    """Version ponctuelle : meilleur JSON lisible dans un texte tronqué (ou None)."""
+    return StreamingJSONParser().feed(text)
@@ -0,0 +1,267 @@
+"""Modèles typés (Recette, Nutrition, Séance) et l'unique analyseur des réponses de l'IA.
+
+Tout ce qui vient de Gemini ou de la base passe par parse_recipe / parse_workout :
+les valeurs sont réparées (types, listes, score) ici, une seule fois, et l'affichage
+peut ensuite lire les attributs sans revérifier.
+"""
+import json
+import re
+from dataclasses import dataclass, field, fields
+
+from goumin.jsonstream import parse_partial
+
+
+# Version de la lecture de la nutrition (parse_kcal, parse_grams) et du score : à augmenter s'ils changent,
+# pour que la base recalcule les colonnes des recettes enregistrées (goumin.storage.DERIVED)
+NUTRITION_VERSION = 1
+
+
+class AIResponseError(ValueError):
+    """Réponse de l'IA inexploitable (pas de JSON, ou recette vide)."""
+
+
+def is_error(result):
+    """Convention des fonctions IA : {"error": "..."} en cas d'échec."""
+    return isinstance(result, dict) and "error" in result
+
+
+# --- JSON BRUT ---
+def extract_json(text):
+    """JSON d'une réponse texte (avec ou sans ```json```, texte autour, réponse tronquée)."""
+    text = (text or "").replace("```json", "").replace("```", "").strip()
+    try: return json.loads(text)
+    except ValueError: pass
+    value = parse_partial(text)
+    if value is None: raise AIResponseError("Erreur format JSON")
+    return value
+
+
+# --- NETTOYAGE DES CHAMPS ---
+def _text(value, default=""):
+    if value is None: return default
+    if isinstance(value, (int, float)): return str(value)
+    if isinstance(value, str): return value.strip() or default
+    return default
+
+
+def _score(value, default=50):
+    # 85, "85", "85/100", "Score : 85" -> 85 (borné à 0..100)
+    if isinstance(value, bool): return default
+    if isinstance(value, (int, float)): return max(0, min(100, int(value)))
+    match = re.search(r"\d+", value) if isinstance(value, str) else None
+    return max(0, min(100, int(match.group()))) if match else default
+
+
+def _text_list(value):
+    """Liste de textes : accepte une chaîne multi-lignes, des catégories {"Sauce": [...]}, des objets."""
+    if value is None: return []
+    if isinstance(value, str):
+        return [line.strip(" -•\t") for line in value.splitlines() if line.strip(" -•\t")]
+    if isinstance(value, dict):
+        return [item for sub in value.values() for item in _text_list(sub)]
+    items = []
+    for item in value if isinstance(value, list) else [value]:
+        if isinstance(item, dict):
+            # {"nom": "farine", "quantite": "100g"} -> "100g farine"
+            text = " ".join(_text(item.get(k)) for k in ("quantite", "quantité", "qte", "nom", "name", "item", "exo", "texte")
+                            if _text(item.get(k)))
+            if text: items.append(text)
+        elif isinstance(item, list): items.extend(_text_list(item))
+        elif _text(item): items.append(_text(item))
+    return items
+
+
+# --- VALEURS NUTRITIONNELLES ---
+_THOUSANDS = re.compile(r"(?<=\d)[\s\u00a0\u202f](?=\d{3}(?!\d))")
+_AMOUNT = re.compile(r"(\d+(?:[.,]\d+)?)(?:\s*(?:-|à|a)\s*(\d+(?:[.,]\d+)?))?\s*(kcal|kj|cal|mg|g)?", re.I)
+_TO_KCAL = {"kj": 1 / 4.184}
+_TO_GRAMS = {"mg": 0.001}
+
+
+def _amount(value, factors):
+    """Premier nombre du texte, converti selon son unité : "~30g" -> 30.0, "400-500 kcal" -> 450.0, "?" -> None."""
+    if isinstance(value, bool): return None
+    if isinstance(value, (int, float)): return float(value)
+    match = _AMOUNT.search(_THOUSANDS.sub("", value)) if isinstance(value, str) else None
+    if not match: return None
+    low, high, unit = match.groups()
+    number = float(low.replace(",", "."))
+    if high: number = (number + float(high.replace(",", "."))) / 2
+    return round(number * factors.get((unit or "").lower(), 1), 1)
+
+
+def parse_kcal(value):
+    """Énergie en kcal ("1 880 kJ" -> 449.3)."""
+    return _amount(value, _TO_KCAL)
+
+
+def parse_grams(value):
+    """Masse en grammes ("500 mg" -> 0.5)."""
+    return _amount(value, _TO_GRAMS)
+
+
+# --- MODELES ---
+@dataclass(slots=True)
+class Nutrition:
+    """Valeurs pour une personne : texte d'origine (affichage) et nombre en kcal / grammes (None si inconnu)."""
+    cal: str = "?"
+    prot: str = "?"
+    carb: str = "?"
+    fat: str = "?"
+    kcal: float = None
+    prot_g: float = None
+    carb_g: float = None
+    fat_g: float = None
+
+    def __post_init__(self):
+        # Nombres manquants : lus dans le texte
+        if self.kcal is None: self.kcal = parse_kcal(self.cal)
+        if self.prot_g is None: self.prot_g = parse_grams(self.prot)
+        if self.carb_g is None: self.carb_g = parse_grams(self.carb)
+        if self.fat_g is None: self.fat_g = parse_grams(self.fat)
+
+    @classmethod
+    def parse(cls, data):
+        if not isinstance(data, dict): return cls()
+        # Nombres déjà calculés (recette de la base) repris tels quels
+        numbers = {k: float(data[k]) for k in ("kcal", "prot_g", "carb_g", "fat_g")
+                   if isinstance(data.get(k), (int, float)) and not isinstance(data.get(k), bool)}
+        return cls(**{k: _text(data.get(k), "?") for k in ("cal", "prot", "carb", "fat")}, **numbers)
+
+    def to_dict(self):
+        data = {"cal": self.cal, "prot": self.prot, "carb": self.carb, "fat": self.fat}
+        data.update((k, v) for k, v in (("kcal", self.kcal), ("prot_g", self.prot_g),
+                                        ("carb_g", self.carb_g), ("fat_g", self.fat_g)) if v is not None)
+        return data
+
+
+@dataclass(slots=True)
+class Recipe:
+    nom: str = "Sans nom"
+    temps: str = "?"
+    tags: list = field(default_factory=list)
+    score: int = 50
+    portion_text: str = "Standard"
+    nutrition: Nutrition = field(default_factory=Nutrition)
+    ingredients: list = field(default_factory=list)
+    etapes: list = field(default_factory=list)
+    type: str = ""          # Propositions du chef : "Rapide", "Healthy"...
+    # Champs de la bibliothèque
+    id: str = ""
+    date: str = ""
+    url: str = ""
+    image_path: str = None
+    images: dict = field(default_factory=dict)
+    extra: dict = field(default_factory=dict)  # Clés inconnues, conservées telles quelles
+
+    def to_dict(self):
+        data = {
+            "nom": self.nom, "temps": self.temps, "tags": self.tags, "score": self.score,
+            "portion_text": self.portion_text, "nutrition": self.nutrition.to_dict(),
+            "ingredients": self.ingredients, "etapes": self.etapes,
+        }
+        if self.type: data["type"] = self.type
+        if self.id: data.update(id=self.id, date=self.date, url=self.url, image_path=self.image_path, images=self.images)
+        data.update(self.extra)
+        return data
+
+
+_RECIPE_KEYS = {f.name for f in fields(Recipe)} | {"etapes_courtes"}
+
+
+def parse_recipe(data, strict=True):
+    """Recipe à partir d'un dict (IA ou base). strict=False pour les réponses partielles du streaming."""
+    if isinstance(data, Recipe): return data
+    if not isinstance(data, dict): raise AIResponseError("Recette attendue")
+    recipe = Recipe(
+        nom=_text(data.get("nom"), "Sans nom"),
+        temps=_text(data.get("temps"), "?"),
+        tags=_text_list(data.get("tags")),
+        score=_score(data.get("score")),
+        portion_text=_text(data.get("portion_text"), "Standard"),
+        nutrition=Nutrition.parse(data.get("nutrition")),
+        ingredients=_text_list(data.get("ingredients")),
+        etapes=_text_list(data.get("etapes") or data.get("etapes_courtes")),
+        type=_text(data.get("type")),
+        id=_text(data.get("id")),
+        date=_text(data.get("date")),
+        url=_text(data.get("url")),
+        image_path=data.get("image_path") if isinstance(data.get("image_path"), str) else None,
+        images=data.get("images") if isinstance(data.get("images"), dict) else {},
+        extra={k: v for k, v in data.items() if k not in _RECIPE_KEYS},
+    )
+    if strict and not recipe.id and not recipe.ingredients and not recipe.etapes:
+        raise AIResponseError("Recette vide")
+    return recipe
+
+
+def parse_recipes(data, strict=True):
+    """Liste de recettes ; les éléments inexploitables sont écartés."""
+    if isinstance(data, dict): data = data.get("recettes") or data.get("recipes") or [data]
+    if not isinstance(data, list): raise AIResponseError("Liste de recettes attendue")
+    recipes = []
+    for item in data:
+        try: recipes.append(parse_recipe(item, strict))
+        except AIResponseError: continue
+    if strict and not recipes: raise AIResponseError("Aucune recette exploitable")
+    return recipes
+
+
+@dataclass(slots=True)
+class Exercise:
+    exo: str = "?"
+    rep: str = ""
+    repos: str = ""
+
+
+@dataclass(slots=True)
+class Workout:
+    titre: str = "Séance"
+    resume: str = ""
+    echauffement: list = field(default_factory=list)
+    circuit: list = field(default_factory=list)  # list[Exercise]
+    cooldown: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {"titre": self.titre, "resume": self.resume, "echauffement": self.echauffement,
+                "circuit": [{"exo": e.exo, "rep": e.rep, "repos": e.repos} for e in self.circuit],
+                "cooldown": self.cooldown}
+
+
+def parse_workout(data):
+    if not isinstance(data, dict): raise AIResponseError("Séance attendue")
+    circuit = []
+    for ex in data.get("circuit") or []:
+        if isinstance(ex, dict): circuit.append(Exercise(_text(ex.get("exo"), "?"), _text(ex.get("rep")), _text(ex.get("repos"))))
+        elif _text(ex): circuit.append(Exercise(_text(ex)))
+    if not circuit: raise AIResponseError("Séance vide")
+    return Workout(titre=_text(data.get("titre"), "Séance"), resume=_text(data.get("resume")),
+                   echauffement=_text_list(data.get("echauffement")), circuit=circuit,
+                   cooldown=_text_list(data.get("cooldown")))
+
+
+# --- SCHEMAS POUR LA REPONSE STRUCTUREE DE GEMINI (response_schema) ---
+_STR = {"type": "STRING"}
+_STR_LIST = {"type": "ARRAY", "items": _STR}
+
+RECIPE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "nom": _STR, "type": _STR, "temps": _STR, "tags": _STR_LIST, "score": {"type": "INTEGER"},
+        "portion_text": _STR,
+        "nutrition": {"type": "OBJECT", "properties": {"cal": _STR, "prot": _STR, "carb": _STR, "fat": _STR}},
+        "ingredients": _STR_LIST, "etapes": _STR_LIST,
+    },
+    "required": ["nom", "temps", "score", "nutrition", "ingredients", "etapes"],
+}
+
+RECIPE_LIST_SCHEMA = {"type": "ARRAY", "items": RECIPE_SCHEMA}
+
+WORKOUT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "titre": _STR, "resume": _STR, "echauffement": _STR_LIST, "cooldown": _STR_LIST,
+        "circuit": {"type": "ARRAY", "items": {"type": "OBJECT", "properties": {"exo": _STR, "rep": _STR, "repos": _STR}}},
+    },
+    "required": ["titre", "echauffement", "circuit", "cooldown"],
+}
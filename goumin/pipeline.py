@@ -0,0 +1,229 @@
+"""Import vidéo -> recette, sans Streamlit : yt-dlp, proxy ffmpeg, analyse Gemini, enregistrement.
+
+Utilisé par l'application (une vidéo à la fois) et par l'import en masse (goumin.bulk).
+"""
+import dataclasses
+import os
+import time
+from datetime import datetime
+
+from goumin import gemini
+from goumin.fetcher import get_fetcher
+from goumin.gemini import json_config, parse_ai_response
+from goumin.images import ingest_image
+from goumin.imports import Coalescer, canonical_url, video_key
+from goumin.jsonstream import StreamingJSONParser
+from goumin.models import is_error, parse_recipe
+from goumin.ratelimit import RateLimiter
+from goumin.storage import new_recipe_id
+from goumin.telemetry import Telemetry
+from goumin.video import make_proxy
+
+# On se déguise en iPhone
+USER_AGENT = ("Mozilla/5.0 (iPhone; CPU iPhone OS 14_8 like Mac OS X) AppleWebKit/605.1.15 "
+              "(KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1")
+
+# 'ingredients' en liste simple de textes : pas de catégories
+VIDEO_PROMPT = """
+        Analyse: "{title}". Recette + Nutrition.
+        INSTRUCTION: 1. Recette complète. 2. Nutri 1 PART. 3. Score Santé Sévère /100.
+        IMPORTANT: 'ingredients' doit être une liste simple de textes (Ex: ["2 oeufs", "100g farine"]). Pas de catégories.
+        JSON STRICT: {{ "nom": "...", "temps": "...", "tags": [], "score": 85, "portion_text": "Selon vidéo", "nutrition": {{ "cal": "...", "prot": "...", "carb": "...", "fat": "..." }}, "ingredients": ["..."], "etapes": [] }}
+        """
+
+BLOCKED_MSG = "Bloqué par Insta"
+
+
+def _noop(*args): pass
+
+
+def _size(*paths):
+    return sum(os.path.getsize(p) for p in paths if p and os.path.exists(p))
+
+
+class ImportPipeline:
+    """Vidéo -> recette. Une instance par process : la déduplication et les limites de débit sont partagées.
+
+    `ydl_limiter` / `ai_limiter` : RateLimiter appliqués à chaque appel yt-dlp (sonde et téléchargement)
+    et à chaque analyse vidéo par Gemini (pas aux appels interactifs de l'Engine).
+    `telemetry` : durée et erreurs de chaque étape (goumin.telemetry).
+    """
+
+    def __init__(self, store, media_folder="media", temp_folder="temp", model_name="gemini-2.5-flash",
+                 proxy_mode="video", cookies_path=None, ydl_limiter=None, ai_limiter=None, fetcher=None,
+                 find_duplicates=None, telemetry=None):
+        self.store = store
+        self.media_folder = media_folder
+        self.temp_folder = temp_folder
+        self.model_name = model_name
+        self.proxy_mode = proxy_mode
+        self.cookies_path = cookies_path  # Cookies par défaut (secrets), remplacés par ceux de l'utilisateur
+        self.ydl_limiter = ydl_limiter or RateLimiter(0)
+        self.ai_limiter = ai_limiter or RateLimiter(0)
+        self.fetcher = fetcher
+        self.find_duplicates = find_duplicates  # recette -> [(Recipe, ressemblance)] déjà en bibliothèque
+        self.coalescer = Coalescer()
+        self.telemetry = telemetry or Telemetry()
+
+    # --- YT-DLP ---
+    def ydl_options(self, cookies_path=None):
+        ydl_opts = {
+            # Inutile de récupérer plus que du 720p : la vidéo est réduite avant l'envoi à Gemini
+            'format': 'best[height<=720]/best',
+            'outtmpl': f'{self.temp_folder}/video_%(id)s.%(ext)s',
+            'quiet': True, 'no_warnings': True, 'ignoreerrors': True, 'nocheckcertificate': True,
+            'user_agent': USER_AGENT,
+        }
+        cookies = cookies_path or self.cookies_path
+        if cookies: ydl_opts['cookiefile'] = cookies
+        return ydl_opts
+
+    def download_video(self, url, cookies_path=None):
+        import yt_dlp  # Chargé au premier import vidéo seulement
+        try:
+            self.ydl_limiter.acquire()
+            with self.telemetry.span("download") as span, yt_dlp.YoutubeDL(self.ydl_options(cookies_path)) as ydl:
+                info = ydl.extract_info(url, download=True)
+                if not info:
+                    span.fail(BLOCKED_MSG)
+                    return None, None, None
+                path = ydl.prepare_filename(info)
+                span.set(bytes=_size(path))
+                return path, info.get('title', 'Recette'), info.get('thumbnail')
+        except Exception as e: return None, str(e), None
+
+    def probe_video(self, url, cookies_path=None):
+        """Clé canonique de la vidéo (extracteur:id) via les métadonnées seules, sans téléchargement."""
+        import yt_dlp
+        try:
+            self.ydl_limiter.acquire()
+            with self.telemetry.span("probe"), yt_dlp.YoutubeDL(self.ydl_options(cookies_path)) as ydl:
+                return video_key(ydl.extract_info(url, download=False, process=False))
+        except Exception: return None  # Sans clé, l'import se fait quand même (sans réutilisation)
+
+    # --- GEMINI ---
+    def process_ai_full(self, video_path, title, log=None, stage=None, on_partial=None):
+        proxy = None
+        stage, tel = stage or _noop, self.telemetry
+        try:
+            genai, model = gemini.client(), gemini.model(self.model_name)
+            # On envoie un proxy léger (ou des planches d'images + audio) plutôt que la vidéo brute
+            stage("uploading")
+            with tel.span("proxy", mode=self.proxy_mode, source_bytes=_size(video_path)) as span:
+                proxy = make_proxy(video_path, mode=self.proxy_mode)
+                span.set(bytes=_size(*proxy.files))
+            if log: log(proxy.summary())
+            with tel.span("upload", files=len(proxy.files), bytes=_size(*proxy.files)):
+                uploaded = [genai.upload_file(path=f) for f in proxy.files]
+            tel.count("upload_bytes", _size(*proxy.files))
+            stage("processing")
+            with tel.span("processing"):
+                for i, f in enumerate(uploaded):
+                    while f.state.name == "PROCESSING": time.sleep(1); f = genai.get_file(f.name)
+                    uploaded[i] = f
+
+            stage("generating")
+            self.ai_limiter.acquire()
+            # Réponse en streaming : on_partial reçoit la recette au fur et à mesure
+            # (mode JSON sans schéma : le schéma imposerait l'ordre alphabétique des champs, "nom" arriverait en dernier)
+            parser = StreamingJSONParser()
+            with tel.span("generate", model=self.model_name) as span:
+                chunk = None
+                for chunk in model.generate_content([*uploaded, VIDEO_PROMPT.format(title=title)],
+                                                    safety_settings=gemini.safety_settings(),
+                                                    generation_config=json_config(), stream=True):
+                    partial = parser.feed(chunk.text)
+                    if on_partial and isinstance(partial, dict): on_partial(parse_recipe(partial, strict=False))
+                tel.usage(span, getattr(chunk, "usage_metadata", None))  # Totaux portés par le dernier morceau
+            for f in uploaded: genai.delete_file(f.name)
+            with tel.span("parse", chars=len(parser.text)) as span:
+                recipe = parse_ai_response(parser.text, parse_recipe)
+                if is_error(recipe): span.fail(recipe["error"])
+            return recipe
+        except Exception as e:
+            if os.path.exists(video_path):
+                try: os.remove(video_path)
+                except OSError: pass
+            return {"error": str(e)}
+        finally:
+            if proxy: proxy.cleanup()
+
+    # --- IMPORT ---
+    def import_video(self, url, log=None, stage=None, cookies_path=None, on_partial=None):
+        """Recette d'une vidéo : résultat déjà stocké si elle a déjà été analysée, sinon téléchargement + IA.
+
+        Renvoie (recette, miniature). recette = None si le téléchargement est bloqué.
+        `stage(nom)` est appelé à chaque changement d'étape (downloading, uploading, processing, generating).
+        """
+        return self._import(url, log, stage, cookies_path, on_partial)[:2]
+
+    def _import(self, url, log, stage, cookies_path, on_partial):
+        # (recette, miniature, URL de l'analyse réutilisée ou None)
+        with self.telemetry.trace(), self.telemetry.span("import") as span:
+            recipe, thumb, reused = self._import_video(url, log, stage, cookies_path, on_partial)
+            if recipe is None: span.fail(BLOCKED_MSG)
+            elif is_error(recipe): span.fail(recipe["error"])
+            return recipe, thumb, reused
+
+    def _import_video(self, url, log, stage, cookies_path, on_partial):
+        log, stage = log or _noop, stage or _noop
+        store, clean_url = self.store, canonical_url(url)
+        stage("downloading")
+        done = store.find_import(url=clean_url)
+        key = done['key'] if done else self.probe_video(url, cookies_path)
+        if not done and key: done = store.find_import(key=key)
+        if done:
+            self.telemetry.count("imports_reused")
+            log("♻️ Vidéo déjà analysée, résultat réutilisé.")
+            return done['recipe'], done['thumb'], done['url']
+
+        def work():
+            # Re-vérifie : une autre session a pu finir pendant qu'on attendait
+            done = store.find_import(key=key) if key else None
+            if done: return done['recipe'], done['thumb'], done['url']
+            video_path, title, thumb = self.download_video(url, cookies_path)
+            if not video_path: return None, None, None
+            log("Vidéo récupérée. IA en cours...")
+            recipe = self.process_ai_full(video_path, title, log=log, stage=stage, on_partial=on_partial)
+            if key and not is_error(recipe): store.save_import(key, clean_url, title, thumb, recipe)
+            return recipe, thumb, None
+
+        if not key: return work()
+        if self.coalescer.is_running(key): log("⏳ Cette vidéo est déjà en cours d'analyse, on attend le résultat...")
+        return self.coalescer.run(key, work)
+
+    # --- BIBLIOTHEQUE ---
+    def save_image(self, url_image):
+        """Télécharge une image et la range en variantes (miniature / moyenne). Renvoie les variantes ou None."""
+        if not url_image or "http" not in url_image: return None
+        try:
+            with self.telemetry.span("image"):
+                return ingest_image((self.fetcher or get_fetcher()).get_bytes(url_image), self.media_folder)
+        except Exception: return None  # Sans image : la recette garde le lien d'origine
+
+    def add_recipe(self, recipe, url, thumb_url):
+        variants = self.save_image(thumb_url)
+        final_img = variants['medium'] if variants else thumb_url
+        entry = dataclasses.replace(parse_recipe(recipe), id=new_recipe_id(), date=datetime.now().strftime("%d/%m/%Y"),
+                                    url=url, image_path=final_img, images=variants or {})
+        # Doublon probable (même plat déjà importé) : enregistré quand même, mais signalé
+        twins = self.find_duplicates(entry) if self.find_duplicates else []
+        if twins: entry = dataclasses.replace(entry, extra={**entry.extra, "doublon_de": twins[0][0].id})
+        with self.telemetry.span("save"): self.store.insert(entry)
+        return entry
+
+    def import_and_save(self, url, log=None, stage=None, cookies_path=None):
+        """Import complet d'une URL jusqu'à la bibliothèque. Renvoie la recette enregistrée, lève RuntimeError sinon.
+
+        Vidéo déjà analysée et déjà dans la bibliothèque : renvoie la recette existante, sans nouvelle entrée.
+        """
+        log = log or _noop
+        with self.telemetry.trace():
+            recipe, thumb, reused = self._import(url, log, stage, cookies_path, None)
+            if recipe is None: raise RuntimeError(BLOCKED_MSG)
+            if is_error(recipe): raise RuntimeError(recipe['error'])
+            existing = self.store.find_by_url({canonical_url(url), reused}) if reused else None
+            if existing:
+                log("📚 Déjà dans la bibliothèque.")
+                return existing
+            return self.add_recipe(recipe, url, thumb)
@@ -0,0 +1,354 @@
+"""Base produits hors ligne pour le Comparateur (export Open Food Facts ou équivalent).
+
+    python -m goumin produits en.openfoodfacts.org.products.csv.gz    # compile une fois -> products.idx
+    index = ProductIndex.open("products.idx")
+    index.lookup("kinder bueno")                                      # Product ou None
+
+Le dump (CSV à tabulations, ou JSONL, éventuellement .gz) est compilé en un fichier binaire compact :
+fiches à taille fixe, table triée des mots des noms et marques, listes d'ids par mot. Le fichier est
+ouvert en mmap : seules les pages lues sont chargées, la mémoire reste basse même avec des millions
+de produits. Le verdict vient du Nutri-Score et de la composition ; l'IA ne rédige que l'alternative.
+"""
+import bisect
+import csv
+import gzip
+import io
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+
+from goumin.search import edit_distance, fold, max_typos, tokenize
+
+MAGIC = b"GOUMPRD1"
+# magic, nb produits, nb mots, positions des sections : fiches, mots, listes d'ids, textes
+_HEADER = struct.Struct("<8sIIQQQQ")
+NUTRIENTS = ("kcal", "sugars", "fat", "sat_fat", "salt", "proteins", "fiber")  # Pour 100 g
+# position du texte, longueur, nutriments (NaN : inconnu), Nutri-Score, NOVA, additifs, nb de mots du nom
+_PRODUCT = struct.Struct(f"<IH{len(NUTRIENTS)}fBBBB")
+_TOKEN = struct.Struct("<IHII")  # position du mot, longueur, première position dans les listes, nombre d'ids
+_SEP = "\x1f"
+
+# Colonnes du CSV Open Food Facts (mêmes clés dans "nutriments" du JSONL)
+OFF_COLUMNS = {"kcal": "energy-kcal_100g", "sugars": "sugars_100g", "fat": "fat_100g",
+               "sat_fat": "saturated-fat_100g", "salt": "salt_100g", "proteins": "proteins_100g",
+               "fiber": "fiber_100g"}
+VERDICTS = {"a": "Bon", "b": "Bon", "c": "Moyen", "d": "Mauvais", "e": "Mauvais"}
+# Seuils "faible / élevé" pour 100 g (code couleur des étiquettes britanniques)
+LEVELS = {"sugars": (5, 22.5), "fat": (3, 17.5), "sat_fat": (1.5, 5), "salt": (0.3, 1.5)}
+LABELS = {"kcal": "Énergie", "sugars": "Sucres", "fat": "Matières grasses", "sat_fat": "Graisses saturées",
+          "salt": "Sel", "proteins": "Protéines", "fiber": "Fibres"}
+MATCH_MIN = 0.6        # Part des mots de la recherche retrouvés dans le nom pour accepter le produit
+MAX_CANDIDATES = 20000  # Produits examinés au plus pour le mot le plus rare (les plus complets d'abord)
+MAX_FUZZY_SCAN = 5000   # Mots du vocabulaire comparés au plus pour une faute de frappe
+
+
+@dataclass(slots=True)
+class Product:
+    code: str
+    name: str
+    brands: str = ""
+    nutriscore: str = None   # "a" à "e"
+    nova: int = None         # 1 (brut) à 4 (ultra-transformé)
+    additives: int = None
+    kcal: float = None
+    sugars: float = None
+    fat: float = None
+    sat_fat: float = None
+    salt: float = None
+    proteins: float = None
+    fiber: float = None
+
+    @property
+    def label(self):
+        return f"{self.name} ({self.brands})" if self.brands else self.name
+
+    def nutrients(self):
+        return {n: getattr(self, n) for n in NUTRIENTS if getattr(self, n) is not None}
+
+
+# --- NUTRI-SCORE ---
+def _points(value, thresholds):
+    return sum(value > t for t in thresholds)
+
+
+def estimate_nutriscore(p):
+    """Nutri-Score (aliments solides, sans la part de fruits et légumes) quand le dump n'en donne pas."""
+    if None in (p.kcal, p.sugars, p.sat_fat, p.salt): return None
+    bad = (_points(p.kcal * 4.184, range(335, 3351, 335)) + _points(p.sugars, [4.5 * i for i in range(1, 11)])
+           + _points(p.sat_fat, range(1, 11)) + _points(p.salt * 400, range(90, 901, 90)))
+    fiber = _points(p.fiber or 0, [0.9, 1.9, 2.8, 3.7, 4.7])
+    proteins = _points(p.proteins or 0, [1.6, 3.2, 4.8, 6.4, 8.0])
+    score = bad - fiber - (proteins if bad < 11 else 0)
+    return "a" if score <= -1 else "b" if score <= 2 else "c" if score <= 10 else "d" if score <= 18 else "e"
+
+
+def product_verdict(p):
+    """{"verdict", "nutriscore", "estime", "analyse"} calculés sur place à partir de la fiche."""
+    grade, estimated = p.nutriscore, False
+    if not grade:
+        grade, estimated = estimate_nutriscore(p), True
+    lines = []
+    if grade: lines.append(f"**Nutri-Score {grade.upper()}**" + (" (estimé)" if estimated else ""))
+    if p.nova: lines.append(f"**NOVA {p.nova}**" + (" : ultra-transformé" if p.nova == 4 else ""))
+    if p.additives: lines.append(f"**{p.additives} additif{'s' if p.additives > 1 else ''}**")
+    details = []
+    for n, value in p.nutrients().items():
+        text = f"{LABELS[n]} : {value:.0f} kcal" if n == "kcal" else f"{LABELS[n]} : {value:.1f} g".replace(".", ",")
+        if n in LEVELS:
+            low, high = LEVELS[n]
+            text += " (élevé)" if value > high else " (faible)" if value <= low else ""
+        details.append(text)
+    if details: lines.append("Pour 100 g · " + " · ".join(details))
+    verdict = VERDICTS.get(grade, "Moyen")
+    if verdict == "Bon" and p.nova == 4: verdict = "Moyen"  # Bon profil, mais ultra-transformé
+    return {"verdict": verdict, "nutriscore": grade, "estime": estimated, "analyse": "\n\n".join(lines)}
+
+
+# --- COMPILATION ---
+def _float(value):
+    try: value = float(value)
+    except (TypeError, ValueError): return None
+    return value if math.isfinite(value) and value >= 0 else None
+
+
+def _int(value):
+    value = _float(value)
+    return int(value) if value is not None else None
+
+
+def _open_text(path):
+    raw = gzip.open(path, "rb") if str(path).endswith(".gz") else open(path, "rb")
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace", newline="")
+
+
+def _product(row, nutriments):
+    """Product d'une ligne du dump (dict), None si sans nom ou sans aucune valeur nutritionnelle."""
+    name = (row.get("product_name_fr") or row.get("product_name") or "").strip()
+    if not name: return None
+    values = {n: _float(nutriments.get(col)) for n, col in OFF_COLUMNS.items()}
+    if values["kcal"] is None and _float(nutriments.get("energy_100g")) is not None:
+        values["kcal"] = _float(nutriments["energy_100g"]) / 4.184  # kJ -> kcal
+    grade = (row.get("nutriscore_grade") or row.get("nutrition_grade_fr") or "").strip().lower()
+    nova = _int(row.get("nova_group"))
+    if all(v is None for v in values.values()) and grade not in VERDICTS: return None
+    brands = (row.get("brands") or "").split(",")[0].strip()
+    return Product(str(row.get("code") or ""), name, brands, grade if grade in VERDICTS else None,
+                   nova if nova in (1, 2, 3, 4) else None, _int(row.get("additives_n")), **values)
+
+
+def read_products(path):
+    """Produits d'un dump Open Food Facts : CSV à tabulations ou JSONL (.gz accepté)."""
+    with _open_text(path) as f:
+        if ".jsonl" in str(path) or ".json" in str(path):
+            for line in f:
+                try: row = json.loads(line)
+                except ValueError: continue
+                p = _product(row, row.get("nutriments") or {})
+                if p: yield p
+            return
+        csv.field_size_limit(sys.maxsize)  # Certaines colonnes (ingrédients) sont très longues
+        for row in csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            p = _product(row, row)
+            if p: yield p
+
+
+def _pack_text(text, strings):
+    data = text.encode("utf-8")
+    strings += data
+    return len(strings) - len(data), len(data)
+
+
+def compile_products(products, dest):
+    """Écrit l'index `dest` (remplacé d'un coup, jamais à moitié écrit). Renvoie le nombre de produits."""
+    seen, kept = set(), []
+    for p in products:
+        key = (fold(p.name), fold(p.brands))
+        if key in seen: continue  # Même produit en plusieurs formats : on garde la première fiche
+        seen.add(key)
+        kept.append(p)
+    # Fiches les plus complètes d'abord : à pertinence égale, elles sortent en premier
+    kept.sort(key=lambda p: (p.nutriscore is None, -len(p.nutrients()), p.nova is None))
+
+    strings, words = bytearray(), {}
+    records = bytearray()
+    for i, p in enumerate(kept):
+        tokens = tokenize(f"{p.name} {p.brands}")
+        for t in set(tokens): words.setdefault(t, []).append(i)
+        pos, length = _pack_text(_SEP.join([p.code, p.name, p.brands]), strings)
+        values = [math.nan if getattr(p, n) is None else getattr(p, n) for n in NUTRIENTS]
+        records += _PRODUCT.pack(pos, length, *values, ord(p.nutriscore or "\0"), p.nova or 0,
+                                 min(p.additives, 254) if p.additives is not None else 255, min(len(tokens), 255))
+
+    token_table, postings = bytearray(), bytearray()
+    for t in sorted(words):
+        pos, length = _pack_text(t, strings)
+        token_table += _TOKEN.pack(pos, length, len(postings) // 4, len(words[t]))
+        postings += struct.pack(f"<{len(words[t])}I", *words[t])
+
+    start = _HEADER.size
+    sections = [records, token_table, postings, strings]
+    positions = []
+    for s in sections:
+        positions.append(start)
+        start += len(s)
+    tmp = f"{dest}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(kept), len(words), *positions))
+        for s in sections: f.write(s)
+    os.replace(tmp, dest)
+    return len(kept)
+
+
+# --- LECTURE ---
+class ProductIndex:
+    """Index compilé, lu en mmap. Sûr entre threads (lecture seule)."""
+
+    def __init__(self, path):
+        """ValueError si le fichier est vide, tronqué ou n'est pas un index produits."""
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # ValueError si le fichier est vide
+        try: magic, self.count, self.token_count, *self._sections = _HEADER.unpack_from(self._mm, 0)
+        except struct.error: magic = None  # Plus court que l'en-tête
+        if magic != MAGIC or not self._complete():
+            self._mm.close()
+            raise ValueError(f"{path} n'est pas un index produits Goumin (ou il est tronqué)")
+        records, tokens, postings, strings = self._sections
+        self._records, self._tokens, self._strings = records, tokens, strings
+        # Listes d'ids vues comme un tableau d'entiers, sans copie
+        self._postings = memoryview(self._mm)[postings:strings].cast("I")
+        self._words = _Words(self)
+        self._lock = threading.Lock()
+        self._readers, self._closing = 0, False
+
+    def _complete(self):
+        """Sections à leur place et fichier entier (le texte du dernier mot est écrit en dernier)."""
+        records, tokens, postings, strings = self._sections
+        if not (records == _HEADER.size and tokens == records + self.count * _PRODUCT.size
+                and postings == tokens + self.token_count * _TOKEN.size and postings <= strings <= len(self._mm)):
+            return False
+        if not self.token_count: return True
+        pos, length, _, _ = _TOKEN.unpack_from(self._mm, postings - _TOKEN.size)
+        return strings + pos + length == len(self._mm)
+
+    @classmethod
+    def open(cls, path):
+        """Index à ce chemin, ou None s'il n'a pas été compilé."""
+        return cls(path) if path and os.path.exists(path) else None
+
+    def __len__(self):
+        return self.count
+
+    def _text(self, pos, length):
+        return self._mm[self._strings + pos:self._strings + pos + length].decode("utf-8")
+
+    def product(self, i):
+        pos, length, *rest = _PRODUCT.unpack_from(self._mm, self._records + i * _PRODUCT.size)
+        values, (grade, nova, additives, _) = rest[:len(NUTRIENTS)], rest[len(NUTRIENTS):]
+        code, name, brands = self._text(pos, length).split(_SEP)
+        return Product(code, name, brands, chr(grade) if grade else None, nova or None,
+                       None if additives == 255 else additives,
+                       **{n: None if math.isnan(v) else round(v, 2) for n, v in zip(NUTRIENTS, values)})
+
+    def _name_length(self, i):
+        return self._mm[self._records + (i + 1) * _PRODUCT.size - 1]
+
+    def _token(self, t):
+        pos, length, first, count = _TOKEN.unpack_from(self._mm, self._tokens + t * _TOKEN.size)
+        return self._text(pos, length), first, count
+
+    def _matches(self, word):
+        """[(poids, ids triés)] des mots de l'index qui correspondent à `word` : exact, préfixe, ou faute de frappe."""
+        words = self._words
+        t = bisect.bisect_left(words, word)
+        if t < len(words) and words[t] == word: return [(1.0, self._ids(t))]
+        found = []
+        # Début d'un mot plus long ("bueno" pour "buenos"), seulement pour les mots assez longs
+        if len(word) >= 4:
+            end = bisect.bisect_left(words, word + "\uffff", t)
+            found += [(0.8, self._ids(i)) for i in range(t, min(end, t + 20))]
+        limit = max_typos(word)
+        if not found and limit:
+            # Fautes de frappe : mots qui commencent par les deux mêmes lettres
+            lo = bisect.bisect_left(words, word[:2])
+            hi = min(bisect.bisect_left(words, word[:2] + "\uffff", lo), lo + MAX_FUZZY_SCAN)
+            found += [(0.6, self._ids(i)) for i in range(lo, hi)
+                      if abs(len(words[i]) - len(word)) <= limit and edit_distance(word, words[i], limit) <= limit]
+        return found
+
+    def _ids(self, t):
+        _, first, count = self._token(t)
+        return self._postings[first:first + count]
+
+    def search(self, query, limit=5):
+        """[(Product, pertinence)] : part des mots de la recherche retrouvés, noms les plus courts d'abord."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words: return []
+        matches = [m for m in (self._matches(w) for w in words) if m]
+        if not matches: return []
+        # Candidats : produits du mot le plus rare ; les autres mots sont cherchés par dichotomie dans leurs listes
+        matches.sort(key=lambda m: sum(len(ids) for _, ids in m))
+        scores = {}
+        for weight, ids in matches[0]:
+            for i in ids[:MAX_CANDIDATES]: scores[i] = max(scores.get(i, 0), weight)
+        for m in matches[1:]:
+            for i in scores:
+                best = 0
+                for weight, ids in m:
+                    j = bisect.bisect_left(ids, i)
+                    if j < len(ids) and ids[j] == i: best = max(best, weight)
+                scores[i] += best
+        n = len(words)
+        # À pertinence égale, le nom le plus proche en longueur de la recherche, puis la fiche la plus complète
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], abs(self._name_length(kv[0]) - n), kv[0]))
+        return [(self.product(i), s / n) for i, s in ranked[:limit]]
+
+    def lookup(self, query):
+        """Meilleur produit pour ce nom, ou None si aucun ne correspond assez."""
+        best = self.search(query, limit=1)
+        return best[0][0] if best and best[0][1] >= MATCH_MIN else None
+
+    # --- LECTEURS ---
+    # Un index remplacé (fichier recompilé) peut encore servir à une recherche d'un autre thread :
+    # acquire/release comptent ces lecteurs, le mmap n'est fermé qu'après le dernier.
+    def acquire(self):
+        """Réserve l'index pour une lecture. False s'il est déjà fermé (ou en passe de l'être)."""
+        with self._lock:
+            if self._closing: return False
+            self._readers += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._readers -= 1
+            last = self._closing and not self._readers
+        if last: self._free()
+
+    def close(self):
+        """Ferme l'index tout de suite, ou à la fin de la dernière lecture en cours."""
+        with self._lock:
+            if self._closing: return
+            self._closing = True
+            idle = not self._readers
+        if idle: self._free()
+
+    def _free(self):
+        self._postings.release()
+        self._mm.close()
+
+
+class _Words:
+    """Table triée des mots de l'index, lue à la demande (pour bisect)."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.token_count
+
+    def __getitem__(self, t):
+        return self.index._token(t)[0]
@@ -0,0 +1,33 @@
+"""Limite de débit par minute, partagée entre threads (quotas yt-dlp / Gemini)."""
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Au plus `per_minute` appels sur toute fenêtre glissante de `period` secondes (0 = illimité)."""
+
+    def __init__(self, per_minute, period=60.0):
+        self.per_minute = per_minute
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Prend une place sans attendre. Renvoie 0.0 si l'appel est autorisé, sinon les secondes avant la prochaine place."""
+        if not self.per_minute: return 0.0
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.period: self._calls.popleft()
+            if len(self._calls) < self.per_minute:
+                self._calls.append(now)
+                return 0.0
+            return self.period - (now - self._calls[0])
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un appel soit autorisé. Renvoie le temps attendu (s)."""
+        waited = 0.0
+        while wait := self.try_acquire():
+            time.sleep(wait)
+            waited += wait
+        return waited
@@ -0,0 +1,279 @@
+"""Recherche dans la bibliothèque : index inversé en mémoire sur le nom, les tags et les ingrédients.
+
+Sans accents ni casse ("pates" trouve "Pâtes"), tolérant aux fautes de frappe ("carbonnara"),
+et par préfixe ("courg" trouve "courgette"). Filtres par score, temps de préparation et nutrition.
+L'index suit le journal des modifications de la base (RecipeStore.changes_since) : seules les
+recettes ajoutées, modifiées ou supprimées depuis la dernière recherche sont réindexées.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+
+from goumin.ingredients import clean_ingredient_name
+
+# Mots trop fréquents pour servir à la recherche
+STOPWORDS = frozenset("""
+a au aux avec d de des du en et l la le les ou pour sans sur un une
+""".split())
+
+# Poids d'un mot selon l'endroit où il apparaît
+FIELD_WEIGHTS = {"nom": 3.0, "tags": 2.0, "ingredients": 1.0}
+# Qualité de la correspondance d'un mot de la requête
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.5
+MAX_EXPANSIONS = 50  # Mots du vocabulaire essayés au plus par préfixe
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_HOURS = re.compile(r"(\d+)\s*h(?:eures?)?\s*(\d+)?")
+
+
+def fold(text):
+    """'Crème Brûlée' -> 'creme brulee'"""
+    return unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+
+
+def _stem(token):
+    # Pluriels : tomates -> tomate, poireaux -> poireau (des deux côtés, index et requête)
+    return token[:-1] if len(token) > 3 and token[-1] in "sx" else token
+
+
+def tokenize(text):
+    return [_stem(t) for t in _TOKEN.findall(fold(text)) if t not in STOPWORDS and not t.isdigit()]
+
+
+def max_typos(token):
+    return 0 if len(token) < 5 else 1 if len(token) < 9 else 2
+
+
+def _deletes(token, distance):
+    """Toutes les variantes de `token` privées de 1 à `distance` lettres (méthode SymSpell)."""
+    found, frontier = set(), {token}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b, limit):
+    """Distance de Damerau-Levenshtein (transpositions comprises), abandonnée au-delà de `limit`."""
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit: return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def parse_minutes(text):
+    """'20 min' -> 20, '1h30' -> 90, '1 heure' -> 60, '?' -> None"""
+    text = fold(str(text or ""))
+    hours = _HOURS.search(text)
+    if hours: return int(hours.group(1)) * 60 + int(hours.group(2) or 0)
+    number = _NUMBER.search(text)
+    return int(float(number.group().replace(",", "."))) if number else None
+
+
+@dataclass(slots=True)
+class _Doc:
+    tokens: dict       # {mot: poids du champ}
+    score: int
+    minutes: int
+    cal: float
+    prot: float
+    carb: float
+    fat: float
+    tags: frozenset
+
+
+class JournalIndex:
+    """Index en mémoire tenu à jour par le journal des modifications de la base.
+
+    Les sous-classes fournissent add(recette), remove(id) et rebuild(recettes) ; load(store)
+    peut être redéfini pour une relecture complète plus rapide que rebuild(store.all()).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.seq = None         # Dernier numéro du journal de la base déjà pris en compte
+
+    def load(self, store):
+        self.rebuild(store.all())
+
+    def sync(self, store):
+        """Rattrape les modifications de la base depuis la dernière synchronisation."""
+        with self._lock:
+            if self.seq is None or store.last_change() < self.seq:
+                self.seq = store.last_change()
+                self.load(store)
+                store.prune_changes()
+                return
+            seq, changed = store.changes_since(self.seq)
+            if changed is None:
+                self.seq = None
+                return self.sync(store)
+            if changed:
+                found = {r.id: r for r in store.get_many(changed)}
+                for rid in changed:
+                    if rid in found: self.add(found[rid])
+                    else: self.remove(rid)
+            self.seq = seq
+
+
+class SearchIndex(JournalIndex):
+    """Index inversé mot -> {id: poids}, plus un index de fautes de frappe sur le vocabulaire."""
+
+    def __init__(self):
+        super().__init__()
+        self.docs = {}
+        self.postings = {}
+        self._vocab = []        # Trié, pour la recherche par préfixe
+        self._vocab_dirty = False
+        self._typos = {}        # Variante sans 1-2 lettres -> mots du vocabulaire
+        self._tags = {}         # Tag -> ids
+        self._columns = None    # Champ numérique -> (valeurs triées, ids dans le même ordre), pour les filtres
+
+    # --- MISE A JOUR ---
+    def add(self, recipe):
+        """Indexe (ou réindexe) une recette."""
+        tokens = {}
+        for field, texts in (("nom", [recipe.nom]), ("tags", recipe.tags),
+                             ("ingredients", [clean_ingredient_name(i) for i in recipe.ingredients])):
+            for text in texts:
+                for token in tokenize(text):
+                    tokens[token] = max(tokens.get(token, 0), FIELD_WEIGHTS[field])
+        n = recipe.nutrition
+        doc = _Doc(tokens, recipe.score, parse_minutes(recipe.temps), n.kcal, n.prot_g, n.carb_g, n.fat_g,
+                   frozenset(recipe.tags))
+        with self._lock:
+            self.remove(recipe.id)
+            self.docs[recipe.id] = doc
+            for field, (values, ids) in (self._columns or {}).items():
+                v = getattr(doc, field)
+                if v is None: continue
+                i = bisect.bisect_left(values, v)
+                values.insert(i, v); ids.insert(i, recipe.id)
+            for t in doc.tags: self._tags.setdefault(t, set()).add(recipe.id)
+            for token, weight in tokens.items():
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = {}
+                    self._add_vocab(token)
+                posting[recipe.id] = weight
+
+    def remove(self, rid):
+        with self._lock:
+            doc = self.docs.pop(rid, None)
+            if not doc: return
+            for field, (values, ids) in (self._columns or {}).items():
+                v = getattr(doc, field)
+                if v is None: continue
+                i = bisect.bisect_left(values, v)
+                while ids[i] != rid: i += 1
+                del values[i], ids[i]
+            for t in doc.tags:
+                self._tags[t].discard(rid)
+                if not self._tags[t]: del self._tags[t]
+            for token in doc.tokens:
+                posting = self.postings[token]
+                posting.pop(rid, None)
+                if not posting:
+                    del self.postings[token]
+                    self._remove_vocab(token)
+
+    def _add_vocab(self, token):
+        self._vocab_dirty = True
+        for variant in _deletes(token, max_typos(token)) | {token}:
+            self._typos.setdefault(variant, set()).add(token)
+
+    def _remove_vocab(self, token):
+        self._vocab_dirty = True
+        for variant in _deletes(token, max_typos(token)) | {token}:
+            words = self._typos.get(variant)
+            if words:
+                words.discard(token)
+                if not words: del self._typos[variant]
+
+    def rebuild(self, recipes):
+        with self._lock:
+            self.docs, self.postings, self._typos, self._tags, self._vocab, self._columns = {}, {}, {}, {}, [], None
+            for r in recipes: self.add(r)
+
+    # --- RECHERCHE ---
+    def _expand(self, token):
+        """{mot du vocabulaire: qualité} pour un mot de la requête."""
+        if self._vocab_dirty:
+            self._vocab = sorted(self.postings)
+            self._vocab_dirty = False
+        matches = {token: EXACT} if token in self.postings else {}
+        if len(token) >= 3:
+            start = bisect.bisect_left(self._vocab, token)
+            for word in self._vocab[start:start + MAX_EXPANSIONS]:
+                if not word.startswith(token): break
+                matches.setdefault(word, PREFIX)
+        limit = max_typos(token)
+        if limit:
+            candidates = set()
+            for variant in _deletes(token, limit) | {token}:
+                candidates |= self._typos.get(variant, set())
+            for word in candidates:
+                if word not in matches and edit_distance(token, word, limit) <= limit:
+                    matches[word] = FUZZY
+        return matches
+
+    def _column(self, field):
+        if self._columns is None: self._columns = {}
+        if field not in self._columns:
+            pairs = sorted((v, rid) for rid, d in self.docs.items() if (v := getattr(d, field)) is not None)
+            self._columns[field] = ([v for v, _ in pairs], [rid for _, rid in pairs])
+        return self._columns[field]
+
+    def _in_range(self, field, bounds):
+        """Ids dont la valeur est dans [min, max] : deux recherches dichotomiques dans la colonne triée."""
+        values, ids = self._column(field)
+        lo, hi = bounds
+        start = 0 if lo is None else bisect.bisect_left(values, lo)
+        end = len(values) if hi is None else bisect.bisect_right(values, hi)
+        return set(ids[start:end])
+
+    def search(self, query="", score=None, minutes=None, cal=None, prot=None, carb=None, fat=None, tag=None, limit=None):
+        """Ids des recettes trouvées, les plus pertinentes d'abord (puis meilleur score).
+
+        Chaque mot de la requête doit correspondre (exactement, par préfixe ou à une faute près).
+        Les filtres sont des bornes (min, max), None pour ne pas borner : score=(70, None), minutes=(None, 30).
+        Une recette dont la valeur est inconnue est exclue par un filtre sur cette valeur.
+        """
+        with self._lock:
+            relevance = None
+            for term in tokenize(query):
+                hits = {}
+                for word, quality in self._expand(term).items():
+                    for rid, weight in self.postings[word].items():
+                        w = quality * weight
+                        if hits.get(rid, 0) < w: hits[rid] = w
+                relevance = hits if relevance is None else {rid: r + hits[rid] for rid, r in relevance.items() if rid in hits}
+                if not relevance: return []
+
+            keep = None  # Ids retenus par les filtres (None : pas de filtre)
+            if tag: keep = set(self._tags.get(tag, ()))
+            for field, bounds in (("score", score), ("minutes", minutes), ("cal", cal),
+                                  ("prot", prot), ("carb", carb), ("fat", fat)):
+                if not bounds or bounds == (None, None): continue
+                ids = self._in_range(field, bounds)
+                keep = ids if keep is None else keep & ids
+
+            if relevance is None:
+                # Pas de texte : ordre du score, déjà trié dans la colonne
+                by_score = reversed(self._column("score")[1])
+                found = [rid for rid in by_score if rid in keep] if keep is not None else list(by_score)
+            else:
+                if keep is not None: relevance = {rid: r for rid, r in relevance.items() if rid in keep}
+                docs = self.docs
+                found = sorted(relevance, key=lambda rid: (-relevance[rid], -docs[rid].score))
+        return found[:limit]
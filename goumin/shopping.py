@@ -0,0 +1,176 @@
+"""Liste de courses : ingrédients de plusieurs recettes regroupés, quantités additionnées, rangés par rayon.
+
+    courses = ShoppingList(store, owner="marie@example.com")
+    courses.add_recipe(recette)   # 2 oeufs + 3 oeufs -> 5 oeufs ; 20 cl + 1 l de lait -> 1,2 l
+    courses.toggle(item_id, True)
+
+Chaque article a un id stable (nom canonique + nature de l'unité) : ajouter deux fois le même
+ingrédient complète la même ligne, cocher ou retirer un article ne touche que lui.
+La liste est enregistrée en base, par utilisateur.
+"""
+import hashlib
+from dataclasses import asdict, dataclass, field
+
+from goumin.ingredients import Ingredient, fold, format_ingredient, parse_items
+
+# Cuillères en ml, pour additionner "1 c.à.s" et "50 ml" d'un même ingrédient
+SPOON_ML = {"c.à.s": 15, "c.à.c": 5}
+
+# Rayon -> mots du nom canonique (sans accents), dans l'ordre d'un magasin
+AISLES = {
+    "🥦 Fruits & légumes": """ail oignon echalote tomate courgette aubergine poivron carotte poireau pomme poire banane
+        citron orange avocat salade epinard champignon brocoli chou concombre patate celeri fenouil radis haricot
+        petit pois mangue fraise framboise myrtille ananas kiwi raisin persil coriandre basilic menthe ciboulette
+        thym romarin laurier gingembre courge potiron butternut patate douce betterave asperge artichaut navet""",
+    "🥩 Boucherie & poisson": """poulet boeuf veau porc agneau dinde canard jambon lardon bacon saucisse chorizo viande
+        hache steak saumon thon cabillaud crevette poisson colin sardine maquereau moule""",
+    "🧀 Crèmerie": """lait beurre creme oeuf fromage yaourt parmesan feta mozzarella chevre emmental gruyere comte
+        ricotta mascarpone skyr fromage blanc""",
+    "🍝 Épicerie salée": """pate pates spaghetti riz quinoa lentille pois chiche semoule boulgour farine huile vinaigre
+        sel poivre moutarde sauce soja bouillon cumin paprika curry curcuma epice concentre conserve olive
+        mais tortilla chapelure""",
+    "🍫 Épicerie sucrée": """sucre miel chocolat cacao levure vanille confiture sirop avoine flocon cereale amande noix
+        noisette cannelle compote biscuit""",
+    "🥖 Boulangerie": "pain baguette brioche pita wrap",
+    "🧊 Surgelés": "surgele glace",
+    "🥤 Boissons": "eau vin biere jus cafe the",
+}
+OTHER_AISLE = "🧺 Autres"
+_AISLE_WORDS = {w: aisle for aisle, words in AISLES.items() for w in words.split()}
+_AISLE_ORDER = {aisle: i for i, aisle in enumerate([*AISLES, OTHER_AISLE])}
+
+
+def aisle_of(name):
+    """Rayon d'un ingrédient d'après les mots de son nom ('crème fraîche' -> Crèmerie)."""
+    words = fold(name).replace("'", " ").split()
+    for w in words:
+        if w in _AISLE_WORDS: return _AISLE_WORDS[w]
+        if w.rstrip("sx") in _AISLE_WORDS: return _AISLE_WORDS[w.rstrip("sx")]
+    return OTHER_AISLE
+
+
+def _dimension(unit):
+    # Unités qu'on sait additionner entre elles
+    if unit == "g": return "masse"
+    if unit == "ml" or unit in SPOON_ML: return "volume"
+    return unit or "pièce"
+
+
+def item_id(name, unit):
+    return hashlib.sha1(f"{name}|{_dimension(unit)}".encode()).hexdigest()[:10]
+
+
+@dataclass(slots=True)
+class ShoppingItem:
+    id: str
+    name: str
+    qty: float = None     # None : quantité non précisée ("sel")
+    unit: str = None
+    aisle: str = OTHER_AISLE
+    checked: bool = False
+    sources: list = field(default_factory=list)  # Recettes d'où vient l'article
+
+    @property
+    def text(self):
+        text = format_ingredient(Ingredient(self.qty, self.unit, self.name, self.name))
+        return text[:1].upper() + text[1:]
+
+
+def _to_ml(qty, unit):
+    return qty * SPOON_ML.get(unit, 1)
+
+
+def _add_quantities(item, qty, unit):
+    """Ajoute `qty` `unit` à l'article (même nature d'unité), en convertissant les cuillères si besoin."""
+    if qty is None: return
+    if item.qty is None: item.qty, item.unit = qty, unit
+    elif item.unit == unit: item.qty += qty
+    elif item.unit == "c.à.s" and unit == "c.à.c": item.qty += qty / 3
+    elif item.unit == "c.à.c" and unit == "c.à.s": item.qty, item.unit = item.qty / 3 + qty, "c.à.s"
+    else: item.qty, item.unit = _to_ml(item.qty, item.unit) + _to_ml(qty, unit), "ml"  # Cuillères + ml
+
+
+class ShoppingList:
+    """Liste d'un utilisateur : dict id -> article (ajout, retrait, cochage en O(1)), écrite en base à chaque changement."""
+
+    def __init__(self, store, owner):
+        self.store, self.owner = store, owner
+        self.reload()
+
+    def reload(self):
+        """Relit la liste en base (un autre onglet du même utilisateur a pu la modifier)."""
+        self.items = {}
+        self._by_name = {}  # Nom -> id du premier article de ce nom (pour "sel" sans quantité)
+        for data in self.store.shopping_items(self.owner): self._put(ShoppingItem(**data))
+
+    def _put(self, item):
+        self.items[item.id] = item
+        self._by_name.setdefault(item.name, item.id)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _save(self, items):
+        self.store.save_shopping_items(self.owner, [asdict(i) for i in items])
+
+    def add_lines(self, lines, source=None):
+        """Ajoute des lignes d'ingrédients ; les ingrédients déjà présents sont additionnés."""
+        self.reload()  # Additionne aux quantités en base, pas à une copie périmée
+        changed = {}
+        for ing in (ing for line in lines for ing in parse_items(line)):  # "Sel, poivre" : deux articles
+            # Sans quantité ("sel") : rejoint l'article du même nom s'il existe déjà
+            iid = self._by_name.get(ing.name) if ing.qty is None else None
+            iid = iid or item_id(ing.name, ing.unit)
+            item = self.items.get(iid)
+            if item is None:
+                item = ShoppingItem(iid, ing.name, aisle=aisle_of(ing.name))
+                self._put(item)
+            _add_quantities(item, ing.qty, ing.unit)
+            item.checked = False  # Rajouté : à racheter
+            if source and source not in item.sources: item.sources.append(source)
+            changed[iid] = item
+        self._save(changed.values())
+        return list(changed.values())
+
+    def add_recipe(self, recipe, lines=None):
+        """Ingrédients d'une recette (ou `lines`, par exemple recalculées pour un autre nombre de personnes)."""
+        return self.add_lines(recipe.ingredients if lines is None else lines, source=recipe.nom)
+
+    def toggle(self, iid, checked):
+        item = self.items.get(iid)
+        if item and item.checked != checked:
+            item.checked = checked
+            self._save([item])
+
+    def _forget(self, iid):
+        item = self.items.pop(iid, None)
+        if item and self._by_name.get(item.name) == iid:
+            del self._by_name[item.name]
+            other = next((i for i in self.items.values() if i.name == item.name), None)
+            if other: self._by_name[item.name] = other.id
+        return item
+
+    def remove(self, iid):
+        if self._forget(iid): self.store.delete_shopping_items(self.owner, [iid])
+
+    def clear(self, checked_only=False):
+        """Vide la liste, ou retire seulement les articles cochés."""
+        if not checked_only:
+            self.items.clear()
+            self._by_name.clear()
+            self.store.delete_shopping_items(self.owner)
+            return
+        done = [iid for iid, item in self.items.items() if item.checked]
+        for iid in done: self._forget(iid)
+        self.store.delete_shopping_items(self.owner, done)
+
+    def by_aisle(self):
+        """[(rayon, [articles])] dans l'ordre du magasin, articles à acheter avant les articles cochés."""
+        groups = {}
+        for item in self.items.values(): groups.setdefault(item.aisle, []).append(item)
+        return [(aisle, sorted(items, key=lambda i: (i.checked, i.name)))
+                for aisle, items in sorted(groups.items(), key=lambda g: _AISLE_ORDER.get(g[0], len(_AISLE_ORDER)))]
+
+    def as_text(self):
+        """Liste à copier (SMS), sans les articles cochés."""
+        return "\n".join(f"- {item.text}" for _, items in self.by_aisle() for item in items if not item.checked)
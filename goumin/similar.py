@@ -0,0 +1,114 @@
+"""Recettes semblables et doublons probables, par signatures MinHash calculées en local.
+
+La signature d'une recette résume l'ensemble {mots du nom, ingrédients canoniques} : deux recettes
+ont autant de valeurs communes dans leur signature que leurs ensembles se recouvrent (Jaccard).
+Elle est enregistrée avec la recette (RecipeStore). L'index LSH range chaque signature dans
+BANDS seaux : on ne compare une recette qu'aux quelques recettes qui partagent un seau avec elle.
+"""
+import hashlib
+import operator
+import random
+from array import array
+
+from goumin.fridge import STAPLES
+from goumin.ingredients import parse_ingredients
+from goumin.search import JournalIndex, tokenize
+
+BANDS, ROWS = 20, 3          # 60 valeurs ; à 50 % de ressemblance, 93 % de chances d'être comparées
+NUM_PERM = BANDS * ROWS
+DUPLICATE_SIMILARITY = 0.6   # Au-delà : doublon probable (même plat importé de deux créateurs)
+SIMILAR_MIN = 0.2            # En dessous : pas montré dans « Recettes similaires »
+
+# Version du calcul des signatures : à augmenter si shingles / signature changent (ou ce qu'ils utilisent,
+# comme le nom canonique des ingrédients), pour que la base recalcule les signatures enregistrées
+SIGNATURE_VERSION = 1
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240131)  # Graine fixe : les signatures enregistrées restent comparables
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(recipe):
+    # Basiques (sel, huile...) exclus : présents partout, ils rapprocheraient des plats sans rapport
+    features = {"n:" + t for t in tokenize(recipe.nom)}
+    features.update("i:" + ing.name for ing in parse_ingredients(recipe.ingredients) if ing.name not in STAPLES)
+    return features
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def signature(recipe):
+    """Signature MinHash (tuple de NUM_PERM entiers), () pour une recette sans nom ni ingrédient."""
+    hashes = [_hash(s) for s in shingles(recipe)]
+    if not hashes: return ()
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Ressemblance estimée (Jaccard) entre deux signatures, de 0 à 1."""
+    if not sig_a or not sig_b: return 0.0
+    return sum(map(operator.eq, sig_a, sig_b)) / NUM_PERM
+
+
+def to_bytes(sig):
+    return array("Q", sig).tobytes() if sig else None
+
+
+def from_bytes(data):
+    return tuple(array("Q", data)) if data else ()
+
+
+def _bands(sig):
+    return [(band, hash(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class SimilarIndex(JournalIndex):
+    """Seaux LSH (bande, valeurs) -> ids, et signature de chaque recette."""
+
+    def __init__(self):
+        super().__init__()
+        self.sigs = {}
+        self.buckets = {}
+
+    def _put(self, rid, sig):
+        self.remove(rid)
+        if not sig or len(sig) != NUM_PERM: return
+        self.sigs[rid] = sig
+        for key in _bands(sig): self.buckets.setdefault(key, set()).add(rid)
+
+    def add(self, recipe):
+        with self._lock: self._put(recipe.id, signature(recipe))
+
+    def remove(self, rid):
+        with self._lock:
+            sig = self.sigs.pop(rid, None)
+            if sig is None: return
+            for key in _bands(sig):
+                bucket = self.buckets[key]
+                bucket.discard(rid)
+                if not bucket: del self.buckets[key]
+
+    def rebuild(self, recipes):
+        with self._lock:
+            self.sigs, self.buckets = {}, {}
+            for r in recipes: self.add(r)
+
+    def load(self, store):
+        # Signatures déjà calculées à l'enregistrement : rien à recalculer
+        with self._lock:
+            self.sigs, self.buckets = {}, {}
+            for rid, data in store.signatures(): self._put(rid, from_bytes(data))
+
+    def similar(self, sig, limit=6, exclude=None, min_similarity=SIMILAR_MIN):
+        """[(id, ressemblance)] des recettes les plus proches, sans comparer toute la bibliothèque."""
+        if not sig: return []
+        with self._lock:
+            candidates = set()
+            for key in _bands(sig): candidates |= self.buckets.get(key, set())
+            candidates.discard(exclude)
+            scored = [(rid, similarity(sig, self.sigs[rid])) for rid in candidates]
+        scored = [(rid, s) for rid, s in scored if s >= min_similarity]
+        scored.sort(key=lambda pair: -pair[1])
+        return scored[:limit]
@@ -0,0 +1,431 @@
+"""Stockage des recettes : SQLite en mode WAL, une ligne par recette."""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from goumin.imports import canonical_url
+from goumin.models import NUTRITION_VERSION, parse_recipe
+from goumin.similar import SIGNATURE_VERSION, signature, to_bytes
+
+# Champs ajoutés aux anciennes recettes qui ne les ont pas
+DEFAULT_FIELDS = {
+    "tags": list,
+    "nutrition": dict,
+    "score": lambda: 50,
+    "portion_text": lambda: "Non spécifié",
+}
+
+# Tris proposés par la bibliothèque (tous servis par un index)
+ORDERS = {
+    "recent": "r.rowid DESC",
+    "oldest": "r.rowid ASC",
+    "score": "r.score DESC, r.rowid DESC",
+    "date": "r.date DESC, r.rowid DESC",
+    # Valeurs inconnues (NULL) en dernier
+    "kcal": "r.kcal IS NULL, r.kcal ASC, r.rowid DESC",
+    "prot": "r.prot_g IS NULL, r.prot_g DESC, r.rowid DESC",
+}
+
+# Colonnes numériques de la table recipes (vue en colonnes : goumin.columns)
+NUMERIC_COLUMNS = ("score", "kcal", "prot_g", "carb_g", "fat_g")
+
+
+def _recompute_nutrition(conn):
+    # Réécrit chaque recette : nombres dans le JSON et dans les colonnes, score normalisé
+    for (data,) in conn.execute("SELECT data FROM recipes").fetchall():
+        r = parse_recipe(json.loads(data), strict=False)
+        n = r.nutrition
+        conn.execute("UPDATE recipes SET score = ?, kcal = ?, prot_g = ?, carb_g = ?, fat_g = ?, data = ? WHERE id = ?",
+                     (r.score, n.kcal, n.prot_g, n.carb_g, n.fat_g, json.dumps(r.to_dict(), ensure_ascii=False), r.id))
+
+
+def _recompute_minhash(conn):
+    rows = conn.execute("SELECT id, data FROM recipes").fetchall()
+    conn.executemany("UPDATE recipes SET minhash = ? WHERE id = ?",
+                     [(to_bytes(signature(_load(data))), rid) for rid, data in rows])
+
+
+# Données dérivées, calculées par le code Python courant : hors des migrations de schéma (qui ne changent
+# jamais une fois publiées). nom -> (version du calcul, fonction). meta garde la version appliquée à la base ;
+# une version plus récente dans le code relance le calcul sur toutes les recettes (RecipeStore.refresh_derived).
+DERIVED = {
+    "nutrition": (NUTRITION_VERSION, _recompute_nutrition),
+    "minhash": (SIGNATURE_VERSION, _recompute_minhash),
+}
+
+
+# Chaque script SQL fait passer le schéma à la version suivante (PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE recipes (
+        id    TEXT PRIMARY KEY,
+        nom   TEXT NOT NULL DEFAULT '',
+        score INTEGER NOT NULL DEFAULT 50,
+        date  TEXT NOT NULL DEFAULT '',
+        data  TEXT NOT NULL
+    );
+    CREATE INDEX idx_recipes_score ON recipes(score);
+    CREATE INDEX idx_recipes_date ON recipes(date);
+    CREATE TABLE recipe_tags (
+        recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+        tag       TEXT NOT NULL,
+        PRIMARY KEY (recipe_id, tag)
+    );
+    CREATE INDEX idx_recipe_tags_tag ON recipe_tags(tag);
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    """,
+    # v2 : images adressées par hash, partagées entre recettes
+    """
+    ALTER TABLE recipes ADD COLUMN image_hash TEXT;
+    CREATE INDEX idx_recipes_image_hash ON recipes(image_hash);
+    """,
+    # v3 : résultats d'analyse vidéo, par id canonique (extracteur:id)
+    """
+    CREATE TABLE video_imports (
+        key     TEXT PRIMARY KEY,
+        url     TEXT NOT NULL,
+        title   TEXT,
+        thumb   TEXT,
+        recipe  TEXT NOT NULL,
+        created TEXT NOT NULL
+    );
+    CREATE INDEX idx_video_imports_url ON video_imports(url);
+    """,
+    # v4 : journal des recettes modifiées, pour tenir à jour les index en mémoire (recherche),
+    # quel que soit le process qui écrit (application, ligne de commande)
+    """
+    CREATE TABLE recipe_changes (
+        seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipe_id TEXT NOT NULL
+    );
+    CREATE TRIGGER trg_recipes_insert AFTER INSERT ON recipes
+        BEGIN INSERT INTO recipe_changes(recipe_id) VALUES (new.id); END;
+    CREATE TRIGGER trg_recipes_update AFTER UPDATE ON recipes
+        BEGIN INSERT INTO recipe_changes(recipe_id) VALUES (new.id); END;
+    CREATE TRIGGER trg_recipes_delete AFTER DELETE ON recipes
+        BEGIN INSERT INTO recipe_changes(recipe_id) VALUES (old.id); END;
+    """,
+    # v5 : nutrition en nombres (kcal, grammes) ; remplie par DERIVED["nutrition"]
+    """
+    ALTER TABLE recipes ADD COLUMN kcal REAL;
+    ALTER TABLE recipes ADD COLUMN prot_g REAL;
+    ALTER TABLE recipes ADD COLUMN carb_g REAL;
+    ALTER TABLE recipes ADD COLUMN fat_g REAL;
+    CREATE INDEX idx_recipes_kcal ON recipes(kcal);
+    CREATE INDEX idx_recipes_prot ON recipes(prot_g);
+    """,
+    # v6 : listes de courses, une par utilisateur, un article par ligne (id stable)
+    """
+    CREATE TABLE shopping_items (
+        owner TEXT NOT NULL,
+        id    TEXT NOT NULL,
+        data  TEXT NOT NULL,
+        PRIMARY KEY (owner, id)
+    );
+    """,
+    # v7 : signature MinHash de chaque recette (recettes similaires, doublons : goumin.similar)
+    # remplie par DERIVED["minhash"]
+    "ALTER TABLE recipes ADD COLUMN minhash BLOB;",
+]
+
+
+def _statements(script):
+    """Instructions d'un script SQL, une par une (executescript validerait la transaction en cours)."""
+    statements, current = [], ""
+    for part in script.split(";"):
+        current += part + ";"
+        if sqlite3.complete_statement(current):
+            if current.strip(" \n;"): statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def new_recipe_id(now=None):
+    """Id trié par date et sans collision entre imports simultanés : '20240131_154210_a3f9c1'."""
+    return f"{(now or datetime.now()):%Y%m%d_%H%M%S}_{secrets.token_hex(3)}"
+
+
+def backfill_defaults(recipe):
+    """Complète une recette avec les champs par défaut manquants."""
+    for field, factory in DEFAULT_FIELDS.items():
+        if field not in recipe: recipe[field] = factory()
+    return recipe
+
+
+def _date_column(date_text):
+    # "17/10/2026" -> "2026-10-17" pour que l'index trie dans le bon ordre
+    try: return datetime.strptime(date_text, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except (TypeError, ValueError): return ""
+
+
+def _load(data):
+    return parse_recipe(json.loads(data), strict=False)
+
+
+class RecipeStore:
+    """Accès aux recettes. Une connexion SQLite par thread (une par session Streamlit)."""
+
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self._local = threading.local()
+        self._migrate_schema()
+        if legacy_json: self._import_legacy_json(legacy_json)
+        self.refresh_derived()
+
+    # --- CONNEXION ---
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE : on prend le verrou d'écriture tout de suite,
+        # deux sessions qui écrivent en même temps passent l'une après l'autre.
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _migrate_schema(self):
+        # Une étape par transaction BEGIN IMMEDIATE, version relue sous le verrou : deux process
+        # (ou deux stores) qui ouvrent la même base en même temps n'appliquent jamais une étape deux fois.
+        while True:
+            with self._write() as conn:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(MIGRATIONS): return
+                for statement in _statements(MIGRATIONS[version]): conn.execute(statement)
+                conn.execute(f"PRAGMA user_version={version + 1}")
+
+    def refresh_derived(self, force=False):
+        """Recalcule les données dérivées (DERIVED) dont la version en base n'est pas celle du code.
+
+        Chaque calcul dans sa transaction BEGIN IMMEDIATE, version relue sous le verrou (une seule fois
+        même si plusieurs process ouvrent la base). force=True : tout recalculer. Renvoie les noms recalculés.
+        """
+        done = []
+        for name, (version, compute) in DERIVED.items():
+            key = f"derived_{name}"
+            if not force and self.get_meta(key) == str(version): continue
+            with self._write() as conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+                if not force and row and row[0] == str(version): continue
+                compute(conn)
+                conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, str(version)))
+                done.append(name)
+        return done
+
+    def _import_legacy_json(self, json_path):
+        """Migration unique depuis l'ancien database.json (avec correction des champs manquants)."""
+        if self.get_meta("legacy_json_imported") or not os.path.exists(json_path): return
+        try:
+            with open(json_path, "r", encoding="utf-8") as f: data = json.load(f)
+        except (OSError, ValueError): data = []
+        with self._write() as conn:
+            # Re-vérifié sous le verrou : un autre process a pu faire l'import entre-temps
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'").fetchone(): return
+            for r in data:
+                if isinstance(r, dict) and r.get("id"):
+                    self._upsert(conn, backfill_defaults(r), replace=False)
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('legacy_json_imported', ?)", (json_path,))
+
+    # --- META ---
+    def get_meta(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._write() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    # --- ECRITURE ---
+    @staticmethod
+    def _upsert(conn, recipe, replace=True):
+        # Toujours normalisé par le modèle : score entier, nutrition en nombres ; signature recalculée
+        recipe = parse_recipe(recipe, strict=False)
+        n = recipe.nutrition
+        # ON CONFLICT ... DO UPDATE garde le rowid, donc l'ordre d'ajout
+        conflict = ("ON CONFLICT(id) DO UPDATE SET nom = excluded.nom, score = excluded.score, date = excluded.date, "
+                    "image_hash = excluded.image_hash, kcal = excluded.kcal, prot_g = excluded.prot_g, "
+                    "carb_g = excluded.carb_g, fat_g = excluded.fat_g, minhash = excluded.minhash, data = excluded.data"
+                    ) if replace else "ON CONFLICT(id) DO NOTHING"
+        cur = conn.execute(
+            "INSERT INTO recipes(id, nom, score, date, image_hash, kcal, prot_g, carb_g, fat_g, minhash, data) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) {conflict}",
+            (recipe.id, recipe.nom, recipe.score, _date_column(recipe.date), recipe.images.get("hash"),
+             n.kcal, n.prot_g, n.carb_g, n.fat_g, to_bytes(signature(recipe)),
+             json.dumps(recipe.to_dict(), ensure_ascii=False)),
+        )
+        if cur.rowcount:
+            conn.execute("DELETE FROM recipe_tags WHERE recipe_id = ?", (recipe.id,))
+            conn.executemany("INSERT INTO recipe_tags(recipe_id, tag) VALUES (?, ?)",
+                             [(recipe.id, t) for t in set(recipe.tags)])
+
+    def insert(self, recipe):
+        with self._write() as conn: self._upsert(conn, recipe)
+
+    def update(self, rid, expect=None, **fields):
+        """Modifie quelques champs d'une recette. Renvoie la recette mise à jour (ou None).
+
+        `expect` : {champ: valeur} qui doivent encore être vrais, sinon rien n'est écrit
+        (évite d'écraser une modification faite entre-temps par une autre session).
+        """
+        with self._write() as conn:
+            row = conn.execute("SELECT data FROM recipes WHERE id = ?", (rid,)).fetchone()
+            if not row: return None
+            recipe = json.loads(row[0])
+            if expect and any(recipe.get(k) != v for k, v in expect.items()): return None
+            recipe.update(fields)
+            self._upsert(conn, recipe)
+            return parse_recipe(recipe, strict=False)
+
+    def delete(self, rid):
+        with self._write() as conn:
+            return conn.execute("DELETE FROM recipes WHERE id = ?", (rid,)).rowcount > 0
+
+    def replace_all(self, recipes):
+        """Remplace toute la bibliothèque (ancien comportement de save_db)."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM recipes")
+            for r in recipes: self._upsert(conn, r)
+
+    # --- IMPORTS VIDEO ---
+    def save_import(self, key, url, title, thumb, recipe):
+        with self._write() as conn:
+            conn.execute("INSERT OR REPLACE INTO video_imports(key, url, title, thumb, recipe, created) VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, url, title, thumb, json.dumps(recipe.to_dict(), ensure_ascii=False), datetime.now().isoformat()))
+
+    def find_import(self, key=None, url=None):
+        """Analyse déjà faite pour cette vidéo (par clé canonique ou par URL nettoyée), sinon None."""
+        sql, param = ("key = ?", key) if key else ("url = ?", url)
+        row = self._conn().execute(f"SELECT key, url, title, thumb, recipe FROM video_imports WHERE {sql}", (param,)).fetchone()
+        if not row: return None
+        return {"key": row[0], "url": row[1], "title": row[2], "thumb": row[3],
+                "recipe": parse_recipe(json.loads(row[4]), strict=False)}
+
+    # --- LISTES DE COURSES ---
+    def shopping_items(self, owner):
+        """Articles de la liste de `owner` (dicts), dans l'ordre d'ajout."""
+        sql = "SELECT data FROM shopping_items WHERE owner = ? ORDER BY rowid"
+        return [json.loads(d) for (d,) in self._conn().execute(sql, (owner,))]
+
+    def save_shopping_items(self, owner, items):
+        with self._write() as conn:
+            conn.executemany("INSERT INTO shopping_items(owner, id, data) VALUES (?, ?, ?) "
+                             "ON CONFLICT(owner, id) DO UPDATE SET data = excluded.data",
+                             [(owner, item["id"], json.dumps(item, ensure_ascii=False)) for item in items])
+
+    def delete_shopping_items(self, owner, ids=None):
+        """Supprime ces articles (ou toute la liste si ids est None)."""
+        with self._write() as conn:
+            if ids is None: conn.execute("DELETE FROM shopping_items WHERE owner = ?", (owner,))
+            else: conn.executemany("DELETE FROM shopping_items WHERE owner = ? AND id = ?", [(owner, i) for i in ids])
+
+    def move_shopping_items(self, old_owner, new_owner):
+        """Rattache la liste de `old_owner` à `new_owner` ; les articles déjà chez `new_owner` gardent sa version."""
+        with self._write() as conn:
+            conn.execute("UPDATE OR IGNORE shopping_items SET owner = ? WHERE owner = ?", (new_owner, old_owner))
+            conn.execute("DELETE FROM shopping_items WHERE owner = ?", (old_owner,))
+
+    # --- JOURNAL DES MODIFICATIONS ---
+    def last_change(self):
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM recipe_changes").fetchone()[0]
+
+    def changes_since(self, seq):
+        """(dernier numéro, ids des recettes ajoutées / modifiées / supprimées depuis `seq`).
+
+        Renvoie (dernier numéro, None) si le journal ne remonte plus jusque-là (tout est à relire).
+        """
+        conn = self._conn()
+        first = conn.execute("SELECT MIN(seq) FROM recipe_changes").fetchone()[0]
+        if first is not None and first > seq + 1: return self.last_change(), None
+        rows = conn.execute("SELECT seq, recipe_id FROM recipe_changes WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        return (rows[-1][0] if rows else seq), {rid for _, rid in rows}
+
+    def prune_changes(self, keep=10000):
+        """Oublie les plus anciennes entrées du journal (un lecteur trop en retard relira tout)."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM recipe_changes WHERE seq <= (SELECT MAX(seq) FROM recipe_changes) - ?", (keep,))
+
+    # --- LECTURE ---
+    def get(self, rid):
+        """Recipe (ou None)."""
+        row = self._conn().execute("SELECT data FROM recipes WHERE id = ?", (rid,)).fetchone()
+        return _load(row[0]) if row else None
+
+    def find_by_url(self, urls):
+        """Plus ancienne recette importée depuis une de ces URL (nettoyées, cf. canonical_url), sinon None."""
+        rows = self._conn().execute("SELECT id, json_extract(data, '$.url') FROM recipes ORDER BY rowid")
+        rid = next((rid for rid, url in rows if url and canonical_url(url) in urls), None)
+        return self.get(rid) if rid else None
+
+    def get_many(self, ids):
+        """Recipes de ces ids, dans le même ordre (les ids inconnus sont ignorés)."""
+        found = {}
+        ids = list(ids)
+        for i in range(0, len(ids), 500):  # Limite du nombre de paramètres SQLite
+            chunk = ids[i:i + 500]
+            sql = f"SELECT id, data FROM recipes WHERE id IN ({', '.join('?' * len(chunk))})"
+            found.update((rid, _load(d)) for rid, d in self._conn().execute(sql, chunk))
+        return [found[rid] for rid in ids if rid in found]
+
+    def all(self):
+        """Toutes les recettes, dans l'ordre d'ajout."""
+        return [_load(d) for (d,) in self._conn().execute("SELECT data FROM recipes ORDER BY rowid")]
+
+    def columns(self, fields=NUMERIC_COLUMNS):
+        """(ids, {champ: valeurs}) de toute la bibliothèque, dans l'ordre d'ajout, sans relire le JSON."""
+        rows = self._conn().execute(f"SELECT id, {', '.join(fields)} FROM recipes ORDER BY rowid").fetchall()
+        return [r[0] for r in rows], {f: [r[i] for r in rows] for i, f in enumerate(fields, start=1)}
+
+    def signatures(self):
+        """[(id, signature MinHash en octets)] de toute la bibliothèque (goumin.similar.from_bytes)."""
+        return self._conn().execute("SELECT id, minhash FROM recipes ORDER BY rowid").fetchall()
+
+    @staticmethod
+    def _where(tag=None, min_score=None):
+        clauses, params = [], []
+        if tag:
+            clauses.append("r.id IN (SELECT recipe_id FROM recipe_tags WHERE tag = ?)")
+            params.append(tag)
+        if min_score is not None:
+            clauses.append("r.score >= ?")
+            params.append(int(min_score))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(self, tag=None, min_score=None):
+        where, params = self._where(tag, min_score)
+        return self._conn().execute(f"SELECT COUNT(*) FROM recipes r{where}", params).fetchone()[0]
+
+    def page(self, offset=0, limit=12, order="recent", tag=None, min_score=None):
+        """Une tranche de la bibliothèque : filtre et tri faits par SQLite avant le LIMIT."""
+        where, params = self._where(tag, min_score)
+        sql = f"SELECT r.data FROM recipes r{where} ORDER BY {ORDERS[order]} LIMIT ? OFFSET ?"
+        return [_load(d) for (d,) in self._conn().execute(sql, params + [int(limit), int(offset)])]
+
+    def sort_ids(self, ids, order="recent"):
+        """Ces ids (résultats d'une recherche) dans l'ordre `order` de la bibliothèque (ORDERS)."""
+        sql = f"SELECT r.id FROM recipes r WHERE r.id IN (SELECT value FROM json_each(?)) ORDER BY {ORDERS[order]}"
+        return [rid for (rid,) in self._conn().execute(sql, (json.dumps(list(ids)),))]
+
+    def image_refs(self, digest):
+        """Nombre de recettes qui utilisent encore cette image."""
+        return self._conn().execute("SELECT COUNT(*) FROM recipes WHERE image_hash = ?", (digest,)).fetchone()[0]
+
+    def tags(self):
+        """Tags utilisés, du plus fréquent au plus rare."""
+        sql = "SELECT tag FROM recipe_tags GROUP BY tag ORDER BY COUNT(*) DESC, tag"
+        return [t for (t,) in self._conn().execute(sql)]
@@ -0,0 +1,167 @@
+"""Mesures des imports et des appels IA : durée de chaque étape, octets envoyés, jetons Gemini, erreurs.
+
+    tel = Telemetry("trace.jsonl", metrics_path="metrics.prom")
+    with tel.trace(), tel.span("download", url=url) as span:
+        ...
+        span.set(bytes=taille)
+    tel.count("ai_cache", result="hit")
+    tel.stats()   # {"download": {"count", "errors", "p50", "p95", "mean"}}
+
+Chaque étape terminée ajoute une ligne au journal JSONL (fichier tournant : trace.jsonl, .1, .2...) ;
+les étapes d'un même import partagent un identifiant de trace. Compteurs et durées sont aussi écrits
+au format texte Prometheus (metrics_path), lisible par le collecteur "textfile" de node_exporter.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+WINDOW = 1000         # Dernières durées gardées par étape, pour les percentiles
+METRICS_EVERY = 10    # Secondes entre deux écritures du fichier Prometheus (hors fin de trace)
+RECENT_ERRORS = 20
+
+_trace = contextvars.ContextVar("goumin_trace", default=None)
+
+
+class Span:
+    __slots__ = ("stage", "attrs", "error")
+
+    def __init__(self, stage, attrs):
+        self.stage, self.attrs, self.error = stage, attrs, None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        """Étape en échec sans exception (réponse vide, JSON illisible...)."""
+        self.error = str(error)
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+class Telemetry:
+    """Mesures d'un process, sûres entre threads. Sans chemin : en mémoire seulement."""
+
+    def __init__(self, trace_path=None, max_bytes=10 * 1024 * 1024, backups=3, metrics_path=None):
+        self._lock = threading.Lock()
+        self._durations = {}   # étape -> deque des dernières durées (s)
+        self._totals = {}      # étape -> [nombre, erreurs, somme des durées]
+        self._counters = {}    # (nom, labels) -> valeur
+        self.errors = deque(maxlen=RECENT_ERRORS)
+        self.metrics_path = metrics_path
+        self._metrics_written = 0
+        self._handler = None
+        if trace_path:
+            self._handler = RotatingFileHandler(trace_path, maxBytes=max_bytes, backupCount=backups,
+                                                encoding="utf-8", delay=True)
+
+    @contextmanager
+    def trace(self):
+        """Regroupe les étapes qui suivent sous un même identifiant (celui en cours s'il y en a un).
+
+        À la fin de la trace la plus externe, le fichier Prometheus est mis à jour.
+        """
+        if _trace.get():
+            yield _trace.get()
+            return
+        token = _trace.set(uuid.uuid4().hex[:12])
+        try: yield _trace.get()
+        finally:
+            _trace.reset(token)
+            self.write_metrics()
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """Chronomètre une étape. Une exception est comptée comme erreur de l'étape, puis propagée."""
+        span = Span(stage, attrs)
+        start = time.perf_counter()
+        try: yield span
+        except Exception as e:
+            span.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally: self._record(span, time.perf_counter() - start)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock: self._counters[key] = self._counters.get(key, 0) + value
+
+    def usage(self, span, usage):
+        """Jetons d'une réponse Gemini (usage_metadata), sur l'étape et dans les compteurs."""
+        prompt = getattr(usage, "prompt_token_count", 0) or 0
+        output = getattr(usage, "candidates_token_count", 0) or 0
+        if not (prompt or output): return
+        span.set(prompt_tokens=prompt, output_tokens=output)
+        self.count("gemini_tokens", prompt, kind="prompt")
+        self.count("gemini_tokens", output, kind="output")
+
+    def _record(self, span, seconds):
+        with self._lock:
+            self._durations.setdefault(span.stage, deque(maxlen=WINDOW)).append(seconds)
+            totals = self._totals.setdefault(span.stage, [0, 0, 0.0])
+            totals[0] += 1
+            totals[2] += seconds
+            if span.error:
+                totals[1] += 1
+                self.errors.append((datetime.now().strftime("%H:%M:%S"), span.stage, span.error))
+            due = self.metrics_path and time.monotonic() - self._metrics_written >= METRICS_EVERY
+            if due: self._metrics_written = time.monotonic()
+        if self._handler:
+            line = {"ts": datetime.now().isoformat(timespec="milliseconds"), "trace": _trace.get(), "stage": span.stage,
+                    "ms": round(seconds * 1000, 1), "ok": span.error is None, **span.attrs}
+            if span.error: line["error"] = span.error
+            self._handler.handle(logging.makeLogRecord({"msg": json.dumps(line, ensure_ascii=False, default=str)}))
+        if due: self.write_metrics()
+
+    # --- LECTURE ---
+    def stats(self):
+        """{étape: {"count", "errors", "p50", "p95", "mean"}} (percentiles sur les WINDOW dernières durées)."""
+        with self._lock:
+            snapshot = {stage: (sorted(d), self._totals[stage]) for stage, d in self._durations.items()}
+        return {stage: {"count": count, "errors": errors, "p50": _quantile(ordered, 0.5),
+                        "p95": _quantile(ordered, 0.95), "mean": total / count}
+                for stage, (ordered, (count, errors, total)) in snapshot.items()}
+
+    def counters(self):
+        """{(nom, ((label, valeur), ...)): valeur}"""
+        with self._lock: return dict(self._counters)
+
+    def prometheus_text(self):
+        lines = ["# TYPE goumin_stage_seconds summary"]
+        stats = self.stats()
+        with self._lock: totals = {s: list(t) for s, t in self._totals.items()}
+        for stage, s in sorted(stats.items()):
+            lines += [f'goumin_stage_seconds{{stage="{stage}",quantile="0.5"}} {s["p50"]:.6f}',
+                      f'goumin_stage_seconds{{stage="{stage}",quantile="0.95"}} {s["p95"]:.6f}',
+                      f'goumin_stage_seconds_sum{{stage="{stage}"}} {totals[stage][2]:.6f}',
+                      f'goumin_stage_seconds_count{{stage="{stage}"}} {s["count"]}']
+        lines.append("# TYPE goumin_stage_errors_total counter")
+        lines += [f'goumin_stage_errors_total{{stage="{stage}"}} {s["errors"]}' for stage, s in sorted(stats.items())]
+        by_name = {}
+        for (name, labels), value in sorted(self.counters().items()): by_name.setdefault(name, []).append((labels, value))
+        for name, values in by_name.items():
+            lines.append(f"# TYPE goumin_{name}_total counter")
+            lines += [f"goumin_{name}_total{_labels(labels)} {value:g}" for labels, value in values]
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path=None):
+        """Écrit le fichier Prometheus (remplacé d'un coup : jamais lu à moitié écrit)."""
+        path = path or self.metrics_path
+        if not path: return
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f: f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        except OSError: pass  # Les mesures ne doivent jamais faire échouer un import
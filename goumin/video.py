@@ -0,0 +1,87 @@
+"""Préparation des vidéos avant envoi à Gemini : proxy basse définition via ffmpeg."""
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from glob import glob
+
+# Réglages du proxy : assez pour lire les ingrédients à l'écran et entendre la voix off
+PROXY_HEIGHT = 360
+PROXY_FPS = 4
+PROXY_CRF = 32
+AUDIO_BITRATE = "32k"
+# Mode "keyframes" : une image toutes les N secondes, assemblées en planches de 4x4
+KEYFRAME_EVERY = 2
+FFMPEG_TIMEOUT = 300
+
+
+@dataclass
+class ProxyResult:
+    files: list = field(default_factory=list)  # Fichiers à envoyer à Gemini (dans l'ordre)
+    original_bytes: int = 0
+    proxy_bytes: int = 0
+    is_proxy: bool = False
+
+    @property
+    def saved_bytes(self):
+        return self.original_bytes - self.proxy_bytes
+
+    def summary(self):
+        if not self.is_proxy: return "Vidéo envoyée telle quelle (ffmpeg indisponible)."
+        pct = 100 * self.saved_bytes / self.original_bytes if self.original_bytes else 0
+        return f"Proxy : {self.original_bytes / 1e6:.1f} Mo → {self.proxy_bytes / 1e6:.1f} Mo (-{pct:.0f} %)"
+
+    def cleanup(self):
+        if not self.is_proxy: return
+        for f in self.files:
+            try: os.remove(f)
+            except OSError: pass
+
+
+def ffmpeg_binary():
+    return os.environ.get("GOUMIN_FFMPEG") or shutil.which("ffmpeg")
+
+
+def _run(cmd):
+    return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=FFMPEG_TIMEOUT).returncode == 0
+
+
+def make_proxy(video_path, mode="video"):
+    """Réduit la vidéo pour l'analyse.
+
+    mode "video" : mp4 360p, 4 i/s, H.264 CRF 32, audio mono 32 kb/s.
+    mode "keyframes" : planches d'images (1 toutes les 2 s) + piste audio mono.
+    Sans ffmpeg, ou si le proxy n'est pas plus petit, on garde la vidéo d'origine.
+    """
+    original = os.path.getsize(video_path)
+    fallback = ProxyResult(files=[video_path], original_bytes=original, proxy_bytes=original)
+    ffmpeg = ffmpeg_binary()
+    if not ffmpeg: return fallback
+
+    base = os.path.splitext(video_path)[0]
+    try:
+        if mode == "keyframes":
+            frames = f"{base}_frames_%02d.jpg"
+            audio = f"{base}_audio.m4a"
+            ok = _run([ffmpeg, "-y", "-loglevel", "error", "-i", video_path, "-an",
+                       "-vf", f"fps=1/{KEYFRAME_EVERY},scale=-2:{PROXY_HEIGHT},tile=4x4", "-q:v", "5", frames])
+            files = sorted(glob(f"{base}_frames_*.jpg"))
+            if _run([ffmpeg, "-y", "-loglevel", "error", "-i", video_path, "-vn",
+                     "-ac", "1", "-c:a", "aac", "-b:a", AUDIO_BITRATE, audio]):
+                files.append(audio)
+        else:
+            out = f"{base}_proxy.mp4"
+            ok = _run([ffmpeg, "-y", "-loglevel", "error", "-i", video_path,
+                       "-vf", f"scale=-2:'min({PROXY_HEIGHT},ih)',fps={PROXY_FPS}",
+                       "-c:v", "libx264", "-preset", "veryfast", "-crf", str(PROXY_CRF),
+                       "-c:a", "aac", "-ac", "1", "-b:a", AUDIO_BITRATE, "-movflags", "+faststart", out])
+            files = [out] if os.path.exists(out) else []
+    except (OSError, subprocess.TimeoutExpired):
+        return fallback
+
+    result = ProxyResult(files=files, original_bytes=original,
+                         proxy_bytes=sum(os.path.getsize(f) for f in files), is_proxy=True)
+    if not ok or not files or result.proxy_bytes >= original:
+        result.cleanup()
+        return fallback
+    return result
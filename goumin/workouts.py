@@ -0,0 +1,172 @@
+"""Séances de sport construites sur place : bibliothèque d'exercices et modèles de séance, sans IA.
+
+    plan = workout_plan(30, "Moyenne", "Maison (Equipé)", ["Haltères"])   # Workout, en une fraction de ms
+
+Les réglages du Coach forment un petit espace (durée, 4 intensités, 4 lieux, 4 matériels) : les
+combinaisons courantes (durées par pas de 5 min) sont calculées une fois au chargement du module,
+les autres à la demande puis gardées. Le temps est réparti entre échauffement, circuit et retour
+au calme ; le nombre de tours du circuit est calculé pour tenir dans la durée demandée.
+Gemini ne sert qu'en option, pour reformuler la séance (Engine.enrich_workout).
+"""
+import functools
+import itertools
+import random
+from typing import NamedTuple
+
+from goumin.models import Exercise, Workout
+
+INTENSITIES = ["Douce", "Moyenne", "Elevée", "Hardcore"]
+PLACES = ["Maison (Poids corps)", "Maison (Equipé)", "Salle", "Extérieur"]
+EQUIPMENT = ["Haltères", "Vélo Appart", "Elastique", "Tapis"]
+
+
+class Move(NamedTuple):
+    name: str
+    cue: str         # Consigne courte, affichée avec le nom
+    group: str       # jambes, haut, tronc, cardio
+    needs: str       # Matériel ou lieu requis (None : rien)
+    timed: bool      # Effort en secondes plutôt qu'en répétitions
+    reps: int = 0    # Répétitions à l'intensité "Moyenne"
+    level: int = 1   # Intensité minimale (1 Douce ... 4 Hardcore)
+
+
+EXERCISES = [
+    Move("Squats", "dos droit, poids sur les talons", "jambes", None, False, 15),
+    Move("Fentes alternées", "le genou arrière frôle le sol", "jambes", None, False, 12),
+    Move("Pont fessier", "serre les fessiers en haut", "jambes", None, False, 15),
+    Move("Chaise contre le mur", "cuisses parallèles au sol", "jambes", "mur", True),
+    Move("Squats sautés", "réception souple", "jambes", None, False, 12, 3),
+    Move("Pompes", "corps gainé, sur les genoux si besoin", "haut", None, False, 10),
+    Move("Dips", "coudes vers l'arrière", "haut", "banc", False, 12),
+    Move("Pompes diamant", "mains rapprochées sous la poitrine", "haut", None, False, 8, 3),
+    Move("Planche", "bassin aligné, ventre rentré", "tronc", None, True),
+    Move("Gainage latéral", "hanches hautes", "tronc", None, True),
+    Move("Crunchs", "le menton loin de la poitrine", "tronc", None, False, 15),
+    Move("Superman", "bras et jambes tendus, regard vers le sol", "tronc", None, False, 12),
+    Move("Jumping jacks", "rythme régulier", "cardio", None, True),
+    Move("Mountain climbers", "genoux vers la poitrine", "cardio", None, True, 0, 2),
+    Move("Burpees", "poitrine au sol, saut bras tendus", "cardio", None, False, 8, 3),
+    Move("Montées de genoux", "sur place, bras actifs", "cardio", None, True),
+    # Matériel
+    Move("Goblet squat", "haltère contre la poitrine", "jambes", "Haltères", False, 12),
+    Move("Soulevé de terre jambes tendues", "dos plat, haltères le long des cuisses", "jambes", "Haltères", False, 12),
+    Move("Développé épaules", "haltères au-dessus de la tête, sans cambrer", "haut", "Haltères", False, 12),
+    Move("Rowing haltère", "coude le long du corps", "haut", "Haltères", False, 12),
+    Move("Tirage élastique", "omoplates serrées", "haut", "Elastique", False, 15),
+    Move("Écarté élastique", "bras presque tendus", "haut", "Elastique", False, 15),
+    Move("Squats avec élastique", "élastique sous les pieds", "jambes", "Elastique", False, 15),
+    Move("Relevés de jambes", "bas du dos collé au tapis", "tronc", "Tapis", False, 12),
+    Move("Bird dog", "bras et jambe opposés, dos immobile", "tronc", "Tapis", False, 10),
+    Move("Vélo en fractionné", "résistance moyenne, pédalage rapide", "cardio", "Vélo Appart", True),
+    # Salle
+    Move("Presse à cuisses", "genoux dans l'axe des pieds", "jambes", "machines", False, 12),
+    Move("Tirage vertical", "barre vers le haut de la poitrine", "haut", "machines", False, 12),
+    Move("Développé couché", "barre au niveau des pectoraux", "haut", "machines", False, 10),
+    Move("Rameur", "pousse avec les jambes, puis tire", "cardio", "machines", True),
+    # Extérieur
+    Move("Sprints courts", "accélère sur 20 m, retour en marchant", "cardio", "course", True, 0, 2),
+    Move("Montées d'escaliers", "une marche à la fois, en rythme", "jambes", "escaliers", True),
+]
+
+# Matériel ou lieux utilisables (en plus de celui coché pour "Maison (Equipé)")
+PLACE_GEAR = {
+    "Maison (Poids corps)": {"mur", "banc"},
+    "Maison (Equipé)": {"mur", "banc"},
+    "Salle": {"mur", "banc", "machines", "Haltères", "Elastique", "Vélo Appart", "Tapis"},
+    "Extérieur": {"banc", "course", "escaliers"},
+}
+
+
+class Level(NamedTuple):
+    rank: int
+    work: int         # Secondes d'effort par exercice
+    rest: int         # Secondes de repos entre exercices
+    factor: float     # Multiplicateur des répétitions
+    size: int         # Exercices par tour
+    round_rest: int   # Secondes de repos entre deux tours
+    title: str
+
+
+LEVELS = {
+    "Douce": Level(1, 30, 30, 0.7, 5, 90, "Remise en route"),
+    "Moyenne": Level(2, 40, 20, 1.0, 6, 60, "Circuit tonique"),
+    "Elevée": Level(3, 45, 15, 1.2, 7, 60, "Circuit brûle-graisses"),
+    "Hardcore": Level(4, 50, 10, 1.5, 8, 45, "HIIT sans pitié"),
+}
+GROUPS = ["jambes", "haut", "tronc", "cardio"]
+
+WARMUP = ["Marche rapide sur place, puis montées de genoux", "Rotations des épaules, des hanches et des chevilles",
+          "Squats lents et fentes sans charge", "Jumping jacks à allure facile"]
+WARMUP_OUTDOOR = ["Footing très lent", *WARMUP[1:3], "Gammes : talons-fesses et pas chassés"]
+COOLDOWN = ["Marche lente, respiration ample", "Étirement des quadriceps et des ischios (30 s par jambe)",
+            "Étirement des pectoraux et des épaules", "Posture de l'enfant, dos relâché"]
+
+
+def _minutes(total, steps):
+    """Répartit `total` minutes sur les étapes : '2 min : ...'."""
+    base, extra = divmod(total, len(steps))
+    return [f"{base + (i < extra)} min : {s}" for i, s in enumerate(steps) if base + (i < extra)]
+
+
+def _pick(moves, level, size, rng):
+    """`size` exercices, en alternant les groupes musculaires ; le matériel disponible passe en premier."""
+    by_group = {g: [m for m in moves if m.group == g and m.level <= level.rank] for g in GROUPS}
+    for g, options in by_group.items():
+        rng.shuffle(options)
+        options.sort(key=lambda m: m.needs in (None, "mur", "banc"))  # Matériel d'abord (tri stable : reste tiré au hasard)
+    picked = []
+    for g in itertools.islice(itertools.cycle(GROUPS), size * 3):
+        if len(picked) == size: break
+        options = [m for m in by_group[g] if m not in picked]
+        if options: picked.append(options[0])
+    return picked
+
+
+def build_plan(duree, intensite, lieu, matos=()):
+    """Workout pour ces réglages (toujours le même pour les mêmes réglages)."""
+    level = LEVELS.get(intensite, LEVELS["Moyenne"])
+    gear = PLACE_GEAR.get(lieu, set()) | (set(matos) if lieu == "Maison (Equipé)" else set())
+    moves = [m for m in EXERCISES if m.needs is None or m.needs in gear]
+    rng = random.Random(f"{duree}|{intensite}|{lieu}|{sorted(matos)}")
+
+    warm = min(max(round(duree * 0.15), 4), 10)
+    cool = min(max(round(duree * 0.1), 3), 8)
+    budget = (duree - warm - cool) * 60
+    slot = level.work + level.rest
+    size = max(3, min(level.size, budget // slot))
+    rounds = max(1, (budget + level.round_rest) // (size * slot + level.round_rest))
+    # Minutes non remplies par des tours entiers : échauffement et retour au calme plus longs
+    spare = max(0, budget - rounds * size * slot - (rounds - 1) * level.round_rest) // 60
+    warm, cool = warm + spare // 2, cool + spare - spare // 2
+
+    circuit = []
+    for m in _pick(moves, level, size, rng):
+        effort = f"{level.work} s" if m.timed else f"{max(1, round(m.reps * level.factor))} reps"
+        circuit.append(Exercise(f"{m.name} ({m.cue})", f"{rounds} × {effort}", f"{level.rest} s"))
+    resume = (f"{rounds} tour{'s' if rounds > 1 else ''} de {len(circuit)} exercices : {level.work} s d'effort "
+              f"ou les répétitions indiquées, {level.rest} s de repos, {level.round_rest} s entre les tours.")
+    return Workout(titre=f"{level.title} – {duree} min", resume=resume,
+                   echauffement=_minutes(warm, WARMUP_OUTDOOR if lieu == "Extérieur" else WARMUP),
+                   circuit=circuit, cooldown=_minutes(cool, COOLDOWN))
+
+
+@functools.lru_cache(maxsize=2048)
+def _plan(duree, intensite, lieu, matos):
+    return build_plan(duree, intensite, lieu, matos)
+
+
+def workout_plan(duree, intensite, lieu, matos=()):
+    """Séance pour ces réglages, servie depuis les séances déjà calculées (ne pas la modifier)."""
+    matos = tuple(sorted(matos)) if lieu == "Maison (Equipé)" else ()
+    return _plan(int(duree), intensite, lieu, matos)
+
+
+def precompute(durations=range(10, 91, 5)):
+    """Calcule d'avance les combinaisons courantes (toutes intensités, lieux et matériels)."""
+    for duree, intensite, lieu in itertools.product(durations, INTENSITIES, PLACES):
+        kits = [()] if lieu != "Maison (Equipé)" else [
+            kit for n in range(len(EQUIPMENT) + 1) for kit in itertools.combinations(EQUIPMENT, n)]
+        for kit in kits: workout_plan(duree, intensite, lieu, kit)
+
+
+precompute()
@@ -0,0 +1,80 @@
+"""GeneratedImageCache contre un générateur d'images local (http.server), sans réseau."""
+import io
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from goumin import image_cache
+from goumin.fetcher import Fetcher
+from goumin.image_cache import GeneratedImageCache
+
+
+def _jpeg():
+    out = io.BytesIO()
+    Image.new("RGB", (40, 30), (200, 120, 60)).save(out, "JPEG")
+    return out.getvalue()
+
+
+class _Generator(BaseHTTPRequestHandler):
+    """Image pour chaque plat ; les plats "rate" renvoient une page HTML avec un code 200."""
+    hits = Counter()
+    image = _jpeg()
+
+    def do_GET(self):
+        dish = self.path.split("/prompt/delicious_", 1)[1].split("_food_photography", 1)[0]
+        self.hits[dish] += 1
+        body, kind = (b"<html>quota</html>", "text/html") if "rate" in dish else (self.image, "image/jpeg")
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): pass
+
+
+@pytest.fixture
+def cache(tmp_path):
+    _Generator.hits.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Generator)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield GeneratedImageCache(tmp_path, base_url=f"http://127.0.0.1:{server.server_port}",
+                              fetcher=Fetcher(max_workers=2, retries=0))
+    server.shutdown()
+    server.server_close()
+
+
+def _wait(cache, names, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        found = cache.get_many(names)
+        if all(found.values()): return found
+        time.sleep(0.02)
+    return cache.get_many(names)
+
+
+def test_miss_is_filled_in_background_then_hit(cache):
+    assert cache.get_many(["Pâtes carbonara", "pates  CARBONARA!"]) == {"Pâtes carbonara": None, "pates  CARBONARA!": None}
+    found = _wait(cache, ["Pâtes carbonara"])
+    assert found["Pâtes carbonara"] and cache.lookup("pates carbonara") == found["Pâtes carbonara"]
+    assert sum(_Generator.hits.values()) == 1  # Un seul téléchargement pour les deux orthographes
+    assert cache.get_many(["Pâtes carbonara"]) == found
+    assert sum(_Generator.hits.values()) == 1  # Trouvée en cache : pas de nouvelle requête
+
+
+def test_get_waits_for_generation(cache):
+    path = cache.get("Soupe")
+    assert path and cache.size() == len(_Generator.image)
+
+
+def test_failure_is_not_stored_nor_retried_before_ttl(cache, monkeypatch):
+    assert cache.get("Tarte rate") is None  # Page d'erreur servie en 200 : jamais écrite comme image
+    assert cache.get_many(["Tarte rate"]) == {"Tarte rate": None}
+    assert _Generator.hits["Tarte%20rate"] == 1 and cache.size() == 0
+    monkeypatch.setattr(image_cache, "FAILURE_TTL", 0)
+    assert cache.get("Tarte rate") is None
+    assert _Generator.hits["Tarte%20rate"] == 2